@@ -0,0 +1,264 @@
+"""Micro-benchmarks of the API endpoints against a seeded SQLite database.
+
+Run it from the repository root:
+
+    python -m benchmarks.endpoints --tags 2000 --history 100000 \
+        --concurrency 1,8,32 --output bench_results.json
+
+Results are written as JSON. Pass `--compare` with a previous result file to
+print the change of each measurement and exit with an error when p95 latency
+or throughput regress by more than `--max-regression`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--musics", type=int, default=20)
+    parser.add_argument("--preferences", type=int, default=100)
+    parser.add_argument("--routines", type=int, default=100)
+    parser.add_argument("--tags", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=500,
+                        help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--concurrency", default="1,8,32",
+                        help="Comma separated concurrency levels.")
+    parser.add_argument("--endpoints", default=None,
+                        help="Comma separated subset of endpoints to run.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default=None,
+                        help="SQLite file to use. Defaults to a temporary file.")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", default=None,
+                        help="Previous result file to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser.parse_args()
+
+
+async def seed(args: argparse.Namespace, rng: random.Random) -> None:
+    """Fill the database with musics, preferences, routines, tags and history."""
+    from src.database.database import Database
+    from src.database.tables import (
+        history_table,
+        music_table,
+        preference_table,
+        routine_table,
+        tag_table
+    )
+
+    await Database.init_models()
+    start = datetime(2024, 1, 1)
+    pairs = sorted({
+        (rng.randint(1, args.musics), rng.randint(1, 8))
+        for _ in range(args.preferences * 2)
+    })[:args.preferences]
+    rows = {
+        music_table: [
+            {"music_id": i, "name": f"music-{i}", "content": "E5:8 E5:8 REST:8 E5:8"}
+            for i in range(1, args.musics + 1)
+        ],
+        preference_table: [
+            {"preference_id": i, "music_id": music_id, "led_color": led_color}
+            for i, (music_id, led_color) in enumerate(pairs, start=1)
+        ],
+        routine_table: [
+            {
+                "routine_id": i,
+                "start_time": f"{rng.randint(0, 11)}:{rng.randint(0, 59):02d}",
+                "end_time": f"{rng.randint(12, 23)}:{rng.randint(0, 59):02d}",
+                "weekday": rng.randint(0, 6)
+            }
+            for i in range(1, args.routines + 1)
+        ],
+        tag_table: [
+            {
+                "tag_id": f"TAG{i:06d}",
+                "name": f"tag-{i}",
+                "preference_id": rng.randint(1, len(pairs)),
+                "routine_id": rng.choice([None, rng.randint(1, args.routines)]),
+                "first_use": start.isoformat(),
+                "last_use": start.isoformat()
+            }
+            for i in range(args.tags)
+        ],
+        history_table: [
+            {
+                "tag_id": f"TAG{rng.randrange(args.tags):06d}",
+                "timestamp": (start + timedelta(seconds=i * 30)).isoformat()
+            }
+            for i in range(args.history)
+        ],
+    }
+    async with Database.transaction() as conn:
+        for table, values in rows.items():
+            for chunk_start in range(0, len(values), 1000):
+                await conn.execute(
+                    table.insert(), values[chunk_start:chunk_start + 1000])
+
+
+def build_scenarios(args: argparse.Namespace, rng: random.Random) -> dict:
+    """Build the request factory of each benchmarked endpoint."""
+
+    def tag_id() -> str:
+        return f"TAG{rng.randrange(args.tags):06d}"
+
+    def handle() -> tuple[str, dict]:
+        params = {
+            "tag_id": tag_id(),
+            "name": "bench",
+            "led_color": rng.randint(1, 8),
+            "music_id": rng.randint(1, args.musics)
+        }
+        if rng.random() < 0.5:
+            params.update(
+                routine_id=rng.randint(1, args.routines),
+                start_time="08:00",
+                end_time="18:00",
+                weekday=rng.randint(1, 6)
+            )
+        return "/tag/handle", params
+
+    return {
+        "GET /tag": lambda: ("/tag", {"tag_id": tag_id()}),
+        "GET /tag/handle": handle,
+        "GET /tag/history": lambda: ("/tag/history", {"id": tag_id()}),
+        "GET /musics": lambda: ("/musics", {}),
+        "GET /preferences": lambda: ("/preferences", {}),
+        "GET /analytics/top-tags": lambda: ("/analytics/top-tags", {}),
+        "GET /analytics/heatmap": lambda: ("/analytics/heatmap", {}),
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, factory, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests with `concurrency` workers and measure them."""
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            url, params = factory()
+            start = time.perf_counter()
+            response = await client.get(url, params=params)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def compare(results: list[dict], baseline_path: str, max_regression: float) -> bool:
+    """Print the change against a previous run and report regressions."""
+    baseline = {
+        (result["endpoint"], result["concurrency"]): result
+        for result in json.loads(Path(baseline_path).read_text())["results"]
+    }
+    regressed = False
+    print(f"\nComparison with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["endpoint"], result["concurrency"]))
+        if not previous:
+            continue
+        p95_change = result["p95_ms"] / previous["p95_ms"] - 1
+        rps_change = result["throughput_rps"] / previous["throughput_rps"] - 1
+        flag = ""
+        if p95_change > max_regression or rps_change < -max_regression:
+            flag = "  REGRESSION"
+            regressed = True
+        print(
+            f"{result['endpoint']:<24} c={result['concurrency']:<4} "
+            f"p95 {p95_change:+.1%}  rps {rps_change:+.1%}{flag}"
+        )
+    return regressed
+
+
+async def main(args: argparse.Namespace) -> int:
+    from httpx import ASGITransport, AsyncClient
+
+    from src.app.main import app
+    from src.database.database import engine
+
+    rng = random.Random(args.seed)
+    await seed(args, rng)
+    scenarios = build_scenarios(args, rng)
+    if args.endpoints:
+        selected = {name.strip() for name in args.endpoints.split(",")}
+        scenarios = {
+            name: factory for name, factory in scenarios.items()
+            if name in selected or name.split(" ", 1)[1] in selected
+        }
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, factory in scenarios.items():
+                for concurrency in levels:
+                    await run_scenario(client, factory, min(20, args.requests), concurrency)
+                    result = await run_scenario(client, factory, args.requests, concurrency)
+                    result.update(endpoint=name, concurrency=concurrency)
+                    results.append(result)
+                    print(
+                        f"{name:<24} c={concurrency:<4} "
+                        f"{result['throughput_rps']:>9.1f} rps  "
+                        f"p50 {result['p50_ms']:>7.2f} ms  "
+                        f"p95 {result['p95_ms']:>7.2f} ms  "
+                        f"p99 {result['p99_ms']:>7.2f} ms  "
+                        f"errors {result['errors']}"
+                    )
+    await engine.dispose()
+
+    output = {
+        "metadata": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": {
+                key: getattr(args, key)
+                for key in ("musics", "preferences", "routines", "tags", "history", "seed")
+            },
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2))
+    print(f"\nResults saved to {args.output}")
+    if args.compare and compare(results, args.compare, args.max_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    database = arguments.database or os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+    sys.exit(asyncio.run(main(arguments)))
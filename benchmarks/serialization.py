@@ -0,0 +1,93 @@
+"""Benchmark of the list endpoint serialization paths.
+
+Compares, for the same database rows, the model path used before (one
+pydantic model per row, then FastAPI validating and serializing the
+returned list through the response model) with `RowSerializer`, which
+dumps the rows to JSON bytes with one precompiled TypeAdapter.
+
+Run it from the repository root:
+
+    python -m benchmarks.serialization --rows 100,1000,10000
+"""
+import argparse
+import json
+import timeit
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+
+from src.app.serialization import RowSerializer
+from src.database.tables import music_table, preference_table
+from src.routing.music.schemas import Music, MusicRow
+from src.routing.preference.schemas import Preference, PreferenceRow
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="100,1000,10000",
+                        help="Comma separated catalogue sizes.")
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def load_rows(size: int) -> dict:
+    """Create `size` musics and preferences and read them back as mappings."""
+    engine = create_engine("sqlite://")
+    music_table.metadata.create_all(engine, tables=[music_table, preference_table])
+    with engine.begin() as conn:
+        conn.execute(music_table.insert(), [
+            {"music_id": i, "name": f"music-{i}", "content": "E5:8 E5:8 REST:8 E5:8"}
+            for i in range(1, size + 1)
+        ])
+        conn.execute(preference_table.insert(), [
+            {"preference_id": i, "music_id": i, "led_color": i % 8}
+            for i in range(1, size + 1)
+        ])
+        return {
+            "musics": conn.execute(music_table.select()).mappings().all(),
+            "preferences": conn.execute(preference_table.select()).mappings().all(),
+        }
+
+
+def model_path(model: type, adapter: TypeAdapter):
+    """Build the previous path: models per row, then response validation."""
+
+    def run(rows) -> bytes:
+        models = [model(**row) for row in rows]
+        content = adapter.dump_python(adapter.validate_python(models), mode="json")
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    return run
+
+
+def main(args: argparse.Namespace) -> None:
+    paths = {
+        "musics": (
+            model_path(Music, TypeAdapter(list[Music])),
+            RowSerializer(MusicRow).dump_many
+        ),
+        "preferences": (
+            model_path(Preference, TypeAdapter(list[Preference])),
+            RowSerializer(PreferenceRow).dump_many
+        ),
+    }
+    print(f"{'endpoint':<12} {'rows':>6} {'models ms':>10} {'rows ms':>9} {'speedup':>8}")
+    for size in (int(size) for size in args.rows.split(",")):
+        rows = load_rows(size)
+        for name, (before, after) in paths.items():
+            assert json.loads(before(rows[name])) == json.loads(after(rows[name]))
+            number = max(1, 10000 // size)
+            before_ms = min(timeit.repeat(
+                lambda: before(rows[name]), number=number, repeat=args.repeat)) / number
+            after_ms = min(timeit.repeat(
+                lambda: after(rows[name]), number=number, repeat=args.repeat)) / number
+            print(
+                f"{name:<12} {size:>6} {before_ms * 1000:>10.3f} "
+                f"{after_ms * 1000:>9.3f} {before_ms / after_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(parse_args())
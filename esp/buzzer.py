@@ -1,5 +1,10 @@
 from machine import Pin, PWM
 from time import sleep
+import struct
+
+# Stream de GET /music/stream: pares (frequência Hz, duração ms) em uint16
+FORMATO_NOTA = "<HH"
+TAMANHO_NOTA = struct.calcsize(FORMATO_NOTA)
 
 class MusicPlayer:
     def __init__(self, pin):
@@ -19,8 +24,9 @@ class MusicPlayer:
         }
 
     def play_tone(self, note, duration_ms):
-        freq = self.NOTES.get(note, 0)
-        
+        self.play_frequency(self.NOTES.get(note, 0), duration_ms)
+
+    def play_frequency(self, freq, duration_ms):
         if freq > 0:
             self.buzzer.freq(freq)
             self.buzzer.duty_u16(32768) # 50% volume
@@ -46,6 +52,16 @@ class MusicPlayer:
         print("Fim da música.")
         sleep(1)
         
+    def play_stream(self, stream):
+        # Toca o stream já compilado pelo servidor, sem consultar NOTES
+        print("Tocando música do servidor...")
+        for offset in range(0, len(stream) - TAMANHO_NOTA + 1, TAMANHO_NOTA):
+            freq, duration = struct.unpack_from(FORMATO_NOTA, stream, offset)
+            self.play_frequency(freq, duration)
+
+        print("Fim da música.")
+        sleep(1)
+
     def processa_music_id(self, id):
         mario_bros = [
         ('E5',8), ('E5',8), ('REST',8), ('E5',8), ('REST',8), ('C5',8), ('E5',4), 
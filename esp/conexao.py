@@ -1,15 +1,373 @@
 import network
 import urequests
+import binascii
 import json
+import os
+import struct
 import time
 
+# Registro binário de GET /tag?format=bin (ver TagUtils.pack_resolution):
+# versão (u8), led_color (u16), music_id (u32), routine_id (u32), flags (u8)
+FORMATO_REGISTRO = "<BHIIB"
+VERSAO_REGISTRO = 1
+TAMANHO_REGISTRO = struct.calcsize(FORMATO_REGISTRO)
+FLAG_ROTINA = 0x01
+
+
+def decodificar_registro(conteudo):
+    # Retorna None se o conteúdo não for um registro binário conhecido
+    if len(conteudo) != TAMANHO_REGISTRO or conteudo[0] != VERSAO_REGISTRO:
+        return None
+    _, led_color, music_id, routine_id, flags = struct.unpack(FORMATO_REGISTRO, conteudo)
+    return {
+        "led_color": led_color,
+        "music_id": music_id,
+        "routine_id": routine_id if flags & FLAG_ROTINA else None
+    }
+
+
+def codificar_registro(resposta):
+    routine_id = resposta["routine_id"]
+    return struct.pack(
+        FORMATO_REGISTRO, VERSAO_REGISTRO, resposta["led_color"], resposta["music_id"],
+        routine_id or 0, FLAG_ROTINA if routine_id else 0)
+
+
+def ler_etag(response):
+    # urequests guarda os cabeçalhos com o nome enviado pelo servidor
+    for nome, valor in (getattr(response, "headers", None) or {}).items():
+        if nome.lower() == "etag":
+            return valor
+    return None
+
+
+# Cache de respostas gravado na flash:
+# cabeçalho = versão (u8), quantidade (u8)
+# entrada = tamanho do UID (u8), UID (10 bytes), registro de GET /tag (12 bytes),
+#           tamanho do ETag (u8), ETag (32 bytes)
+FORMATO_CACHE = "<BB"
+TAMANHO_CABECALHO_CACHE = struct.calcsize(FORMATO_CACHE)
+FORMATO_ENTRADA = "<B10s12sB32s"
+TAMANHO_ENTRADA = struct.calcsize(FORMATO_ENTRADA)
+VERSAO_CACHE = 1
+
+
+class CacheTags:
+    # LRU das respostas por UID. Dentro do TTL a resposta é usada sem falar
+    # com o servidor; vencida, ainda é usada na hora e o UID entra na lista
+    # de revalidação (GET condicional com If-None-Match). As entradas lidas
+    # da flash depois de um reboot começam vencidas.
+    def __init__(self, caminho="cache_tags.bin", capacidade=32, ttl=300):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.entradas = {}  # uid_str -> [resposta, etag, expira, uso]
+        self.vencidos = []
+        self.uso = 0
+        self._carregar()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def obter(self, uid_str):
+        entrada = self.entradas.get(uid_str)
+        if entrada is None:
+            return None
+        self.uso += 1
+        entrada[3] = self.uso
+        if entrada[2] <= time.time() and uid_str not in self.vencidos:
+            self.vencidos.append(uid_str)
+        return entrada[0]
+
+    def etag(self, uid_str):
+        entrada = self.entradas.get(uid_str)
+        return entrada[1] if entrada else None
+
+    def guardar(self, uid_str, resposta, etag):
+        self.uso += 1
+        self.entradas[uid_str] = [resposta, etag, time.time() + self.ttl, self.uso]
+        if len(self.entradas) > self.capacidade:
+            # Remove o usado há mais tempo
+            antigo = min(self.entradas, key=lambda uid: self.entradas[uid][3])
+            del self.entradas[antigo]
+        self.salvar()
+
+    def renovar(self, uid_str):
+        # Servidor respondeu 304: a resposta guardada continua valendo
+        entrada = self.entradas.get(uid_str)
+        if entrada:
+            entrada[2] = time.time() + self.ttl
+
+    def remover(self, uid_str):
+        if self.entradas.pop(uid_str, None) is not None:
+            self.salvar()
+
+    def proximo_vencido(self):
+        while self.vencidos:
+            uid_str = self.vencidos.pop(0)
+            if uid_str in self.entradas:
+                return uid_str
+        return None
+
+    def salvar(self):
+        # Do menos para o mais usado, para manter a ordem do LRU no reboot
+        ordem = sorted(self.entradas, key=lambda uid: self.entradas[uid][3])
+        with open(self.caminho, "wb") as arquivo:
+            arquivo.write(struct.pack(FORMATO_CACHE, VERSAO_CACHE, len(ordem)))
+            for uid_str in ordem:
+                resposta, etag = self.entradas[uid_str][:2]
+                uid = binascii.unhexlify(uid_str)[:10]
+                etag = (etag or "").encode()
+                if len(etag) > 32:
+                    etag = b""  # ETag truncado nunca confere; sem ETag revalida inteiro
+                arquivo.write(struct.pack(
+                    FORMATO_ENTRADA, len(uid), uid, codificar_registro(resposta),
+                    len(etag), etag))
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, "rb") as arquivo:
+                versao, quantidade = struct.unpack(
+                    FORMATO_CACHE, arquivo.read(TAMANHO_CABECALHO_CACHE))
+                if versao != VERSAO_CACHE:
+                    return
+                for _ in range(quantidade):
+                    dados = arquivo.read(TAMANHO_ENTRADA)
+                    if len(dados) != TAMANHO_ENTRADA:
+                        break
+                    tamanho, uid, registro, tamanho_etag, etag = struct.unpack(
+                        FORMATO_ENTRADA, dados)
+                    resposta = decodificar_registro(registro)
+                    if resposta is None:
+                        continue
+                    self.uso += 1
+                    uid_str = binascii.hexlify(uid[:tamanho]).decode().upper()
+                    etag = etag[:tamanho_etag].decode() or None
+                    self.entradas[uid_str] = [resposta, etag, 0, self.uso]
+        except (OSError, ValueError):
+            self.entradas = {}
+
+
+# Cache de músicas gravado na flash, um arquivo por music_id:
+# cabeçalho = versão (u8), tamanho do ETag (u8), seguido do ETag e do stream
+FORMATO_MUSICA = "<BB"
+TAMANHO_CABECALHO_MUSICA = struct.calcsize(FORMATO_MUSICA)
+VERSAO_MUSICA = 1
+
+
+class CacheMusicas:
+    # LRU dos streams compilados por music_id, como o CacheTags: dentro do
+    # TTL o stream toca sem falar com o servidor; vencido, ainda toca na
+    # hora e o music_id entra na lista de revalidação. Só o índice fica na
+    # RAM; o stream é lido do arquivo quando vai tocar. As músicas lidas da
+    # flash depois de um reboot começam vencidas.
+    def __init__(self, diretorio="musicas", capacidade=8, ttl=3600):
+        self.diretorio = diretorio
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.entradas = {}  # music_id -> [etag, expira, uso]
+        self.vencidos = []
+        self.uso = 0
+        self._carregar()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def _caminho(self, music_id):
+        return "{}/{}.bin".format(self.diretorio, music_id)
+
+    def obter(self, music_id):
+        entrada = self.entradas.get(music_id)
+        if entrada is None:
+            return None
+        try:
+            with open(self._caminho(music_id), "rb") as arquivo:
+                cabecalho = arquivo.read(TAMANHO_CABECALHO_MUSICA)
+                arquivo.read(cabecalho[1])
+                stream = arquivo.read()
+        except (OSError, IndexError):
+            # Arquivo apagado ou corrompido: baixa de novo
+            del self.entradas[music_id]
+            return None
+        self.uso += 1
+        entrada[2] = self.uso
+        if entrada[1] <= time.time() and music_id not in self.vencidos:
+            self.vencidos.append(music_id)
+        return stream
+
+    def etag(self, music_id):
+        entrada = self.entradas.get(music_id)
+        return entrada[0] if entrada else None
+
+    def guardar(self, music_id, stream, etag):
+        etag = (etag or "").encode()
+        if len(etag) > 255:
+            etag = b""  # Sem ETag a revalidação baixa o stream inteiro
+        try:
+            os.mkdir(self.diretorio)
+        except OSError:
+            pass  # Já existe
+        with open(self._caminho(music_id), "wb") as arquivo:
+            arquivo.write(struct.pack(FORMATO_MUSICA, VERSAO_MUSICA, len(etag)))
+            arquivo.write(etag)
+            arquivo.write(stream)
+        self.uso += 1
+        self.entradas[music_id] = [etag.decode() or None, time.time() + self.ttl, self.uso]
+        if len(self.entradas) > self.capacidade:
+            # Remove a tocada há mais tempo
+            self.remover(min(self.entradas, key=lambda mid: self.entradas[mid][2]))
+
+    def renovar(self, music_id):
+        # Servidor respondeu 304: o stream guardado continua valendo
+        entrada = self.entradas.get(music_id)
+        if entrada:
+            entrada[1] = time.time() + self.ttl
+
+    def remover(self, music_id):
+        if self.entradas.pop(music_id, None) is not None:
+            try:
+                os.remove(self._caminho(music_id))
+            except OSError:
+                pass
+
+    def proximo_vencido(self):
+        while self.vencidos:
+            music_id = self.vencidos.pop(0)
+            if music_id in self.entradas:
+                return music_id
+        return None
+
+    def _carregar(self):
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError:
+            return  # Nenhuma música guardada ainda
+        for nome in nomes:
+            if not nome.endswith(".bin"):
+                continue
+            try:
+                music_id = int(nome[:-4])
+                with open(self._caminho(music_id), "rb") as arquivo:
+                    cabecalho = arquivo.read(TAMANHO_CABECALHO_MUSICA)
+                    if len(cabecalho) != TAMANHO_CABECALHO_MUSICA:
+                        continue
+                    versao, tamanho_etag = struct.unpack(FORMATO_MUSICA, cabecalho)
+                    etag = arquivo.read(tamanho_etag).decode() or None
+            except (OSError, ValueError):
+                continue
+            if versao == VERSAO_MUSICA:
+                self.uso += 1
+                self.entradas[music_id] = [etag, 0, self.uso]
+
+
+# Fila de toques offline gravada na flash:
+# cabeçalho = versão (u8), capacidade (u16), início (u16), quantidade (u16)
+# registro = timestamp (u32), tamanho do UID (u8), UID (10 bytes)
+FORMATO_CABECALHO = "<BHHH"
+TAMANHO_CABECALHO = struct.calcsize(FORMATO_CABECALHO)
+FORMATO_TOQUE = "<IB10s"
+TAMANHO_TOQUE = struct.calcsize(FORMATO_TOQUE)
+VERSAO_FILA = 1
+ANO_MINIMO = 2024  # Antes disso o relógio ainda não foi sincronizado
+
+
+def formatar_horario(timestamp):
+    # ISO 8601 em UTC, aceito por POST /tag/taps
+    t = time.gmtime(timestamp)
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(*t[:6])
+
+
+class FilaToques:
+    # Buffer circular de tamanho fixo; quando cheio, o toque mais antigo é
+    # sobrescrito. Cada toque grava só o seu registro e o cabeçalho.
+    def __init__(self, caminho="toques.bin", capacidade=64):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.inicio = 0
+        self.quantidade = 0
+        self.descartados = 0
+        try:
+            with open(caminho, "rb") as arquivo:
+                versao, capacidade_salva, inicio, quantidade = struct.unpack(
+                    FORMATO_CABECALHO, arquivo.read(TAMANHO_CABECALHO))
+            tamanho = os.stat(caminho)[6]
+            if (versao == VERSAO_FILA and capacidade_salva == capacidade
+                    and inicio < capacidade and quantidade <= capacidade
+                    and tamanho == TAMANHO_CABECALHO + capacidade * TAMANHO_TOQUE):
+                self.inicio = inicio
+                self.quantidade = quantidade
+                return
+        except (OSError, ValueError):
+            pass
+        # Arquivo ausente ou de outro formato: cria a fila vazia
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(self._cabecalho())
+            arquivo.write(bytes(capacidade * TAMANHO_TOQUE))
+
+    def __len__(self):
+        return self.quantidade
+
+    def _cabecalho(self):
+        return struct.pack(
+            FORMATO_CABECALHO, VERSAO_FILA, self.capacidade, self.inicio, self.quantidade)
+
+    def _posicao(self, indice):
+        return TAMANHO_CABECALHO + ((self.inicio + indice) % self.capacidade) * TAMANHO_TOQUE
+
+    def adicionar(self, uid_str, timestamp=None):
+        uid = binascii.unhexlify(uid_str)[:10]
+        registro = struct.pack(
+            FORMATO_TOQUE, int(timestamp if timestamp is not None else time.time()),
+            len(uid), uid)
+        if self.quantidade == self.capacidade:
+            # Cheia: sobrescreve o mais antigo
+            posicao = self._posicao(0)
+            self.inicio = (self.inicio + 1) % self.capacidade
+            self.descartados += 1
+        else:
+            posicao = self._posicao(self.quantidade)
+            self.quantidade += 1
+        with open(self.caminho, "r+b") as arquivo:
+            arquivo.seek(posicao)
+            arquivo.write(registro)
+            arquivo.seek(0)
+            arquivo.write(self._cabecalho())
+
+    def pendentes(self, limite):
+        # Os toques mais antigos, sem removê-los: [(uid_str, timestamp)]
+        toques = []
+        with open(self.caminho, "rb") as arquivo:
+            for indice in range(min(limite, self.quantidade)):
+                arquivo.seek(self._posicao(indice))
+                timestamp, tamanho, uid = struct.unpack(
+                    FORMATO_TOQUE, arquivo.read(TAMANHO_TOQUE))
+                uid_str = binascii.hexlify(uid[:tamanho]).decode().upper()
+                toques.append((uid_str, timestamp))
+        return toques
+
+    def remover(self, quantidade):
+        quantidade = min(quantidade, self.quantidade)
+        self.inicio = (self.inicio + quantidade) % self.capacidade
+        self.quantidade -= quantidade
+        with open(self.caminho, "r+b") as arquivo:
+            arquivo.write(self._cabecalho())
+
+
 class ConectorInternet:
-    def __init__(self, ssid, password, server_url):
+    def __init__(self, ssid, password, server_url, device_id=None, fila=None,
+                 cache=None, musicas=None, intervalo_reconexao=30, tamanho_lote=20):
         self.ssid = ssid
         self.password = password
         self.server_url = server_url
+        self.device_id = device_id
+        self.fila = fila if fila is not None else FilaToques()
+        self.cache = cache if cache is not None else CacheTags()
+        self.musicas = musicas if musicas is not None else CacheMusicas()
+        self.intervalo_reconexao = intervalo_reconexao
+        self.tamanho_lote = tamanho_lote
+        self.ultima_reconexao = None
         self.wlan = network.WLAN(network.STA_IF)
-        
+
     def conectar_wifi(self):
         # --- FIX PARA "Wifi Internal Error" ---
         # Desliga e liga a interface para limpar o estado do rádio
@@ -38,40 +396,205 @@ class ConectorInternet:
         
         if self.wlan.isconnected():
             print('\nWi-Fi Conectado:', self.wlan.ifconfig())
+            self.sincronizar_relogio()
             return True
         else:
             print('\nFalha ao conectar no Wi-Fi.')
             self.wlan.active(False) # Desliga para economizar e limpar erro
             return False
 
+    def sincronizar_relogio(self):
+        # Os toques offline guardam o horário do dispositivo
+        if time.gmtime()[0] >= ANO_MINIMO:
+            return
+        try:
+            import ntptime
+            ntptime.settime()
+        except Exception as e:
+            print("Não foi possível sincronizar o relógio:", e)
+
+    def reconectar_sem_bloquear(self):
+        # Pede a conexão e volta na hora; no máximo uma vez por intervalo
+        agora = time.time()
+        if (self.ultima_reconexao is not None
+                and agora - self.ultima_reconexao < self.intervalo_reconexao):
+            return
+        self.ultima_reconexao = agora
+        try:
+            self.wlan.active(True)
+            self.wlan.connect(self.ssid, self.password)
+        except OSError as error:
+            print(f"Erro ao solicitar conexão: {error}")
+
+    def guardar_toque(self, uid_str):
+        self.fila.adicionar(uid_str)
+        print(f"Toque guardado offline ({len(self.fila)} pendentes).")
+
+    def sincronizar(self):
+        # Envia os toques pendentes em lotes; chamado a cada volta do loop
+        if not len(self.fila):
+            return 0
+        if not self.wlan.isconnected():
+            self.reconectar_sem_bloquear()
+            return 0
+        self.sincronizar_relogio()
+        url_toques = self.server_url.rstrip("/") + "/taps"
+        enviados = 0
+        while len(self.fila):
+            pendentes = self.fila.pendentes(self.tamanho_lote)
+            agora = time.time()
+            lote = [{
+                "device_id": self.device_id,
+                "tag_id": uid_str,
+                # Toque anterior à sincronização do relógio: usa o horário atual
+                "timestamp": formatar_horario(
+                    timestamp if time.gmtime(timestamp)[0] >= ANO_MINIMO else agora)
+            } for uid_str, timestamp in pendentes]
+            try:
+                response = urequests.post(url_toques, json=lote)
+                status = response.status_code
+                response.close()
+            except Exception as e:
+                print("Erro ao enviar toques pendentes:", e)
+                break
+            if status >= 500:
+                print(f"Servidor indisponível ({status}); tentando mais tarde.")
+                break
+            if status >= 400:
+                # Lote recusado pelo servidor: descarta para não travar a fila
+                print(f"Lote de toques recusado: {status}")
+            self.fila.remover(len(pendentes))
+            enviados += len(pendentes)
+        return enviados
+
+    def revalidar(self):
+        # Confirma com o servidor um item vencido do cache por chamada, tag
+        # antes de música, para não travar o loop; chamado quando não há
+        # tag no leitor
+        if not self.wlan.isconnected():
+            return False
+        uid_str = self.cache.proximo_vencido()
+        if uid_str is not None:
+            return self._revalidar_tag(uid_str)
+        music_id = self.musicas.proximo_vencido()
+        if music_id is not None:
+            return self._revalidar_musica(music_id)
+        return False
+
+    def _revalidar_tag(self, uid_str):
+        etag = self.cache.etag(uid_str)
+        try:
+            response = urequests.get(
+                f"{self.server_url}?tag_id={uid_str}&format=bin",
+                headers={"If-None-Match": etag} if etag else {})
+            if response.status_code == 304:
+                self.cache.renovar(uid_str)
+            elif response.status_code == 200:
+                resposta = decodificar_registro(response.content)
+                if resposta is not None:
+                    self.cache.guardar(uid_str, resposta, ler_etag(response))
+            elif response.status_code == 404:
+                self.cache.remover(uid_str)
+            response.close()
+            return True
+        except Exception as e:
+            print("Erro ao revalidar tag:", e)
+            return False
+
     def enviar_leitura(self, uid_str):
+        resposta = self.cache.obter(uid_str)
+        if resposta is not None:
+            # Resposta imediata; se vencida, é revalidada depois
+            print(f"{uid_str} respondido pelo cache.")
+            if not self.wlan.isconnected():
+                self.guardar_toque(uid_str)
+                self.reconectar_sem_bloquear()
+            return resposta
+
         if not self.wlan.isconnected():
-            print("Wi-Fi desconectado. Tentando reconectar...")
-            if not self.conectar_wifi():
-                return None
+            # Não espera a reconexão: guarda o toque e segue lendo tags
+            print("Wi-Fi desconectado. Guardando toque...")
+            self.guardar_toque(uid_str)
+            self.reconectar_sem_bloquear()
+            return None
 
         print(f"Enviando {uid_str} para API...")
         
         try:
-            # Monta a URL com o parâmetro tag_id
-            url_completa = f"{self.server_url}?tag_id={uid_str}"
+            # Monta a URL com o parâmetro tag_id, pedindo o registro binário
+            url_completa = f"{self.server_url}?tag_id={uid_str}&format=bin"
             response = urequests.get(url_completa)
             retorno = None
             
             # Verifica sucesso (200-299)
             if response.status_code >= 200 and response.status_code < 300:
-                try:
-                    retorno = response.json()
-                except:
-                    # Se não for JSON, retorna o texto puro (fallback)
-                    retorno = response.text
+                retorno = decodificar_registro(response.content)
+                if retorno is not None:
+                    self.cache.guardar(uid_str, retorno, ler_etag(response))
+                else:
+                    try:
+                        # Servidor antigo: resposta em JSON
+                        retorno = response.json()
+                    except:
+                        # Se não for JSON, retorna o texto puro (fallback)
+                        retorno = response.text
                 print(f"Sucesso! (Status {response.status_code})")
             else:
                 print(f"Erro no servidor: {response.status_code} - {response.text}")
+                if response.status_code >= 500:
+                    self.guardar_toque(uid_str)
                 
             response.close() # Sempre fechar a conexão
             return retorno
             
         except Exception as e:
             print("Erro na requisição HTTP:", e)
-            return None
\ No newline at end of file
+            self.guardar_toque(uid_str)
+            return None
+
+    def _revalidar_musica(self, music_id):
+        etag = self.musicas.etag(music_id)
+        try:
+            response = urequests.get(
+                self._url_musica(music_id),
+                headers={"If-None-Match": etag} if etag else {})
+            if response.status_code == 304:
+                self.musicas.renovar(music_id)
+            elif response.status_code == 200:
+                self.musicas.guardar(music_id, response.content, ler_etag(response))
+            elif response.status_code == 404:
+                self.musicas.remover(music_id)
+            response.close()
+            return True
+        except Exception as e:
+            print("Erro ao revalidar música:", e)
+            return False
+
+    def _url_musica(self, music_id):
+        url_musica = self.server_url.rsplit("/tag", 1)[0] + "/music/stream"
+        return f"{url_musica}?music_id={music_id}"
+
+    def baixar_musica(self, music_id):
+        # Stream de notas compilado, do cache ou do servidor; None se não
+        # for possível. Do cache toca na hora, mesmo sem Wi-Fi
+        stream = self.musicas.obter(music_id)
+        if stream is not None:
+            print(f"Música {music_id} tocada do cache.")
+            return stream
+
+        if not self.wlan.isconnected():
+            return None
+
+        try:
+            response = urequests.get(self._url_musica(music_id))
+            stream = None
+            if response.status_code == 200:
+                stream = response.content
+                self.musicas.guardar(music_id, stream, ler_etag(response))
+            else:
+                print(f"Música {music_id} indisponível: {response.status_code}")
+            response.close()
+            return stream
+        except Exception as e:
+            print("Erro ao baixar música:", e)
+            return None
@@ -1,5 +1,6 @@
-from machine import Pin, SPI
+from machine import Pin, SPI, unique_id
 from pn532 import PN532
+import binascii
 import time
 
 # Importamos a nossa nova classe
@@ -19,8 +20,10 @@ PINO_LED = 4      # Pino onde ligou o DIN da fita
 NUM_LEDS = 20      # Quantos LEDs tem na sua fita/anel
 PINO_BUZZER = 15
 
-# 1. Instancia o objeto de conexão
-internet = ConectorInternet(SSID, SENHA, URL_API)
+# 1. Instancia o objeto de conexão (toques offline ficam em toques.bin, as
+# respostas das tags em cache_tags.bin e as músicas na pasta musicas/)
+DEVICE_ID = binascii.hexlify(unique_id()).decode()
+internet = ConectorInternet(SSID, SENHA, URL_API, device_id=DEVICE_ID)
 leds = ControleLED(PINO_LED, NUM_LEDS)
 rotina = ControleRotina(PINO_LED, NUM_LEDS, PINO_BUZZER) 
 player = MusicPlayer(PINO_BUZZER)
@@ -96,7 +99,14 @@ def loop():
                     rotina.definir_rotina(resposta["routine_id"])
                 else:
                     leds.processa_led_id(resposta["led_color"])
-                    player.processa_music_id(resposta["music_id"])
+                    # Vem do cache de músicas quando possível, então uma tag
+                    # respondida pelo cache toca mesmo sem rede
+                    musica = internet.baixar_musica(resposta["music_id"])
+                    if musica:
+                        player.play_stream(musica)
+                    else:
+                        # Fallback: músicas gravadas no dispositivo
+                        player.processa_music_id(resposta["music_id"])
                     
                     
             
@@ -105,8 +115,10 @@ def loop():
             print("Pronto para próxima leitura.")
             print("Aaaaaaaaaaa")
         else:
-            # Mantém o loop rodando sem travar
-            pass
+            # Sem tag: envia os toques guardados enquanto estava offline
+            # e revalida as respostas e músicas vencidas do cache
+            internet.sincronizar()
+            internet.revalidar()
 
 # Execução
 try:
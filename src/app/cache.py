@@ -0,0 +1,180 @@
+"""In-process caches used by the application."""
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class LRUCache:
+    """Size bounded LRU cache whose entries expire after a time to live."""
+
+    def __init__(self, max_size: int, ttl: float):
+        """Initialize the cache.
+
+        Args:
+            max_size (int): The maximum number of entries kept in memory.
+            ttl (float): The time to live of each entry, in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retrieve a value from the cache.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Any): The value returned on a miss.
+
+        Returns:
+            Any: The cached value, or the default if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        """Store a value in the cache, evicting the least recently used entry.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to store.
+            generation (int, optional): The cache generation read before the
+            value was loaded. The value is discarded if an invalidation
+            happened since then, so a slow load can't store stale data.
+        """
+        if self.max_size <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove an entry from the cache.
+
+        Args:
+            key (Hashable): The key of the entry.
+        """
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Remove every entry matching a predicate.
+
+        Args:
+            predicate (Callable): Receives the key and value of each entry.
+        """
+        self.generation += 1
+        for key in [k for k, (_, v) in self._entries.items() if predicate(k, v)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the cache counters.
+
+        Returns:
+            dict: The hit, miss and eviction counters and the cache size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl
+        }
+
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key into a single call.
+
+    The first caller of a key starts the load as a task, and callers
+    arriving while it runs await the same task instead of starting their
+    own. The result or exception is shared by every caller. Each caller
+    waits at most `timeout` seconds; a timed out or cancelled caller does
+    not cancel the load of the others.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        """Initialize the in-flight registry.
+
+        Args:
+            timeout (float, optional): How long each caller waits for the
+            load, in seconds. None or zero waits without limit.
+        """
+        self.timeout = timeout or None
+        self.loads = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a load, or join the one already running for the key.
+
+        Args:
+            key (Hashable): The key identifying the load.
+            load (Callable): Starts the load when no call is in flight.
+
+        Raises:
+            TimeoutError: If the load takes longer than `timeout`.
+
+        Returns:
+            Any: The result of the load.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.loads += 1
+        else:
+            self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved, even if every caller timed out
+
+    def stats(self) -> dict:
+        """Return the coalescing counters.
+
+        Returns:
+            dict: The load, coalesced and timeout counters and the number
+            of loads in flight.
+        """
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._calls)
+        }
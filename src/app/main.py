@@ -2,22 +2,41 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
+from src.app.metrics import MetricsMiddleware
+from src.app.timing import ServerTimingMiddleware, TimedRoute
 from src.database.database import Database
+from src.routing.analytics.router import analytics_router
+from src.routing.events.router import events_router
+from src.routing.export.router import export_router
+from src.routing.metrics.router import metrics_router
+from src.routing.tags.compaction import history_compactor
+from src.routing.tags.history import history_writer
 from src.routing.tags.router import tag_router
 from src.routing.music.router import music_router
 from src.routing.preference.router import preference_router
 from src.routing.routine.router import routine_router
+from src.routing.routine.service import RoutineService
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI application."""
     await Database.init_models()
-    yield
+    await RoutineService.load_schedule()
+    await history_writer.start()
+    await history_compactor.start()
+    try:
+        yield
+    finally:
+        await history_compactor.stop()
+        await history_writer.stop()
 
 
 app = FastAPI(
     title="Python API Crud", version="0.1.0", lifespan=lifespan)
+app.router.route_class = TimedRoute
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -34,3 +53,7 @@ app.include_router(tag_router)
 app.include_router(music_router)
 app.include_router(preference_router)
 app.include_router(routine_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(events_router)
+app.include_router(metrics_router)
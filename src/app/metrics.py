@@ -0,0 +1,243 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Recording a sample is a dict lookup and a few additions, so the metrics are
+cheap enough to stay enabled in production. Each worker process keeps its
+own values.
+"""
+import re
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """Base class for metrics with a fixed set of label names."""
+
+    TYPE = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    TYPE = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class CallbackGauge(Metric):
+    """Gauge whose samples are read from a callback when rendered."""
+
+    TYPE = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Iterable[tuple[LabelValues, float]]],
+        labels: tuple[str, ...] = ()
+    ):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Distribution of observed values per label set."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self._values: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                label_text = _format_labels(self.labels, labels, 'le="' + le + '"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {count}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests by route.",
+    labels=("method", "route", "status")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight",
+    "Number of HTTP requests being processed."
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Latency of database statements by statement kind and table.",
+    labels=("statement",)
+))
+db_connection_acquire_duration = registry.register(Histogram(
+    "db_connection_acquire_seconds",
+    "Time spent waiting for a pooled database connection."
+))
+
+_STATEMENT_PATTERN = re.compile(
+    r"^\s*(\w+)\s+(?:.*?\b(?:FROM|INTO|TABLE)\s+)?[\"`]?(\w+)",
+    re.IGNORECASE | re.DOTALL
+)
+_statement_labels: dict[str, str] = {}
+
+
+def statement_label(statement: str) -> str:
+    """Reduce a SQL statement to its kind and first table, e.g. 'SELECT tag'.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        str: A low cardinality label for the statement.
+    """
+    label = _statement_labels.get(statement)
+    if label is None:
+        match = _STATEMENT_PATTERN.match(statement)
+        if match:
+            label = f"{match.group(1).upper()} {match.group(2)}"
+        else:
+            label = statement.strip().split(" ", 1)[0].upper() or "UNKNOWN"
+        if len(_statement_labels) < 1024:
+            _statement_labels[statement] = label
+    return label
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """SQLAlchemy hook marking the start of a statement."""
+    if context is not None:
+        context._metrics_start = perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """SQLAlchemy hook recording the duration of a statement."""
+    start = getattr(context, "_metrics_start", None)
+    if start is not None:
+        db_query_duration.observe(perf_counter() - start, statement_label(statement))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight HTTP requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            http_request_duration.observe(
+                perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code)
+            )
@@ -0,0 +1,104 @@
+"""Per-table revision counters backing conditional GET requests."""
+import uuid
+from time import time
+
+from fastapi import Request, Response, status
+from pydantic_settings import BaseSettings
+
+
+class RevisionConfig(BaseSettings):
+    """Class related to revision configs."""
+
+    ETAG_MAX_STALENESS: float = 60.0
+
+
+class TableRevisions:
+    """In-process revision counter of each table.
+
+    Services bump the tables they wrote once the write is committed, and
+    the catalogue endpoints derive their ETag from the revisions of the
+    tables they read. The ETag is computed before the query runs, so a
+    write racing a read can only make a client download again, never keep
+    stale data.
+
+    The counters live in each worker. The boot ID keeps ETags of different
+    processes apart, and the ETag also changes every ETAG_MAX_STALENESS
+    seconds, which bounds how long a worker can answer 304 after another
+    worker wrote. Set it to 0 to rely on the counters alone, e.g. with a
+    single worker.
+    """
+
+    def __init__(self, max_staleness: float):
+        """Initialize the counters.
+
+        Args:
+            max_staleness (float): How often ETags change without writes, in
+            seconds. Zero disables it.
+        """
+        self.max_staleness = max_staleness
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._revisions: dict[str, int] = {}
+
+    def bump(self, *tables: str) -> None:
+        """Mark tables as written.
+
+        Args:
+            tables (str): The names of the tables.
+        """
+        for table in tables:
+            self._revisions[table] = self._revisions.get(table, 0) + 1
+
+    def etag(self, *tables: str) -> str:
+        """Build the ETag of data read from tables.
+
+        Args:
+            tables (str): The names of the tables.
+
+        Returns:
+            str: The quoted ETag.
+        """
+        parts = [self.boot_id, *(str(self._revisions.get(table, 0)) for table in tables)]
+        if self.max_staleness > 0:
+            parts.append(str(int(time() // self.max_staleness)))
+        return '"' + "-".join(parts) + '"'
+
+    def check(self, request: Request, response: Response, *tables: str) -> Response | None:
+        """Answer a conditional GET of data read from tables.
+
+        Args:
+            request (Request): The request, used to read If-None-Match.
+            response (Response): The response whose headers are set.
+            tables (str): The names of the tables read by the endpoint.
+
+        Returns:
+            Response | None: A 304 response if the client copy is current,
+            otherwise None after setting the ETag on `response`.
+        """
+        headers = {"ETag": self.etag(*tables), "Cache-Control": "no-cache"}
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the If-None-Match header of a request matches an ETag.
+
+    Args:
+        request (Request): The request.
+        etag (str): The quoted ETag of the current representation.
+
+    Returns:
+        bool: True if the client copy is current.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+revision_config = RevisionConfig()
+table_revisions = TableRevisions(max_staleness=revision_config.ETAG_MAX_STALENESS)
@@ -0,0 +1,56 @@
+"""Fast JSON serialization of database rows."""
+from typing import Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import RowMapping
+
+
+class JSONBytesResponse(Response):
+    """Response whose content is already encoded JSON."""
+
+    media_type = "application/json"
+
+
+class RowSerializer:
+    """Serialize database rows straight to JSON bytes.
+
+    The row type is a TypedDict naming the columns to serialize. Both
+    TypeAdapters are built once, and serializing skips validation and model
+    instantiation entirely: each row is copied into a plain dict by key,
+    which is several times cheaper than `dict(row)` on a `RowMapping`, and
+    the list is dumped in a single pass of pydantic-core.
+    """
+
+    def __init__(self, row_type: type):
+        """Initialize the serializer.
+
+        Args:
+            row_type (type): The TypedDict describing a row.
+        """
+        self.keys = tuple(row_type.__annotations__)
+        self._one = TypeAdapter(row_type)
+        self._many = TypeAdapter(list[row_type])
+
+    def dump_one(self, row: RowMapping) -> bytes:
+        """Serialize one row.
+
+        Args:
+            row (RowMapping): The row.
+
+        Returns:
+            bytes: The row as a JSON object.
+        """
+        return self._one.dump_json({key: row[key] for key in self.keys})
+
+    def dump_many(self, rows: Sequence[RowMapping]) -> bytes:
+        """Serialize a list of rows.
+
+        Args:
+            rows (Sequence[RowMapping]): The rows.
+
+        Returns:
+            bytes: The rows as a JSON array.
+        """
+        keys = self.keys
+        return self._many.dump_json([{key: row[key] for key in keys} for row in rows])
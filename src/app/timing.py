@@ -0,0 +1,177 @@
+"""Per-request timing reported in the Server-Timing response header."""
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Iterator
+
+from fastapi.routing import APIRoute
+from pydantic_settings import BaseSettings
+
+MAX_DB_ENTRIES = 20
+
+
+class TimingConfig(BaseSettings):
+    """Class related to request timing configs."""
+
+    SERVER_TIMING_ENABLED: bool = True
+    SERVER_TIMING_DEBUG: bool = False
+
+
+class RequestTiming:
+    """Collector of the phases and database calls of one request."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.handler_start: float | None = None
+        self.handler_end: float | None = None
+        self.db_calls: list[tuple[str, float]] = []
+
+    def phases(self, response_start: float) -> dict[str, float]:
+        """Split the request time into phases, in milliseconds.
+
+        Args:
+            response_start (float): When the response headers were sent.
+
+        Returns:
+            dict: The duration of each phase that was reached.
+        """
+        phases = {}
+        if self.handler_start is not None and self.handler_end is not None:
+            phases["validation"] = self.handler_start - self.start
+            phases["handler"] = self.handler_end - self.handler_start
+            phases["serialization"] = response_start - self.handler_end
+        phases["db"] = sum(duration for _, duration in self.db_calls)
+        phases["total"] = response_start - self.start
+        return {name: duration * 1000 for name, duration in phases.items()}
+
+    def server_timing(self, response_start: float) -> str:
+        """Build the Server-Timing header value.
+
+        Args:
+            response_start (float): When the response headers were sent.
+
+        Returns:
+            str: The header value.
+        """
+        entries = []
+        for name, duration in self.phases(response_start).items():
+            entry = f"{name};dur={duration:.3f}"
+            if name == "db":
+                entry += f';desc="{len(self.db_calls)} round trips"'
+            entries.append(entry)
+        for index, (name, duration) in enumerate(self.db_calls[:MAX_DB_ENTRIES], 1):
+            entries.append(f"db-{index}-{name};dur={duration * 1000:.3f}")
+        return ", ".join(entries)
+
+    def debug(self, response_start: float) -> str:
+        """Build the debug JSON of the request timing.
+
+        Args:
+            response_start (float): When the response headers were sent.
+
+        Returns:
+            str: The phases and database calls, in milliseconds, as JSON.
+        """
+        return json.dumps({
+            "phases": {
+                name: round(duration, 3)
+                for name, duration in self.phases(response_start).items()
+            },
+            "db_round_trips": len(self.db_calls),
+            "db_calls": [
+                {"call": name, "ms": round(duration * 1000, 3)}
+                for name, duration in self.db_calls
+            ],
+        }, separators=(",", ":"))
+
+
+timing_config = TimingConfig()
+request_timing: ContextVar[RequestTiming | None] = ContextVar(
+    "request_timing", default=None)
+
+
+@contextmanager
+def track_db_call(name: str) -> Iterator[None]:
+    """Report the duration of a database call to the current request.
+
+    Args:
+        name (str): The name of the database call.
+    """
+    timing = request_timing.get()
+    if timing is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing.db_calls.append((name, perf_counter() - start))
+
+
+def timed_endpoint(endpoint):
+    """Wrap an endpoint to mark when the handler starts and ends."""
+    if not iscoroutinefunction(endpoint):
+        return endpoint
+
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timing = request_timing.get()
+        if timing is not None:
+            timing.handler_start = perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if timing is not None:
+                timing.handler_end = perf_counter()
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """Route marking the handler phase of the request timing."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding the Server-Timing header to every response.
+
+    The `X-Request-Timing` debug header carrying the same data as JSON is
+    added when SERVER_TIMING_DEBUG is enabled or the request sends
+    `X-Debug-Timing: 1`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not timing_config.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        debug = timing_config.SERVER_TIMING_DEBUG or any(
+            name == b"x-debug-timing" and value == b"1"
+            for name, value in scope["headers"]
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_start = perf_counter()
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", timing.server_timing(response_start).encode()))
+                if debug:
+                    headers.append(
+                        (b"x-request-timing", timing.debug(response_start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timing.reset(token)
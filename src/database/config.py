@@ -1,3 +1,23 @@
 """Configs for database connections."""
+from pydantic_settings import BaseSettings
 
-database_url = "sqlite+aiosqlite:///src/database/data/sqlite_db.db"
+
+class DatabaseConfig(BaseSettings):
+    """Class related to database configs."""
+
+    DATABASE_URL: str = "sqlite+aiosqlite:///src/database/data/sqlite_db.db"
+    DATABASE_READ_URL: str | None = None
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_RECYCLE: int = 3600
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_PRE_PING: bool = False
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_TEMP_STORE: str = "MEMORY"
+
+
+database_config = DatabaseConfig()
@@ -1,12 +1,116 @@
 """Database module for handling database connections and operations."""
-from sqlalchemy import MetaData
-from sqlalchemy.ext.asyncio import create_async_engine
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import AsyncIterator, Callable, Iterator
+
+from sqlalchemy import (
+    MetaData,
+    RowMapping,
+    Table,
+    and_,
+    event,
+    func,
+    inspect,
+    make_url,
+    select
+)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 from sqlalchemy.orm import declarative_base
 
-from src.database.config import database_url
+from src.app.metrics import (
+    after_cursor_execute,
+    before_cursor_execute,
+    db_connection_acquire_duration
+)
+from src.app.timing import track_db_call
+from src.database.config import database_config
 
 Base = declarative_base(metadata=MetaData())
-engine = create_async_engine(url=database_url)
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply the SQLite performance profile to a new connection.
+
+    WAL lets readers run while a tap is being written, and the remaining
+    pragmas trade durability of the last transactions on power loss for
+    fewer fsyncs and more of the database kept in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma, value in (
+        ("journal_mode", database_config.SQLITE_JOURNAL_MODE),
+        ("synchronous", database_config.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", database_config.SQLITE_BUSY_TIMEOUT),
+        ("mmap_size", database_config.SQLITE_MMAP_SIZE),
+        ("cache_size", database_config.SQLITE_CACHE_SIZE),
+        ("temp_store", database_config.SQLITE_TEMP_STORE),
+    ):
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Create an async engine tuned by `database_config`.
+
+    Args:
+        url (str): The database URL.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    url = make_url(url)
+    options = {}
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        options = {
+            "pool_size": database_config.DATABASE_POOL_SIZE,
+            "max_overflow": database_config.DATABASE_MAX_OVERFLOW,
+            "pool_recycle": database_config.DATABASE_POOL_RECYCLE,
+            "pool_timeout": database_config.DATABASE_POOL_TIMEOUT,
+            "pool_pre_ping": database_config.DATABASE_POOL_PRE_PING,
+        }
+    new_engine = create_async_engine(url, **options)
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    event.listen(new_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    return new_engine
+
+
+@asynccontextmanager
+async def connect(
+    begin: bool = False,
+    read: bool = False
+) -> AsyncIterator[AsyncConnection]:
+    """Check out a connection, recording how long the pool took to hand it over.
+
+    Args:
+        begin (bool): Whether to run the connection inside a transaction.
+        read (bool): Whether the connection only reads. Reads go to the
+        reader engine, if one is configured, unless `read_your_writes` is
+        active.
+
+    Yields:
+        AsyncConnection: The connection.
+    """
+    selected = engine
+    if read and reader_engine is not None and not read_from_writer.get():
+        selected = reader_engine
+    start = perf_counter()
+    async with (selected.begin() if begin else selected.connect()) as conn:
+        db_connection_acquire_duration.observe(perf_counter() - start)
+        yield conn
+
+
+engine = build_engine(database_config.DATABASE_URL)
+reader_engine = (
+    build_engine(database_config.DATABASE_READ_URL)
+    if database_config.DATABASE_READ_URL else None
+)
+read_from_writer: ContextVar[bool] = ContextVar("read_from_writer", default=False)
 
 
 class Database:
@@ -14,30 +118,168 @@ class Database:
 
     @staticmethod
     async def fetch_one(query) -> dict | None:
-        async with engine.connect() as conn:
-            cursor = await conn.execute(query)
-            row = cursor.fetchone()
-            return (row._mapping) if row else None
+        with track_db_call("fetch_one"):
+            async with connect(read=True) as conn:
+                cursor = await conn.execute(query)
+                row = cursor.fetchone()
+                return (row._mapping) if row else None
 
     @staticmethod
     async def fetch_all(query) -> list[dict] | None:
-        async with engine.connect() as conn:
-            cursor = await conn.execute(query)
-            rows = cursor.fetchall()
-            return [(row._mapping) for row in rows]
+        with track_db_call("fetch_all"):
+            async with connect(read=True) as conn:
+                cursor = await conn.execute(query)
+                rows = cursor.fetchall()
+                return [(row._mapping) for row in rows]
+
+    @staticmethod
+    async def stream(query, yield_per: int) -> AsyncIterator[list[RowMapping]]:
+        """Stream the rows of a query with a server-side cursor.
+
+        Args:
+            query: The query to run.
+            yield_per (int): The number of rows fetched per partition.
+
+        Yields:
+            list[RowMapping]: The next partition of rows.
+        """
+        async with connect(read=True) as conn:
+            result = await conn.stream(query.execution_options(yield_per=yield_per))
+            async for partition in result.mappings().partitions():
+                yield partition
 
     @staticmethod
     async def execute(query) -> None:
-        async with engine.begin() as conn:
-            await conn.execute(query)
+        with track_db_call("execute"):
+            async with connect(begin=True) as conn:
+                await conn.execute(query)
 
     @staticmethod
     async def execute_many(queries: list) -> None:
-        async with engine.begin() as conn:
-            for query in queries:
-                await conn.execute(query)
+        with track_db_call("execute_many"):
+            async with connect(begin=True) as conn:
+                for query in queries:
+                    await conn.execute(query)
+
+    @staticmethod
+    @asynccontextmanager
+    async def transaction() -> AsyncIterator[AsyncConnection]:
+        """Run several statements on one connection and one transaction."""
+        with track_db_call("transaction"):
+            async with connect(begin=True) as conn:
+                yield conn
+
+    @staticmethod
+    @contextmanager
+    def read_your_writes() -> Iterator[None]:
+        """Send the reads of the current context to the writer engine.
+
+        Use it around flows that read rows they have just written, which a
+        lagging replica might not have yet.
+        """
+        token = read_from_writer.set(True)
+        try:
+            yield
+        finally:
+            read_from_writer.reset(token)
+
+    @staticmethod
+    def upsert(
+        table: Table,
+        index_elements: list[str],
+        update: list[str] | dict[str, Callable],
+        values: dict | None = None
+    ):
+        """Build an INSERT ... ON CONFLICT DO UPDATE statement.
+
+        On MySQL the statement is an INSERT ... ON DUPLICATE KEY UPDATE,
+        which uses the unique key of the conflicting row.
+
+        Args:
+            table (Table): The table to insert into.
+            index_elements (list[str]): The columns of the unique constraint.
+            update (list[str] | dict): The columns updated when the row exists,
+            set to the inserted values. A dict maps each column to a function
+            receiving the inserted columns and returning the new value. When
+            empty, existing rows are left untouched.
+            values (dict, optional): The values of the new row. Leave it out
+            to execute the statement with a list of rows.
+
+        Returns:
+            Insert: The upsert statement.
+        """
+        if engine.dialect.name == "mysql":
+            statement = mysql_insert(table)
+            new = statement.inserted
+        else:
+            statement = sqlite_insert(table)
+            new = statement.excluded
+        if values is not None:
+            statement = statement.values(values)
+        if isinstance(update, dict):
+            set_ = {column: build(new) for column, build in update.items()}
+        else:
+            set_ = {column: new[column] for column in update}
+        if engine.dialect.name == "mysql":
+            # MySQL has no DO NOTHING, so a key column is set to itself.
+            return statement.on_duplicate_key_update(
+                set_ or {index_elements[0]: table.c[index_elements[0]]})
+        if not set_:
+            return statement.on_conflict_do_nothing(index_elements=index_elements)
+        return statement.on_conflict_do_update(
+            index_elements=index_elements, set_=set_)
 
     @staticmethod
     async def init_models() -> None:
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(Database._create_missing_indexes)
+
+    @staticmethod
+    def _create_missing_indexes(sync_conn) -> None:
+        """Create indexes added to tables that already exist.
+
+        Databases created before the unique preference index may hold
+        duplicated (music_id, led_color) rows, which are merged first.
+        """
+        if not inspect(sync_conn).has_index("preference", "ix_preference_music_id_led_color"):
+            Database._merge_duplicate_preferences(sync_conn)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+
+    @staticmethod
+    def _merge_duplicate_preferences(sync_conn) -> None:
+        """Keep the lowest ID of each duplicated preference.
+
+        Tags pointing at a removed duplicate are moved to the kept row.
+        """
+        preference = Base.metadata.tables["preference"]
+        tag = Base.metadata.tables["tag"]
+        duplicates = sync_conn.execute(
+            select(
+                preference.c.music_id,
+                preference.c.led_color,
+                func.min(preference.c.preference_id)
+            )
+            .group_by(preference.c.music_id, preference.c.led_color)
+            .having(func.count() > 1)
+        ).all()
+        for music_id, led_color, keep in duplicates:
+            others = and_(
+                preference.c.music_id == music_id,
+                preference.c.led_color == led_color,
+                preference.c.preference_id != keep
+            )
+            removed = select(preference.c.preference_id).where(others)
+            sync_conn.execute(
+                tag.update()
+                .where(tag.c.preference_id.in_(removed))
+                .values(preference_id=keep)
+            )
+            sync_conn.execute(preference.delete().where(others))
+        if duplicates:
+            logger.warning(
+                "Merged %d duplicated preferences before creating their unique index.",
+                len(duplicates)
+            )
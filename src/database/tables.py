@@ -1,6 +1,6 @@
 """Tables related to database operations."""
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, LargeBinary, Text
 
 from src.database.database import Base
 
@@ -11,8 +11,19 @@ class Music(Base):
     __tablename__ = "music"
 
     music_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    name = Column(String, nullable=False)
-    content = Column(String, nullable=False)
+    name = Column(String(255), nullable=False)
+    content = Column(Text, nullable=False)
+
+
+class MusicStream(Base):
+    """Database table for the compiled note stream of a music."""
+
+    __tablename__ = "music_stream"
+
+    music_id = Column(Integer, ForeignKey("music.music_id"), primary_key=True)
+    bpm = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    stream = Column(LargeBinary, nullable=False)
 
 
 class Preference(Base):
@@ -24,6 +35,10 @@ class Preference(Base):
     music_id = Column(Integer, ForeignKey("music.music_id"), nullable=False)
     led_color = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        Index("ix_preference_music_id_led_color", music_id, led_color, unique=True),
+    )
+
 
 class Routine(Base):
     """Database table for routines."""
@@ -31,8 +46,8 @@ class Routine(Base):
     __tablename__ = "routine"
 
     routine_id = Column(Integer, primary_key=True, index=True)
-    start_time = Column(String, nullable=False)
-    end_time = Column(String, nullable=False)
+    start_time = Column(String(8), nullable=False)
+    end_time = Column(String(8), nullable=False)
     weekday = Column(Integer, nullable=False)
 
 
@@ -41,12 +56,12 @@ class Tag(Base):
 
     __tablename__ = "tag"
 
-    tag_id = Column(String, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    tag_id = Column(String(64), primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
     preference_id = Column(Integer, ForeignKey("preference.preference_id"))
     routine_id = Column(Integer, ForeignKey("routine.routine_id"), nullable=True)
-    first_use = Column(String, nullable=False, default=datetime.now().isoformat())
-    last_use = Column(String, nullable=False, default=datetime.now().isoformat())
+    first_use = Column(String(32), nullable=False, default=datetime.now().isoformat())
+    last_use = Column(String(32), nullable=False, default=datetime.now().isoformat())
 
 
 class History(Base):
@@ -55,13 +70,35 @@ class History(Base):
     __tablename__ = "history"
 
     history_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    tag_id = Column(String, ForeignKey("tag.tag_id"), nullable=False)
-    timestamp = Column(String, nullable=False, default=datetime.now().isoformat())
+    tag_id = Column(String(64), ForeignKey("tag.tag_id"), nullable=False)
+    timestamp = Column(String(32), nullable=False, default=datetime.now().isoformat())
+
+    __table_args__ = (
+        Index("ix_history_tag_id_timestamp", tag_id, timestamp, history_id),
+        Index("ix_history_timestamp", timestamp),
+    )
+
+
+class HistoryDaily(Base):
+    """Database table for the daily rollup of compacted tag history."""
+
+    __tablename__ = "history_daily"
+
+    tag_id = Column(String(64), ForeignKey("tag.tag_id"), primary_key=True)
+    day = Column(String(10), primary_key=True)
+    tap_count = Column(Integer, nullable=False)
+    first_tap = Column(String(32), nullable=False)
+    last_tap = Column(String(32), nullable=False)
 
+    __table_args__ = (
+        Index("ix_history_daily_tag_id_first_tap", tag_id, first_tap),
+    )
 
 
 preference_table = Preference.__table__
 music_table = Music.__table__
+music_stream_table = MusicStream.__table__
 routine_table = Routine.__table__
 tag_table = Tag.__table__
 history_table = History.__table__
+history_daily_table = HistoryDaily.__table__
@@ -0,0 +1,11 @@
+"""Exceptions for analytics operations."""
+from fastapi import status
+
+from src.app.exceptions import CustomException
+
+
+class InvalidDateRangeException(CustomException):
+    """Exception raised when the start of a date range is after its end."""
+
+    STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
+    DETAIL: str = "Invalid date range: '{since}' is after '{until}'."
@@ -0,0 +1,102 @@
+"""Router for analytics operations."""
+from datetime import date
+
+from fastapi import APIRouter, Query
+
+from src.app.timing import TimedRoute
+from src.routing.analytics.schemas import DayTaps, HeatmapCell, TagTaps, WeekdayTaps
+from src.routing.analytics.service import analytics_service
+from src.routing.analytics.utils import analytics_cache, analytics_config
+
+prefix = "/analytics"
+analytics_router = APIRouter(route_class=TimedRoute)
+
+
+@analytics_router.get(prefix + "/top-tags")
+async def get_top_tags(
+    since: date | None = None,
+    until: date | None = None,
+    limit: int = Query(
+        analytics_config.ANALYTICS_TOP_LIMIT,
+        ge=1,
+        le=analytics_config.ANALYTICS_MAX_TOP_LIMIT
+    )
+) -> list[TagTaps]:
+    """Endpoint to retrieve the most tapped tags.
+
+    Args:
+        since (date, optional): The first day counted.
+        until (date, optional): The last day counted.
+        limit (int): The number of tags returned.
+
+    Returns:
+        list[TagTaps]: The most tapped tags, in order.
+    """
+    return await analytics_service.top_tags(since, until, limit)
+
+
+@analytics_router.get(prefix + "/heatmap")
+async def get_heatmap(
+    since: date | None = None,
+    until: date | None = None,
+    tag_id: str | None = None
+) -> list[HeatmapCell]:
+    """Endpoint to retrieve the taps per weekday and hour of day.
+
+    Args:
+        since (date, optional): The first day counted.
+        until (date, optional): The last day counted.
+        tag_id (str, optional): Only count the taps of this tag.
+
+    Returns:
+        list[HeatmapCell]: The non-empty cells of the heatmap.
+    """
+    return await analytics_service.heatmap(since, until, tag_id)
+
+
+@analytics_router.get(prefix + "/weekdays")
+async def get_weekdays(
+    since: date | None = None,
+    until: date | None = None,
+    tag_id: str | None = None
+) -> list[WeekdayTaps]:
+    """Endpoint to retrieve the taps per weekday.
+
+    Args:
+        since (date, optional): The first day counted.
+        until (date, optional): The last day counted.
+        tag_id (str, optional): Only count the taps of this tag.
+
+    Returns:
+        list[WeekdayTaps]: The taps of every weekday.
+    """
+    return await analytics_service.weekdays(since, until, tag_id)
+
+
+@analytics_router.get(prefix + "/activity")
+async def get_tag_activity(
+    tag_id: str,
+    since: date | None = None,
+    until: date | None = None
+) -> list[DayTaps]:
+    """Endpoint to retrieve the taps per day of a tag.
+
+    Args:
+        tag_id (str): The ID of the tag.
+        since (date, optional): The first day counted.
+        until (date, optional): The last day counted.
+
+    Returns:
+        list[DayTaps]: The days with taps, in order.
+    """
+    return await analytics_service.tag_activity(tag_id, since, until)
+
+
+@analytics_router.get(prefix + "/cache")
+async def get_analytics_cache_stats() -> dict:
+    """Endpoint to retrieve the analytics cache counters.
+
+    Returns:
+        dict: The hit, miss and eviction counters and the cache size.
+    """
+    return analytics_cache.stats()
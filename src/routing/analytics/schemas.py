@@ -0,0 +1,33 @@
+"""Schemas for analytics operations."""
+
+from pydantic import BaseModel
+
+
+class TagTaps(BaseModel):
+    """Schema for the number of taps of a tag."""
+
+    tag_id: str
+    name: str | None
+    taps: int
+
+
+class HeatmapCell(BaseModel):
+    """Schema for the number of taps in one hour of one weekday."""
+
+    weekday: int
+    hour: int
+    taps: int
+
+
+class WeekdayTaps(BaseModel):
+    """Schema for the number of taps on one weekday."""
+
+    weekday: int
+    taps: int
+
+
+class DayTaps(BaseModel):
+    """Schema for the number of taps on one day."""
+
+    day: str
+    taps: int
@@ -0,0 +1,211 @@
+"""Service related to analytics operations."""
+
+from datetime import date
+from typing import Awaitable, Callable, Hashable
+
+from sqlalchemy import Integer, cast, func, select, union_all
+
+from src.database.database import Database
+from src.database.tables import history_daily_table, history_table, tag_table
+from src.routing.analytics.utils import AnalyticsUtils, analytics_cache
+from src.routing.tags.service import tag_service
+
+history = history_table.c
+daily = history_daily_table.c
+
+
+class AnalyticsService:
+    """Service class for analytics operations.
+
+    Every aggregate is computed by the database with GROUP BY over the raw
+    history and its daily rollups, and the result is cached for
+    ANALYTICS_CACHE_TTL seconds, so a dashboard refresh never reads the
+    history row by row.
+    """
+
+    @classmethod
+    async def top_tags(
+        cls,
+        since: date | None = None,
+        until: date | None = None,
+        limit: int = 10
+    ) -> list[dict]:
+        """Retrieve the most tapped tags.
+
+        Args:
+            since (date, optional): The first day counted.
+            until (date, optional): The last day counted.
+            limit (int): The number of tags returned.
+
+        Returns:
+            list[dict]: The tag_id, name and taps of each tag, most tapped first.
+        """
+        lower, upper = AnalyticsUtils.timestamp_range(since, until)
+
+        async def load() -> list[dict]:
+            raw = cls._filter_raw(
+                select(history.tag_id, func.count().label("taps")), lower, upper
+            ).group_by(history.tag_id)
+            rollup = cls._filter_daily(
+                select(daily.tag_id, func.sum(daily.tap_count).label("taps")),
+                lower, upper
+            ).group_by(daily.tag_id)
+            merged = union_all(raw, rollup).subquery()
+            taps = func.sum(merged.c.taps).label("taps")
+            query = select(merged.c.tag_id, tag_table.c.name, taps).outerjoin(
+                tag_table, tag_table.c.tag_id == merged.c.tag_id
+            ).group_by(merged.c.tag_id, tag_table.c.name).order_by(
+                taps.desc(), merged.c.tag_id
+            ).limit(limit)
+            return [dict(row) for row in await Database.fetch_all(query)]
+
+        return await cls._cached(("top_tags", lower, upper, limit), load)
+
+    @classmethod
+    async def heatmap(
+        cls,
+        since: date | None = None,
+        until: date | None = None,
+        tag_id: str | None = None
+    ) -> list[dict]:
+        """Retrieve the number of taps per weekday and hour of day.
+
+        The hour of a tap is only known while it is raw history, so days
+        already compacted into daily rollups are left out.
+
+        Args:
+            since (date, optional): The first day counted.
+            until (date, optional): The last day counted.
+            tag_id (str, optional): Only count the taps of this tag.
+
+        Returns:
+            list[dict]: The weekday (Monday is 1), hour and taps of each
+            non-empty cell, ordered by weekday and hour.
+        """
+        lower, upper = AnalyticsUtils.timestamp_range(since, until)
+
+        async def load() -> list[dict]:
+            day = func.substr(history.timestamp, 1, 10)
+            hour = cast(func.substr(history.timestamp, 12, 2), Integer)
+            query = cls._filter_raw(
+                select(day.label("day"), hour.label("hour"), func.count().label("taps")),
+                lower, upper, tag_id
+            ).group_by(day, hour)
+            cells: dict[tuple[int, int], int] = {}
+            for row in await Database.fetch_all(query):
+                key = (date.fromisoformat(row.day).isoweekday(), row.hour)
+                cells[key] = cells.get(key, 0) + row.taps
+            return [
+                {"weekday": weekday, "hour": hour, "taps": taps}
+                for (weekday, hour), taps in sorted(cells.items())
+            ]
+
+        return await cls._cached(("heatmap", lower, upper, tag_id), load)
+
+    @classmethod
+    async def weekdays(
+        cls,
+        since: date | None = None,
+        until: date | None = None,
+        tag_id: str | None = None
+    ) -> list[dict]:
+        """Retrieve the number of taps per weekday.
+
+        Args:
+            since (date, optional): The first day counted.
+            until (date, optional): The last day counted.
+            tag_id (str, optional): Only count the taps of this tag.
+
+        Returns:
+            list[dict]: The weekday (Monday is 1) and taps of every weekday.
+        """
+        lower, upper = AnalyticsUtils.timestamp_range(since, until)
+
+        async def load() -> list[dict]:
+            taps = dict.fromkeys(range(1, 8), 0)
+            for row in await cls._taps_per_day(lower, upper, tag_id):
+                taps[date.fromisoformat(row["day"]).isoweekday()] += row["taps"]
+            return [{"weekday": weekday, "taps": count} for weekday, count in taps.items()]
+
+        return await cls._cached(("weekdays", lower, upper, tag_id), load)
+
+    @classmethod
+    async def tag_activity(
+        cls,
+        tag_id: str,
+        since: date | None = None,
+        until: date | None = None
+    ) -> list[dict]:
+        """Retrieve the number of taps per day of a tag.
+
+        Args:
+            tag_id (str): The ID of the tag.
+            since (date, optional): The first day counted.
+            until (date, optional): The last day counted.
+
+        Raises:
+            TagNotFoundException: If the tag with the specified ID does not exist.
+
+        Returns:
+            list[dict]: The day and taps of each day with taps, in order.
+        """
+        lower, upper = AnalyticsUtils.timestamp_range(since, until)
+
+        async def load() -> list[dict]:
+            rows = await cls._taps_per_day(lower, upper, tag_id)
+            if not rows:
+                await tag_service.get_tag_by_id(tag_id)  # Ensure tag exists
+            return rows
+
+        return await cls._cached(("activity", lower, upper, tag_id), load)
+
+    @classmethod
+    async def _taps_per_day(
+        cls,
+        lower: str | None,
+        upper: str | None,
+        tag_id: str | None
+    ) -> list[dict]:
+        raw_day = func.substr(history.timestamp, 1, 10)
+        raw = cls._filter_raw(
+            select(raw_day.label("day"), func.count().label("taps")),
+            lower, upper, tag_id
+        ).group_by(raw_day)
+        rollup = cls._filter_daily(
+            select(daily.day, daily.tap_count.label("taps")), lower, upper, tag_id)
+        merged = union_all(raw, rollup).subquery()
+        query = select(
+            merged.c.day, func.sum(merged.c.taps).label("taps")
+        ).group_by(merged.c.day).order_by(merged.c.day)
+        return [dict(row) for row in await Database.fetch_all(query)]
+
+    @staticmethod
+    def _filter_raw(query, lower: str | None, upper: str | None, tag_id: str | None = None):
+        if lower:
+            query = query.where(history.timestamp >= lower)
+        if upper:
+            query = query.where(history.timestamp < upper)
+        if tag_id:
+            query = query.where(history.tag_id == tag_id)
+        return query
+
+    @staticmethod
+    def _filter_daily(query, lower: str | None, upper: str | None, tag_id: str | None = None):
+        if lower:
+            query = query.where(daily.day >= lower)
+        if upper:
+            query = query.where(daily.day < upper)
+        if tag_id:
+            query = query.where(daily.tag_id == tag_id)
+        return query
+
+    @staticmethod
+    async def _cached(key: Hashable, load: Callable[[], Awaitable[list[dict]]]) -> list[dict]:
+        result = analytics_cache.get(key)
+        if result is None:
+            result = await load()
+            analytics_cache.set(key, result)
+        return result
+
+
+analytics_service = AnalyticsService()
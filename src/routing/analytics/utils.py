@@ -0,0 +1,51 @@
+"""Utils for analytics operations."""
+
+from datetime import date, timedelta
+from pydantic_settings import BaseSettings
+
+from src.app.cache import LRUCache
+from src.routing.analytics.exceptions import InvalidDateRangeException
+
+
+class AnalyticsConfig(BaseSettings):
+    """Class related to analytics configs."""
+
+    ANALYTICS_CACHE_SIZE: int = 256
+    ANALYTICS_CACHE_TTL: float = 10.0
+    ANALYTICS_TOP_LIMIT: int = 10
+    ANALYTICS_MAX_TOP_LIMIT: int = 100
+
+
+class AnalyticsUtils:
+    """Utility functions for analytics operations."""
+
+    @staticmethod
+    def timestamp_range(
+        since: date | None,
+        until: date | None
+    ) -> tuple[str | None, str | None]:
+        """Convert an inclusive date range into ISO timestamp bounds.
+
+        Args:
+            since (date, optional): The first day of the range.
+            until (date, optional): The last day of the range.
+
+        Returns:
+            tuple: The inclusive lower bound and the exclusive upper bound.
+
+        Raises:
+            InvalidDateRangeException: If since is after until.
+        """
+        if since and until and since > until:
+            raise InvalidDateRangeException(since=since, until=until)
+        return (
+            since.isoformat() if since else None,
+            (until + timedelta(days=1)).isoformat() if until else None
+        )
+
+
+analytics_config = AnalyticsConfig()
+analytics_cache = LRUCache(
+    max_size=analytics_config.ANALYTICS_CACHE_SIZE,
+    ttl=analytics_config.ANALYTICS_CACHE_TTL
+)
@@ -0,0 +1,203 @@
+"""In-process broker pushing configuration changes to subscribers."""
+import asyncio
+from collections import deque
+from datetime import datetime
+from itertools import count
+from typing import AsyncIterator
+
+from src.routing.events.schemas import EventTopic
+from src.routing.events.utils import EventUtils, event_config
+
+RESYNC = "resync"
+
+
+class Subscription:
+    """Queue of the events waiting to be sent to one subscriber."""
+
+    def __init__(
+        self,
+        subscriber_id: int,
+        topics: set[EventTopic],
+        device_id: str | None,
+        queue_size: int
+    ):
+        self.subscriber_id = subscriber_id
+        self.topics = topics
+        self.device_id = device_id
+        self.connected_at = datetime.now().isoformat()
+        self.delivered = 0
+        self.dropped = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, event: tuple[int, str, dict]) -> None:
+        """Queue an event without waiting.
+
+        A subscriber too slow to keep up loses its backlog and receives a
+        resync event instead, telling it to reload its local copy.
+        """
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event[0], RESYNC, {}))
+            return
+        self.queue.put_nowait(event)
+
+    def info(self) -> dict:
+        return {
+            "subscriber_id": self.subscriber_id,
+            "device_id": self.device_id,
+            "topics": sorted(self.topics),
+            "connected_at": self.connected_at,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "depth": self.queue.qsize()
+        }
+
+
+class EventBroker:
+    """Registry of subscribers and fan-out of change events.
+
+    Publishing never waits: each event is put in the bounded queue of every
+    subscriber following its topic and kept in a short replay buffer, so a
+    device reconnecting with `Last-Event-ID` receives what it missed. The
+    broker lives in the worker process, so subscribers only receive the
+    changes made through the same worker.
+    """
+
+    def __init__(self, queue_size: int, replay_size: int, heartbeat_interval: float):
+        """Initialize the broker.
+
+        Args:
+            queue_size (int): The maximum number of events queued per subscriber.
+            replay_size (int): The number of recent events kept for reconnects.
+            heartbeat_interval (float): The time between keep-alive comments
+            sent to idle subscribers, in seconds.
+        """
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.published = 0
+        self._event_ids = count(1)
+        self._subscriber_ids = count(1)
+        self._replay: deque[tuple[int, str, dict]] = deque(maxlen=replay_size)
+        self._subscriptions: dict[int, Subscription] = {}
+
+    def publish(self, topic: EventTopic, data: dict) -> None:
+        """Push an event to every subscriber following its topic.
+
+        Args:
+            topic (EventTopic): The topic of the event.
+            data (dict): The payload of the event.
+        """
+        event = (next(self._event_ids), topic.value, data)
+        self._replay.append(event)
+        self.published += 1
+        for subscription in self._subscriptions.values():
+            if topic in subscription.topics:
+                subscription.offer(event)
+
+    def subscribe(
+        self,
+        topics: set[EventTopic],
+        device_id: str | None = None
+    ) -> Subscription:
+        """Register a subscriber.
+
+        Args:
+            topics (set[EventTopic]): The topics to follow.
+            device_id (str, optional): The ID of the subscribing device.
+
+        Returns:
+            Subscription: The subscription, to be passed to `unsubscribe`.
+        """
+        subscription = Subscription(
+            next(self._subscriber_ids), topics, device_id, self.queue_size)
+        self._subscriptions[subscription.subscriber_id] = subscription
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber from the registry.
+
+        Args:
+            subscription (Subscription): The subscription to remove.
+        """
+        self._subscriptions.pop(subscription.subscriber_id, None)
+
+    def subscribers(self) -> list[dict]:
+        """Return the subscription registry.
+
+        Returns:
+            list[dict]: The device, topics and counters of each subscriber.
+        """
+        return [subscription.info() for subscription in self._subscriptions.values()]
+
+    def missed(self, subscription: Subscription, last_event_id: int) -> list:
+        """Return the buffered events published after an event ID.
+
+        Event IDs restart at 1 with the process, so an ID newer than the
+        last published event was issued before a restart and can't be
+        replayed either.
+
+        Args:
+            subscription (Subscription): The subscription to replay for.
+            last_event_id (int): The ID of the last event the subscriber got.
+
+        Returns:
+            list: The missed events of its topics, or a single resync event,
+            carrying the ID of the last published event, if some of them are
+            no longer buffered or the ID is unknown.
+        """
+        newest = self.published
+        oldest = self._replay[0][0] if self._replay else newest + 1
+        if last_event_id > newest or oldest > last_event_id + 1:
+            return [(newest, RESYNC, {})]
+        return [
+            event for event in self._replay
+            if event[0] > last_event_id and event[1] in subscription.topics
+        ]
+
+    async def stream(
+        self,
+        subscription: Subscription,
+        last_event_id: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Stream the events of a subscription as Server-Sent Events.
+
+        The subscription is removed when the stream is closed.
+
+        Args:
+            subscription (Subscription): The subscription to stream.
+            last_event_id (int, optional): The ID of the last event received
+            before reconnecting.
+
+        Yields:
+            bytes: The next event or keep-alive comment.
+        """
+        sent = last_event_id or 0
+        try:
+            yield f"retry: {event_config.EVENTS_RETRY_MS}\n\n".encode()
+            if last_event_id is not None:
+                for event in self.missed(subscription, last_event_id):
+                    sent = event[0]
+                    yield EventUtils.format_sse(*event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if event[0] <= sent and event[1] != RESYNC:
+                    continue  # Already sent by the replay
+                sent = event[0]
+                subscription.delivered += 1
+                yield EventUtils.format_sse(*event)
+        finally:
+            self.unsubscribe(subscription)
+
+
+event_broker = EventBroker(
+    queue_size=event_config.EVENTS_QUEUE_SIZE,
+    replay_size=event_config.EVENTS_REPLAY_SIZE,
+    heartbeat_interval=event_config.EVENTS_HEARTBEAT_INTERVAL
+)
@@ -0,0 +1,50 @@
+"""Router for event operations."""
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from src.app.timing import TimedRoute
+from src.routing.events.broker import event_broker
+from src.routing.events.schemas import EventTopic, Subscriber
+
+prefix = "/events"
+events_router = APIRouter(route_class=TimedRoute)
+
+
+@events_router.get(prefix)
+async def subscribe(
+    topics: list[EventTopic] = Query(list(EventTopic)),
+    device_id: str | None = None,
+    last_event_id: int | None = Header(None)
+) -> StreamingResponse:
+    """Endpoint to receive configuration changes as Server-Sent Events.
+
+    Each event is named after its topic and carries a compact JSON payload.
+    A `resync` event means some changes were lost and the local copy must
+    be reloaded. Reconnecting with the `Last-Event-ID` header replays the
+    recent events that were missed.
+
+    Args:
+        topics (list[EventTopic]): The topics to follow. Defaults to all.
+        device_id (str, optional): The ID of the subscribing device.
+        last_event_id (int, optional): The ID of the last event received.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    subscription = event_broker.subscribe(set(topics), device_id)
+    return StreamingResponse(
+        event_broker.stream(subscription, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@events_router.get(prefix + "/subscribers")
+async def get_subscribers() -> list[Subscriber]:
+    """Endpoint to retrieve the subscription registry.
+
+    Returns:
+        list[Subscriber]: The connected subscribers.
+    """
+    return event_broker.subscribers()
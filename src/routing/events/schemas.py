@@ -0,0 +1,25 @@
+"""Schemas for event operations."""
+
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class EventTopic(str, Enum):
+    """Topics a subscriber can follow."""
+
+    TAG = "tag"
+    ROUTINE = "routine"
+    PREFERENCE = "preference"
+
+
+class Subscriber(BaseModel):
+    """Schema for an entry of the subscription registry."""
+
+    subscriber_id: int
+    device_id: str | None
+    topics: list[EventTopic]
+    connected_at: str
+    delivered: int
+    dropped: int
+    depth: int
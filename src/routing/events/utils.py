@@ -0,0 +1,36 @@
+"""Utils for event operations."""
+
+import json
+
+from pydantic_settings import BaseSettings
+
+
+class EventConfig(BaseSettings):
+    """Class related to event configs."""
+
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_REPLAY_SIZE: int = 256
+    EVENTS_HEARTBEAT_INTERVAL: float = 15.0
+    EVENTS_RETRY_MS: int = 5000
+
+
+class EventUtils:
+    """Utility functions for event operations."""
+
+    @staticmethod
+    def format_sse(event_id: int, topic: str, data: dict) -> bytes:
+        """Encode an event in the Server-Sent Events wire format.
+
+        Args:
+            event_id (int): The ID of the event.
+            topic (str): The topic, sent as the event name.
+            data (dict): The payload, sent as compact JSON.
+
+        Returns:
+            bytes: The encoded event.
+        """
+        payload = json.dumps(data, separators=(",", ":"))
+        return f"id: {event_id}\nevent: {topic}\ndata: {payload}\n\n".encode()
+
+
+event_config = EventConfig()
@@ -0,0 +1,36 @@
+"""Router for export operations."""
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from src.app.timing import TimedRoute
+from src.routing.export.schemas import ExportResource
+from src.routing.export.service import export_service
+
+prefix = "/export"
+export_router = APIRouter(route_class=TimedRoute)
+
+
+@export_router.get(prefix + "/{resource}")
+async def export_resource(
+    resource: ExportResource,
+    gzip: bool = False
+) -> StreamingResponse:
+    """Endpoint to stream every row of a resource as NDJSON.
+
+    Args:
+        resource (ExportResource): The resource to export.
+        gzip (bool): Whether to gzip the stream.
+
+    Returns:
+        StreamingResponse: One JSON object per line.
+    """
+    filename = f"{resource.value}.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_service.export_ndjson(resource, gzip),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
@@ -0,0 +1,14 @@
+"""Schemas for export operations."""
+
+from enum import Enum
+
+
+class ExportResource(str, Enum):
+    """Resources that can be exported."""
+
+    TAGS = "tags"
+    PREFERENCES = "preferences"
+    MUSICS = "musics"
+    ROUTINES = "routines"
+    HISTORY = "history"
+    HISTORY_DAILY = "history_daily"
@@ -0,0 +1,66 @@
+"""Service related to export operations."""
+
+import json
+import zlib
+from typing import AsyncIterator
+
+from src.database.database import Database
+from src.database.tables import (
+    history_daily_table,
+    history_table,
+    music_table,
+    preference_table,
+    routine_table,
+    tag_table
+)
+from src.routing.export.schemas import ExportResource
+from src.routing.export.utils import export_config
+
+tables = {
+    ExportResource.TAGS: tag_table,
+    ExportResource.PREFERENCES: preference_table,
+    ExportResource.MUSICS: music_table,
+    ExportResource.ROUTINES: routine_table,
+    ExportResource.HISTORY: history_table,
+    ExportResource.HISTORY_DAILY: history_daily_table,
+}
+
+
+class ExportService:
+    """Service class for export operations."""
+
+    @classmethod
+    async def export_ndjson(
+        cls,
+        resource: ExportResource,
+        gzip: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Stream every row of a resource as NDJSON.
+
+        Rows are read with a server-side cursor EXPORT_YIELD_PER at a time
+        and encoded one partition per chunk, so memory stays constant
+        regardless of the table size.
+
+        Args:
+            resource (ExportResource): The resource to export.
+            gzip (bool): Whether to gzip the stream.
+
+        Yields:
+            bytes: The next chunk of the export.
+        """
+        table = tables[resource]
+        query = table.select().order_by(*table.primary_key.columns)
+        compressor = zlib.compressobj(wbits=31) if gzip else None
+        async for partition in Database.stream(query, export_config.EXPORT_YIELD_PER):
+            chunk = "".join(
+                json.dumps(dict(row), default=str) + "\n" for row in partition
+            ).encode()
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+
+
+export_service = ExportService()
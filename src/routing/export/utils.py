@@ -0,0 +1,12 @@
+"""Utils for export operations."""
+
+from pydantic_settings import BaseSettings
+
+
+class ExportConfig(BaseSettings):
+    """Class related to export configs."""
+
+    EXPORT_YIELD_PER: int = 1000
+
+
+export_config = ExportConfig()
@@ -0,0 +1,89 @@
+"""Router for metrics operations."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.app.metrics import CallbackGauge, registry
+from src.app.timing import TimedRoute
+from src.database import database
+from src.routing.tags.compaction import history_compactor
+from src.routing.tags.dedup import recent_taps
+from src.routing.tags.history import history_writer
+from src.routing.tags.utils import tag_cache, tag_resolutions
+
+prefix = "/metrics"
+metrics_router = APIRouter(route_class=TimedRoute)
+
+
+def pool_samples():
+    """Read the connection pool occupancy."""
+    pool = database.engine.pool
+    for state in ("checkedout", "checkedin", "overflow"):
+        if hasattr(pool, state):
+            yield (state,), getattr(pool, state)()
+
+
+def cache_samples():
+    """Read the tag resolution cache counters."""
+    for name, value in tag_cache.stats().items():
+        yield (name,), value
+
+
+def resolution_samples():
+    """Read the tag resolution coalescing counters."""
+    for name, value in tag_resolutions.stats().items():
+        yield (name,), value
+
+
+def dedup_samples():
+    """Read the tap deduplication counters."""
+    for name, value in recent_taps.stats().items():
+        yield (name,), value
+
+
+def history_samples():
+    """Read the history writer counters."""
+    for name, value in history_writer.stats().items():
+        yield (name,), value
+
+
+def compaction_samples():
+    """Read the history compactor counters."""
+    for name, value in history_compactor.stats().items():
+        yield (name,), value
+
+
+registry.register(CallbackGauge(
+    "db_pool_connections", "Connections of the database pool by state.",
+    pool_samples, labels=("state",)
+))
+registry.register(CallbackGauge(
+    "tag_cache", "Tag resolution cache counters.",
+    cache_samples, labels=("counter",)
+))
+registry.register(CallbackGauge(
+    "tag_resolutions", "Tag resolution single-flight counters.",
+    resolution_samples, labels=("counter",)
+))
+registry.register(CallbackGauge(
+    "tap_dedup", "Tap deduplication window counters.",
+    dedup_samples, labels=("counter",)
+))
+registry.register(CallbackGauge(
+    "history_writer", "History write-behind queue counters.",
+    history_samples, labels=("counter",)
+))
+registry.register(CallbackGauge(
+    "history_compaction", "History compaction counters.",
+    compaction_samples, labels=("counter",)
+))
+
+
+@metrics_router.get(prefix, response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """Endpoint to retrieve the metrics in the Prometheus text format.
+
+    Returns:
+        str: The rendered metrics.
+    """
+    return registry.render()
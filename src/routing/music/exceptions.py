@@ -17,3 +17,10 @@ class MusicAlreadyExistsException(CustomException):
 
     STATUS_CODE = status.HTTP_400_BAD_REQUEST
     DETAIL = "Music with name '{name}' already exists."
+
+
+class InvalidMusicContentException(CustomException):
+    """Exception raised when music content can't be compiled."""
+
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Invalid music content at '{token}', expected NOTE:LENGTH."
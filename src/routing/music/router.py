@@ -1,11 +1,16 @@
 """Router for music operations."""
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, Response, status
 
+from src.app.revisions import etag_matches, table_revisions
+from src.app.serialization import JSONBytesResponse
+from src.app.timing import TimedRoute
+from src.database.tables import music_table
 from src.routing.music.schemas import Music, MusicRequest
 from src.routing.music.service import music_service
+from src.routing.music.utils import MUSIC_STREAM_MEDIA_TYPE
 
-music_router = APIRouter()
+music_router = APIRouter(route_class=TimedRoute)
 prefix = "/music"
 
 
@@ -23,22 +28,69 @@ async def create_music(music_data: MusicRequest) -> None:
 
 
 @music_router.get(prefix + "s")
-async def get_all_musics() -> list[Music]:
+async def get_all_musics(request: Request, response: Response) -> list[Music]:
     """Endpoint to retrieve all music entries.
 
+    Args:
+        request (Request): The request, used to read If-None-Match.
+        response (Response): The response, used to set the ETag.
+
     Returns:
         list[Music]: A list of all music data.
     """
-    return await music_service.get_all_musics()
+    not_modified = table_revisions.check(request, response, music_table.name)
+    if not_modified:
+        return not_modified
+    return JSONBytesResponse(
+        await music_service.dump_all_musics(), headers=response.headers)
+
 
 @music_router.get(prefix)
-async def get_music(music_id: int) -> Music:
+async def get_music(music_id: int, request: Request, response: Response) -> Music:
     """Endpoint to retrieve music by its ID.
 
     Args:
         music_id (int): The ID of the music to retrieve.
+        request (Request): The request, used to read If-None-Match.
+        response (Response): The response, used to set the ETag.
 
     Returns:
         Music: The retrieved music data.
     """
-    return await music_service.get_music_by_id(music_id)
+    not_modified = table_revisions.check(request, response, music_table.name)
+    if not_modified:
+        return not_modified
+    return JSONBytesResponse(
+        await music_service.dump_music_by_id(music_id), headers=response.headers)
+
+
+@music_router.get(
+    prefix + "/stream",
+    response_class=Response,
+    responses={status.HTTP_200_OK: {"content": {MUSIC_STREAM_MEDIA_TYPE: {}}}}
+)
+async def get_music_stream(music_id: int, request: Request) -> Response:
+    """Endpoint to retrieve the compiled note stream of a music.
+
+    The body is a sequence of little-endian (frequency Hz, duration ms)
+    uint16 pairs. The ETag is the hash of the stream, so clients sending it
+    back in `If-None-Match` get a 304 while the music is unchanged.
+
+    Args:
+        music_id (int): The ID of the music.
+        request (Request): The request, used to read If-None-Match.
+
+    Returns:
+        Response: The note stream, or 304 if the client copy is current.
+    """
+    compiled = await music_service.get_music_stream(music_id)
+    etag = f'"{compiled["content_hash"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    headers["X-Music-BPM"] = str(compiled["bpm"])
+    return Response(
+        content=compiled["stream"],
+        media_type=MUSIC_STREAM_MEDIA_TYPE,
+        headers=headers
+    )
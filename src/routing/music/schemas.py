@@ -1,6 +1,9 @@
 """Schemas for music operations."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+
+from src.routing.music.utils import music_config
 
 
 class MusicRequest(BaseModel):
@@ -8,6 +11,7 @@ class MusicRequest(BaseModel):
 
     name: str
     content: str
+    bpm: int = Field(music_config.MUSIC_DEFAULT_BPM, gt=0, le=music_config.MUSIC_MAX_BPM)
 
 
 class Music(BaseModel):
@@ -16,3 +20,11 @@ class Music(BaseModel):
     music_id: int
     name: str
     content: str
+
+
+class MusicRow(TypedDict):
+    """Schema for a music row serialized without building a `Music`."""
+
+    music_id: int
+    name: str
+    content: str
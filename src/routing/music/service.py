@@ -1,17 +1,26 @@
 """Service moduele for music operations."""
 
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
+from src.app.revisions import table_revisions
+from src.app.serialization import RowSerializer
 from src.database.database import Database
-from src.database.tables import music_table
+from src.database.tables import music_stream_table, music_table
 from src.routing.music.exceptions import (
     MusicAlreadyExistsException,
     MusicNotFoundException
 )
 from src.routing.music.schemas import (
     Music,
-    MusicRequest
+    MusicRequest,
+    MusicRow
 )
+from src.routing.music.utils import MusicUtils, music_config
+
+
+music_serializer = RowSerializer(MusicRow)
+music_columns = (music_table.c.music_id, music_table.c.name, music_table.c.content)
 
 
 class MusicService:
@@ -21,37 +30,69 @@ class MusicService:
     async def create_music(cls, music_data: MusicRequest) -> None:
         """Create a new music entry.
 
+        The content is compiled into its note stream before anything is
+        written, so invalid content is rejected and devices never parse it.
+
         Args:
             music_data (MusicRequest): The music data to create.
+
+        Raises:
+            InvalidMusicContentException: If the content can't be compiled.
         """
+        stream = MusicUtils.compile_content(music_data.content, music_data.bpm)
         try:
-            music_query = music_table.insert().values(
-                name=music_data.name,
-                content=music_data.content
-            ).returning(
-                music_table.c.name,
-                music_table.c.content
-            )
-            await Database.execute(music_query)
+            async with Database.transaction() as conn:
+                music_query = music_table.insert().values(
+                    name=music_data.name,
+                    content=music_data.content
+                )
+                music_id = (await conn.execute(music_query)).inserted_primary_key[0]
+                await conn.execute(music_stream_table.insert().values(
+                    music_id=music_id,
+                    bpm=music_data.bpm,
+                    content_hash=MusicUtils.hash_stream(stream),
+                    stream=stream
+                ))
         except IntegrityError as e:
             raise MusicAlreadyExistsException(name=music_data.name) from e
-    
+        table_revisions.bump(music_table.name)
+
     @classmethod
-    async def get_all_musics(cls) -> list[Music]:
-        """Retrieve all music entries.
+    async def get_music_stream(cls, music_id: int) -> dict:
+        """Retrieve the compiled note stream of a music.
+
+        Musics created before streams were compiled are compiled at
+        MUSIC_DEFAULT_BPM on their first request and stored.
+
+        Args:
+            music_id (int): The ID of the music.
+
+        Raises:
+            MusicNotFoundException: If the music with the given ID is not found.
+            InvalidMusicContentException: If the content can't be compiled.
 
         Returns:
-            list[Music]: A list of all music data.
+            dict: The stream, its content_hash and its bpm.
         """
-        music_query = music_table.select()
-        results = await Database.fetch_all(music_query)
-        return [
-            Music(
-                music_id=record.music_id,
-                name=record.name,
-                content=record.content
-            ) for record in results
-        ]
+        query = select(
+            music_stream_table.c.stream,
+            music_stream_table.c.content_hash,
+            music_stream_table.c.bpm
+        ).where(music_stream_table.c.music_id == music_id)
+        result = await Database.fetch_one(query)
+        if result:
+            return dict(result)
+        music = await cls.get_music_by_id(music_id)
+        bpm = music_config.MUSIC_DEFAULT_BPM
+        stream = MusicUtils.compile_content(music.content, bpm)
+        compiled = {
+            "stream": stream,
+            "content_hash": MusicUtils.hash_stream(stream),
+            "bpm": bpm
+        }
+        await Database.execute(Database.upsert(
+            music_stream_table, ["music_id"], [], {"music_id": music_id, **compiled}))
+        return compiled
 
     @classmethod
     async def get_music_by_id(cls, music_id: int) -> Music:
@@ -75,5 +116,34 @@ class MusicService:
             content=result.content
         )
 
+    @classmethod
+    async def dump_all_musics(cls) -> bytes:
+        """Retrieve all music entries as JSON, without building models.
+
+        Returns:
+            bytes: A JSON array of all music data.
+        """
+        results = await Database.fetch_all(select(*music_columns))
+        return music_serializer.dump_many(results)
+
+    @classmethod
+    async def dump_music_by_id(cls, music_id: int) -> bytes:
+        """Retrieve music by its ID as JSON, without building a model.
+
+        Args:
+            music_id (int): The ID of the music to retrieve.
+
+        Raises:
+            MusicNotFoundException: If the music with the given ID is not found.
+
+        Returns:
+            bytes: The music data as a JSON object.
+        """
+        result = await Database.fetch_one(
+            select(*music_columns).where(music_table.c.music_id == music_id))
+        if not result:
+            raise MusicNotFoundException(music_id=music_id)
+        return music_serializer.dump_one(result)
+
 
 music_service = MusicService()
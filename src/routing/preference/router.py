@@ -1,12 +1,16 @@
 """Router for preference operations."""
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, Response, status
 
+from src.app.revisions import table_revisions
+from src.app.serialization import JSONBytesResponse
+from src.app.timing import TimedRoute
+from src.database.tables import preference_table
 from src.routing.preference.schemas import PreferenceRequest, Preference
 from src.routing.preference.service import preference_service
 
 prefix = "/preference"
-preference_router = APIRouter()
+preference_router = APIRouter(route_class=TimedRoute)
 
 
 @preference_router.post(prefix, status_code=status.HTTP_201_CREATED)
@@ -22,25 +26,43 @@ async def create_preference(preference: PreferenceRequest) -> None:
 @preference_router.get(prefix, response_model=Preference)
 async def get_preference(
     music_id: int,
-    led_color: int
+    led_color: int,
+    request: Request,
+    response: Response
 ) -> Preference:
     """Endpoint to retrieve a preference by music ID and LED color.
 
     Args:
         music_id (int): The music ID of the preference.
         led_color (int): The LED color of the preference.
+        request (Request): The request, used to read If-None-Match.
+        response (Response): The response, used to set the ETag.
 
     Returns:
         Preference: The retrieved preference data.
     """
-    return await preference_service.get_preference(music_id, led_color)
+    not_modified = table_revisions.check(request, response, preference_table.name)
+    if not_modified:
+        return not_modified
+    return JSONBytesResponse(
+        await preference_service.dump_preference(music_id, led_color),
+        headers=response.headers
+    )
 
 
 @preference_router.get(prefix + "s", response_model=list[Preference])
-async def get_preferences() -> list[Preference]:
+async def get_preferences(request: Request, response: Response) -> list[Preference]:
     """Endpoint to handle multiple preference requests.
 
+    Args:
+        request (Request): The request, used to read If-None-Match.
+        response (Response): The response, used to set the ETag.
+
     Returns:
         list[Preference]: List of retrieved or created preference data.
     """
-    return await preference_service.get_all_preferences()
+    not_modified = table_revisions.check(request, response, preference_table.name)
+    if not_modified:
+        return not_modified
+    return JSONBytesResponse(
+        await preference_service.dump_all_preferences(), headers=response.headers)
@@ -1,16 +1,29 @@
 """Schemas for preference operations."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+
+# Largest values the binary tag record can carry (u16 and u32)
+LED_COLOR_MAX = 0xFFFF
+MUSIC_ID_MAX = 0xFFFFFFFF
 
 
 class PreferenceRequest(BaseModel):
     """Schema for preference."""
 
-    music_id: int
-    led_color: int
+    music_id: int = Field(ge=0, le=MUSIC_ID_MAX)
+    led_color: int = Field(ge=0, le=LED_COLOR_MAX)
 
 
 class Preference(PreferenceRequest):
     """Schema for preference response."""
 
     preference_id: int
+
+
+class PreferenceRow(TypedDict):
+    """Schema for a preference row serialized without building a `Preference`."""
+
+    preference_id: int
+    music_id: int
+    led_color: int
@@ -1,10 +1,19 @@
 """Service related to preference operations."""
 
-from sqlalchemy import and_
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection
 
+from src.app.revisions import table_revisions
+from src.app.serialization import RowSerializer
 from src.database.database import Database
 from src.database.tables import preference_table
-from src.routing.preference.schemas import Preference, PreferenceRequest
+from src.routing.events.broker import event_broker
+from src.routing.events.schemas import EventTopic
+from src.routing.preference.schemas import (
+    Preference,
+    PreferenceRequest,
+    PreferenceRow
+)
 from src.routing.preference.exceptions import (
     PreferenceNotFoundException,
     PreferenceIDNotFoundException,
@@ -12,19 +21,11 @@ from src.routing.preference.exceptions import (
 )
 
 
-class PreferenceService:
-    """Service class for preference operations."""
+preference_serializer = RowSerializer(PreferenceRow)
 
-    @classmethod
-    async def handle_preference_request(cls, preference: PreferenceRequest) -> Preference:
-        """Handle preference request.
 
-        Args:
-            preference (PreferenceRequest): The preference data.
-        """
-        if not await cls.preference_exists(preference.music_id, preference.led_color):
-            await cls.create_preference(preference)
-        return await cls.get_preference(preference.music_id, preference.led_color)
+class PreferenceService:
+    """Service class for preference operations."""
 
     @classmethod
     async def create_preference(cls, preference: PreferenceRequest) -> None:
@@ -45,7 +46,131 @@ class PreferenceService:
             music_id=preference.music_id,
             led_color=preference.led_color
         )
-        await Database.execute(query)
+        async with Database.transaction() as conn:
+            preference_id = (await conn.execute(query)).inserted_primary_key[0]
+        table_revisions.bump(preference_table.name)
+        event_broker.publish(EventTopic.PREFERENCE, {
+            "preference_id": preference_id,
+            "music_id": preference.music_id,
+            "led_color": preference.led_color
+        })
+
+    @classmethod
+    async def upsert_preference(
+        cls,
+        conn: AsyncConnection,
+        preference: PreferenceRequest
+    ) -> tuple[int, bool]:
+        """Create a preference if missing and return its ID.
+
+        An existing preference is found without writing anything. The insert
+        is still an upsert, so a concurrent insert of the same preference
+        can't fail it. Bump the preference revision once the transaction is
+        committed if the preference was created.
+
+        Args:
+            conn (AsyncConnection): The connection of the running transaction.
+            preference (PreferenceRequest): The preference data.
+
+        Returns:
+            tuple: The ID of the new or existing preference and whether it
+            was created.
+        """
+        lookup = select(preference_table.c.preference_id).where(
+            preference_table.c.music_id == preference.music_id,
+            preference_table.c.led_color == preference.led_color
+        )
+        preference_id = (await conn.execute(lookup)).scalar()
+        if preference_id is not None:
+            return preference_id, False
+        query = Database.upsert(
+            preference_table,
+            values={
+                "music_id": preference.music_id,
+                "led_color": preference.led_color
+            },
+            index_elements=["music_id", "led_color"],
+            update=["led_color"]
+        )
+        if conn.dialect.insert_returning:
+            result = await conn.execute(query.returning(preference_table.c.preference_id))
+            return result.scalar_one(), True
+        # MySQL has no RETURNING, so the ID is read back in the same transaction.
+        await conn.execute(query)
+        return (await conn.execute(lookup)).scalar_one(), True
+
+    @classmethod
+    async def upsert_preferences(
+        cls,
+        preferences: set[tuple[int, int]],
+        chunk_size: int = 500
+    ) -> dict[tuple[int, int], int]:
+        """Create the missing preferences and return the ID of each one.
+
+        Existing preferences are looked up first and only the missing ones
+        are written, so the preference revision is only bumped when rows
+        were created.
+
+        Args:
+            preferences (set): The distinct (music_id, led_color) pairs.
+            chunk_size (int): The number of rows written per statement.
+
+        Returns:
+            dict: The preference ID of each (music_id, led_color) pair.
+        """
+        pairs = list(preferences)
+        query = Database.upsert(
+            preference_table,
+            index_elements=["music_id", "led_color"],
+            update=[]
+        )
+        preference_ids = {}
+        inserted = 0
+        async with Database.transaction() as conn:
+            for start in range(0, len(pairs), chunk_size):
+                chunk = pairs[start:start + chunk_size]
+                await cls._lookup_preferences(conn, chunk, preference_ids)
+                missing = [pair for pair in chunk if pair not in preference_ids]
+                if not missing:
+                    continue
+                await conn.execute(query, [
+                    {"music_id": music_id, "led_color": led_color}
+                    for music_id, led_color in missing
+                ])
+                await cls._lookup_preferences(conn, missing, preference_ids)
+                inserted += len(missing)
+        if inserted:
+            table_revisions.bump(preference_table.name)
+        return preference_ids
+
+    @classmethod
+    async def _lookup_preferences(
+        cls,
+        conn: AsyncConnection,
+        pairs: list[tuple[int, int]],
+        preference_ids: dict[tuple[int, int], int]
+    ) -> None:
+        """Add the ID of each existing (music_id, led_color) pair to a dict.
+
+        Args:
+            conn (AsyncConnection): The connection of the running transaction.
+            pairs (list): The (music_id, led_color) pairs to look up.
+            preference_ids (dict): The IDs found so far, updated in place.
+        """
+        result = await conn.execute(
+            select(
+                preference_table.c.music_id,
+                preference_table.c.led_color,
+                preference_table.c.preference_id
+            ).where(
+                tuple_(
+                    preference_table.c.music_id,
+                    preference_table.c.led_color
+                ).in_(pairs)
+            )
+        )
+        for music_id, led_color, preference_id in result:
+            preference_ids[(music_id, led_color)] = preference_id
 
     @classmethod
     async def get_preference_by_id(cls, preference_id: int) -> Preference:
@@ -69,18 +194,18 @@ class PreferenceService:
         return Preference(**result)
 
     @classmethod
-    async def get_preference(cls, music_id: int, led_color: int) -> Preference:
-        """Retrieve a preference from the database by its music ID and LED color.
+    async def dump_preference(cls, music_id: int, led_color: int) -> bytes:
+        """Retrieve a preference as JSON, without building a model.
 
         Args:
             music_id (int): The music ID of the preference.
             led_color (int): The LED color of the preference.
 
-        Returns:
-            Preference: The retrieved preference data.
-
         Raises:
             PreferenceNotFoundException: If the preference does not exist.
+
+        Returns:
+            bytes: The preference data as a JSON object.
         """
         query = preference_table.select().where(
             and_(
@@ -94,18 +219,17 @@ class PreferenceService:
                 music_id=music_id,
                 led_color=led_color
             )
-        return Preference(**result)
+        return preference_serializer.dump_one(result)
 
     @classmethod
-    async def get_all_preferences(cls) -> list[Preference]:
-        """Retrieve all preferences from the database.
+    async def dump_all_preferences(cls) -> bytes:
+        """Retrieve all preferences as JSON, without building models.
 
         Returns:
-            list[Preference]: A list of all preferences.
+            bytes: A JSON array of all preferences.
         """
-        query = preference_table.select()
-        results = await Database.fetch_all(query)
-        return [Preference(**result) for result in results]
+        results = await Database.fetch_all(preference_table.select())
+        return preference_serializer.dump_many(results)
 
     @classmethod
     async def preference_exists(cls, music_id: int, led_color: int) -> bool:
@@ -1,12 +1,15 @@
 """Router for routine-related operations."""
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, Response, status
 
+from src.app.revisions import table_revisions
+from src.app.timing import TimedRoute
+from src.database.tables import routine_table
 from src.routing.routine.schemas import Routine
 from src.routing.routine.service import RoutineService
 
 prefix = "/routine"
-routine_router = APIRouter()
+routine_router = APIRouter(route_class=TimedRoute)
 
 
 @routine_router.post(prefix, status_code=status.HTTP_201_CREATED)
@@ -20,13 +23,22 @@ async def create_routine(routine: Routine) -> None:
 
 
 @routine_router.get(prefix, response_model=Routine)
-async def get_routines_by_tag(routine_id: str) -> Routine:
+async def get_routines_by_tag(
+    routine_id: str,
+    request: Request,
+    response: Response
+) -> Routine:
     """Get routines by id.
     
     Args:
         routine_id (str): The ID of the routine.
+        request (Request): The request, used to read If-None-Match.
+        response (Response): The response, used to set the ETag.
 
     Returns:
         Routine: The routine data.
     """
+    not_modified = table_revisions.check(request, response, routine_table.name)
+    if not_modified:
+        return not_modified
     return await RoutineService.get_routine(routine_id)
@@ -1,14 +1,17 @@
 """Schemas for routine operations."""
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 
 from src.routing.routine.utils import RoutineUtils
 
+# Largest routine ID the binary tag record can carry (u32)
+ROUTINE_ID_MAX = 0xFFFFFFFF
+
 
 class Routine(BaseModel):
     """Schema for routine request."""
 
-    routine_id: int
+    routine_id: int = Field(ge=0, le=ROUTINE_ID_MAX)
     start_time: str
     end_time: str
     weekday: int
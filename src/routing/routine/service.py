@@ -1,29 +1,21 @@
 """Service related to routine operations."""
 
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncConnection
 
+from src.app.revisions import table_revisions
 from src.database.database import Database
 from src.database.tables import routine_table
+from src.routing.events.broker import event_broker
+from src.routing.events.schemas import EventTopic
 from src.routing.routine.schemas import Routine
 from src.routing.routine.exceptions import RoutineNotFoundException
-from src.routing.routine.utils import RoutineUtils, routine_config
+from src.routing.routine.utils import routine_schedule
+from src.routing.tags.utils import tag_cache
 
 
 class RoutineService:
     """Service class for routine operations."""
 
-    @classmethod
-    async def handle_routine_request(cls, routine: Routine) -> None:
-        """Handle routine request.
-
-        Args:
-            routine (Routine): The routine data.
-        """
-        if not await cls.routine_exists(routine.routine_id):
-            await cls.create_routine(routine)
-            return
-        await cls.update_routine(routine)
-
     @classmethod
     async def create_routine(cls, routine: Routine) -> None:
         """Create a new routine in the database.
@@ -39,88 +31,109 @@ class RoutineService:
             weekday=routine.weekday
         )
         await Database.execute(query)
+        cls.refresh_routine(routine)
 
     @classmethod
-    async def get_routine(cls, routine_id: int) -> Routine:
-        """Retrieve a routine from the database by its ID.
-
-        Args:
-            routine_id (int): The ID of the routine to retrieve.
+    async def upsert_routine(cls, conn: AsyncConnection, routine: Routine) -> None:
+        """Create or update a routine inside a running transaction.
 
-        Returns:
-            Routine: The retrieved routine data.
+        Call `refresh_routine` once the transaction is committed.
 
-        Raises:
-            RoutineNotFoundException: If the routine does not exist.
+        Args:
+            conn (AsyncConnection): The connection of the running transaction.
+            routine (Routine): The routine data.
         """
-        query = routine_table.select().where(routine_table.c.routine_id == routine_id)
-        result = await Database.fetch_one(query)
-        if result is None:
-            raise RoutineNotFoundException(routine_id=routine_id)
-        return Routine(**result)
+        query = Database.upsert(
+            routine_table,
+            values={
+                "routine_id": routine.routine_id,
+                "start_time": routine.start_time,
+                "end_time": routine.end_time,
+                "weekday": routine.weekday
+            },
+            index_elements=["routine_id"],
+            update=["start_time", "end_time", "weekday"]
+        )
+        await conn.execute(query)
 
     @classmethod
-    async def update_routine(cls, routine: Routine) -> None:
-        """Update an existing routine in the database.
+    async def upsert_routines(
+        cls,
+        routines: list[Routine],
+        chunk_size: int = 500
+    ) -> None:
+        """Create or update many routines in one transaction.
 
         Args:
-            routine (Routine): The routine data to be updated.
+            routines (list[Routine]): The routines, with distinct IDs.
+            chunk_size (int): The number of rows written per statement.
         """
-        query = (
-            routine_table.update()
-            .where(routine_table.c.routine_id == routine.routine_id)
-            .values(
-                start_time=routine.start_time,
-                end_time=routine.end_time,
-                weekday=routine.weekday
-            )
+        query = Database.upsert(
+            routine_table,
+            index_elements=["routine_id"],
+            update=["start_time", "end_time", "weekday"]
         )
-        await Database.execute(query)
+        async with Database.transaction() as conn:
+            for start in range(0, len(routines), chunk_size):
+                await conn.execute(query, [
+                    routine.model_dump()
+                    for routine in routines[start:start + chunk_size]
+                ])
+        table_revisions.bump(routine_table.name)
+        for routine in routines:
+            routine_schedule.set(
+                routine.routine_id,
+                routine.weekday,
+                routine.start_time,
+                routine.end_time
+            )
+        tag_cache.clear()
 
     @classmethod
-    async def check_runnable_routine(cls, routine_id: int) -> bool:
-        """Check if a routine is runnable based on its ID.
+    def refresh_routine(cls, routine: Routine) -> None:
+        """Update the in-memory state derived from a stored routine.
 
-        Args:
-            routine_id (int): The ID of the routine to check.
+        Subscribers of the routine topic are notified of the change.
 
-        Returns:
-            bool: True if the routine is runnable, False otherwise.
+        Args:
+            routine (Routine): The routine data that was written.
         """
-        routine = await cls.get_routine(routine_id)
-        today = RoutineUtils.get_weekday()
-        hour_now = datetime.now().hour - routine_config.HOURS_ADJUST
-        if hour_now < 0:
-            hour_now += 24
-            today -= 1
-        minute_now = datetime.now().minute
-        if routine.weekday != today:
-            return False
-        splitted_start_time = routine.start_time.strip().split(":")
-        splitted_end_time = routine.end_time.strip().split(":")
-        start_hour = int(splitted_start_time[0])
-        end_hour = int(splitted_end_time[0])
-        if (start_hour > hour_now) or (end_hour < hour_now):
-            return False
-        if hour_now == end_hour:
-            end_minute = int(splitted_end_time[1])
-            if not (minute_now <= end_minute):
-                return False
-        return True
+        routine_schedule.set(
+            routine.routine_id,
+            routine.weekday,
+            routine.start_time,
+            routine.end_time
+        )
+        table_revisions.bump(routine_table.name)
+        event_broker.publish(EventTopic.ROUTINE, routine.model_dump())
+        tag_cache.invalidate_where(
+            lambda _, resolution: resolution["routine_id"] == routine.routine_id
+        )
 
     @classmethod
-    async def routine_exists(cls, routine_id: int) -> bool:
-        """Check if a routine exists in the database.
+    async def get_routine(cls, routine_id: int) -> Routine:
+        """Retrieve a routine from the database by its ID.
 
         Args:
-            routine_id (int): The ID of the routine to check.
+            routine_id (int): The ID of the routine to retrieve.
 
         Returns:
-            bool: True if the routine exists, False otherwise.
+            Routine: The retrieved routine data.
+
+        Raises:
+            RoutineNotFoundException: If the routine does not exist.
         """
         query = routine_table.select().where(routine_table.c.routine_id == routine_id)
         result = await Database.fetch_one(query)
-        return result is not None
+        if result is None:
+            raise RoutineNotFoundException(routine_id=routine_id)
+        return Routine(**result)
+
+    @classmethod
+    async def load_schedule(cls) -> None:
+        """Rebuild the compiled routine schedule from the database."""
+        query = routine_table.select()
+        routine_schedule.rebuild(await Database.fetch_all(query))
 
 
 routine_service = RoutineService()
@@ -1,8 +1,12 @@
 """Utils for routine operations."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from pydantic_settings import BaseSettings
 
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
 class RoutineConfig(BaseSettings):
     """Class related to routine configs."""
 
@@ -25,7 +29,7 @@ class RoutineUtils:
             ValueError: If the value is not between 0 and 6.
         """
         if not (0 <= value <= 6):
-            raise ValueError("Weekday must be an integer between 0 (Monday) and 6 (Sunday).")
+            raise ValueError("Weekday must be an integer between 0 (Sunday) and 6 (Saturday).")
         return value
 
     @staticmethod
@@ -41,27 +45,167 @@ class RoutineUtils:
         return value.strip().lower()
 
     @staticmethod
-    def get_weekday() -> int:
-        """Convert weekday string to integer representation.
+    def parse_time(value: str) -> int:
+        """Convert a time in H:M format to minutes since midnight.
+
+        Args:
+            value (str): The time string to convert.
 
         Returns:
-            int: The integer representation of the weekday.
+            int: The number of minutes since midnight.
 
         Raises:
-            ValueError: If the weekday string is not valid.
+            ValueError: If the value is not a valid time in H:M format.
+        """
+        hour, minute = value.strip().split(":")
+        hour, minute = int(hour), int(minute)
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            raise ValueError(f"Invalid time '{value}'.")
+        return hour * 60 + minute
+
+    @staticmethod
+    def compile_window(
+        weekday: int,
+        start_time: str,
+        end_time: str
+    ) -> tuple[tuple[int, int], ...]:
+        """Compile a routine into inclusive minute-of-week intervals.
+
+        Weekdays count from Sunday as 0, like `minute_of_week`, and are taken
+        modulo 7 so that a Sunday stored as 7 is also accepted.
+        A window whose end is before its start runs past midnight into the
+        next day. Routines with unparsable times compile to no intervals.
+
+        Args:
+            weekday (int): The weekday of the routine.
+            start_time (str): The start time of the routine, in H:M format.
+            end_time (str): The end time of the routine, in H:M format.
+
+        Returns:
+            tuple: The (start, end) minute-of-week intervals of the routine.
+        """
+        try:
+            start_minute = RoutineUtils.parse_time(start_time)
+            end_minute = RoutineUtils.parse_time(end_time)
+        except ValueError:
+            return ()
+        start = (weekday % 7) * MINUTES_PER_DAY + start_minute
+        end = (weekday % 7) * MINUTES_PER_DAY + end_minute
+        if end < start:
+            end += MINUTES_PER_DAY
+        if end >= MINUTES_PER_WEEK:
+            return ((start, MINUTES_PER_WEEK - 1), (0, end - MINUTES_PER_WEEK))
+        return ((start, end),)
+
+    @staticmethod
+    def minute_of_week(now: datetime | None = None) -> int:
+        """Get the current minute of the week, adjusted by HOURS_ADJUST.
+
+        Args:
+            now (datetime, optional): The reference time. Defaults to now.
+
+        Returns:
+            int: The minute of the week, with Sunday 00:00 as 0.
+        """
+        now = (now or datetime.now()) - timedelta(hours=routine_config.HOURS_ADJUST)
+        return (
+            (now.isoweekday() % 7) * MINUTES_PER_DAY
+            + now.hour * 60
+            + now.minute
+        )
+
+    @staticmethod
+    def in_window(window: tuple[tuple[int, int], ...], minute: int) -> bool:
+        """Check if a minute of the week falls inside a compiled window.
+
+        Args:
+            window (tuple): The compiled intervals of a routine.
+            minute (int): The minute of the week to check.
+
+        Returns:
+            bool: True if the minute is inside any interval, False otherwise.
+        """
+        return any(start <= minute <= end for start, end in window)
+
+
+class RoutineSchedule:
+    """In-memory index of compiled routine windows by routine ID."""
+
+    def __init__(self):
+        self._windows: dict[int, tuple[tuple, tuple[tuple[int, int], ...]]] = {}
+
+    def set(
+        self,
+        routine_id: int,
+        weekday: int,
+        start_time: str,
+        end_time: str
+    ) -> tuple[tuple[int, int], ...]:
+        """Compile a routine and store its window in the index.
+
+        Args:
+            routine_id (int): The ID of the routine.
+            weekday (int): The weekday of the routine.
+            start_time (str): The start time of the routine.
+            end_time (str): The end time of the routine.
+
+        Returns:
+            tuple: The compiled window of the routine.
+        """
+        window = RoutineUtils.compile_window(weekday, start_time, end_time)
+        self._windows[routine_id] = ((weekday, start_time, end_time), window)
+        return window
+
+    def get(self, routine_id: int) -> tuple[tuple[int, int], ...] | None:
+        """Retrieve the compiled window of a routine.
+
+        Args:
+            routine_id (int): The ID of the routine.
+
+        Returns:
+            tuple | None: The compiled window, or None if not indexed.
+        """
+        entry = self._windows.get(routine_id)
+        return entry[1] if entry else None
+
+    def window(
+        self,
+        routine_id: int,
+        weekday: int,
+        start_time: str,
+        end_time: str
+    ) -> tuple[tuple[int, int], ...]:
+        """Retrieve the window of a routine, compiling it only when needed.
+
+        The indexed window is used if it was compiled from the same weekday
+        and times, so a routine changed by another worker is recompiled.
+
+        Args:
+            routine_id (int): The ID of the routine.
+            weekday (int): The weekday of the routine.
+            start_time (str): The start time of the routine.
+            end_time (str): The end time of the routine.
+
+        Returns:
+            tuple: The compiled window of the routine.
+        """
+        entry = self._windows.get(routine_id)
+        if entry and entry[0] == (weekday, start_time, end_time):
+            return entry[1]
+        return self.set(routine_id, weekday, start_time, end_time)
+
+    def rebuild(self, routines: list) -> None:
+        """Replace the index with the windows of the given routines.
+
+        Args:
+            routines (list): Rows with the routine_id, weekday, start_time
+            and end_time of each routine.
         """
-        weekdays = {
-            "monday": 1,
-            "tuesday": 2,
-            "wednesday": 3,
-            "thursday": 4,
-            "friday": 5,
-            "saturday": 6,
-            "sunday": 7
-        }
-        date = datetime.now()
-        day = date.strftime("%A").lower()
-        return weekdays[day]
+        self._windows = {}
+        for routine in routines:
+            self.set(
+                routine.routine_id, routine.weekday, routine.start_time, routine.end_time)
 
 
 routine_config = RoutineConfig()
+routine_schedule = RoutineSchedule()
@@ -0,0 +1,179 @@
+"""Retention of tag usage history through daily rollups."""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import case, select
+
+from src.database.database import Database
+from src.database.tables import history_daily_table, history_table
+from src.routing.tags.utils import tag_config
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCompactor:
+    """Roll raw history older than the retention period into daily rows.
+
+    Raw rows older than `retention_days` (rounded down to whole days) are
+    summed into `history_daily` per tag and day, then deleted. Each batch of
+    at most `batch_size` rows is compacted in its own short transaction, so
+    the write lock is released between batches and taps keep flowing while
+    a large backlog is compacted.
+    """
+
+    def __init__(self, retention_days: int, interval: float, batch_size: int):
+        """Initialize the compactor.
+
+        Args:
+            retention_days (int): How many days of raw history are kept. Zero
+            or less disables the compaction.
+            interval (float): The time between compaction passes, in seconds.
+            batch_size (int): The maximum number of raw rows per transaction.
+        """
+        self.retention_days = retention_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.passes = 0
+        self.compacted = 0
+        self.failed = 0
+        self.last_duration = 0.0
+        self._stopping: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Start the background compaction task."""
+        if self.running or self.retention_days <= 0:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task after the current batch."""
+        if not self.running:
+            return
+        task, self._task = self._task, None
+        self._stopping.set()
+        await task
+
+    def cutoff(self, now: datetime | None = None) -> str:
+        """Return the ISO day before which raw history is compacted.
+
+        Args:
+            now (datetime, optional): The current time. Defaults to now.
+
+        Returns:
+            str: The first day that is kept raw.
+        """
+        now = now or datetime.now()
+        return (now - timedelta(days=self.retention_days)).date().isoformat()
+
+    async def compact(self, cutoff: str | None = None) -> int:
+        """Compact every raw row older than the cutoff, batch by batch.
+
+        Args:
+            cutoff (str, optional): Rows with a timestamp before this ISO
+            value are compacted. Defaults to `cutoff()`.
+
+        Returns:
+            int: The number of raw rows compacted.
+        """
+        cutoff = cutoff or self.cutoff()
+        start = perf_counter()
+        total = 0
+        while True:
+            count = await self._compact_batch(cutoff)
+            total += count
+            if count < self.batch_size or self._stopping_requested():
+                break
+            await asyncio.sleep(0)
+        self.passes += 1
+        self.compacted += total
+        self.last_duration = perf_counter() - start
+        return total
+
+    def stats(self) -> dict:
+        """Return the compactor counters.
+
+        Returns:
+            dict: The number of passes, compacted rows and failures.
+        """
+        return {
+            "running": self.running,
+            "retention_days": self.retention_days,
+            "passes": self.passes,
+            "compacted": self.compacted,
+            "failed": self.failed,
+            "last_duration": self.last_duration
+        }
+
+    def _stopping_requested(self) -> bool:
+        return self._stopping is not None and self._stopping.is_set()
+
+    async def _run(self) -> None:
+        while not self._stopping_requested():
+            try:
+                await self.compact()
+            except Exception:
+                self.failed += 1
+                logger.exception("Failed to compact the tag history.")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _compact_batch(self, cutoff: str) -> int:
+        query = select(
+            history_table.c.history_id,
+            history_table.c.tag_id,
+            history_table.c.timestamp
+        ).where(
+            history_table.c.timestamp < cutoff
+        ).order_by(history_table.c.timestamp).limit(self.batch_size)
+        async with Database.transaction() as conn:
+            rows = (await conn.execute(query)).all()
+            if not rows:
+                return 0
+            days: dict[tuple[str, str], dict] = {}
+            for _, tag_id, timestamp in rows:
+                day = days.setdefault((tag_id, timestamp[:10]), {
+                    "tag_id": tag_id,
+                    "day": timestamp[:10],
+                    "tap_count": 0,
+                    "first_tap": timestamp,
+                    "last_tap": timestamp
+                })
+                day["tap_count"] += 1
+                day["first_tap"] = min(day["first_tap"], timestamp)
+                day["last_tap"] = max(day["last_tap"], timestamp)
+            await conn.execute(self._rollup_statement(), list(days.values()))
+            await conn.execute(history_table.delete().where(
+                history_table.c.history_id.in_([row.history_id for row in rows])))
+        return len(rows)
+
+    @staticmethod
+    def _rollup_statement():
+        daily = history_daily_table.c
+        return Database.upsert(history_daily_table, ["tag_id", "day"], {
+            "tap_count": lambda new: daily.tap_count + new.tap_count,
+            "first_tap": lambda new: case(
+                (new.first_tap < daily.first_tap, new.first_tap),
+                else_=daily.first_tap
+            ),
+            "last_tap": lambda new: case(
+                (new.last_tap > daily.last_tap, new.last_tap),
+                else_=daily.last_tap
+            ),
+        })
+
+
+history_compactor = HistoryCompactor(
+    retention_days=tag_config.HISTORY_RETENTION_DAYS,
+    interval=tag_config.HISTORY_COMPACTION_INTERVAL,
+    batch_size=tag_config.HISTORY_COMPACTION_BATCH_SIZE
+)
@@ -0,0 +1,110 @@
+"""Window of recent taps used to drop repeated tag writes."""
+from collections import OrderedDict
+from time import monotonic
+from typing import Hashable
+
+from src.routing.tags.utils import tag_config
+
+
+class RecentTaps:
+    """Remember the taps written recently by each device.
+
+    A card resting on a reader keeps sending the same tap. The first tap of
+    a (tag_id, device_id) pair is written and remembered with the
+    configuration it carried; repeats with the same configuration inside
+    `window` seconds are reported as duplicates and not written again. The
+    window is fixed from the written tap, so a resting card still writes
+    once per window. Entries are kept in write order, so expired ones are
+    evicted from the front.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        """Initialize the window.
+
+        Args:
+            window (float): How long a written tap suppresses its repeats,
+            in seconds. Zero disables deduplication.
+            max_size (int): The maximum number of taps remembered.
+        """
+        self.window = window
+        self.max_size = max_size
+        self.recorded = 0
+        self.suppressed = 0
+        self._taps: OrderedDict[tuple, tuple[float, Hashable]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._taps)
+
+    def seen(self, tag_id: str, device_id: str | None, configuration: Hashable) -> bool:
+        """Check whether a tap repeats one written inside the window.
+
+        Args:
+            tag_id (str): The ID of the tapped tag.
+            device_id (str, optional): The ID of the reader.
+            configuration (Hashable): The configuration carried by the tap.
+
+        Returns:
+            bool: True if the tap is a duplicate and should not be written.
+        """
+        self._evict(monotonic())
+        entry = self._taps.get((tag_id, device_id))
+        if entry is None or entry[1] != configuration:
+            return False
+        self.suppressed += 1
+        return True
+
+    def record(self, tag_id: str, device_id: str | None, configuration: Hashable) -> None:
+        """Remember a written tap.
+
+        Args:
+            tag_id (str): The ID of the tapped tag.
+            device_id (str, optional): The ID of the reader.
+            configuration (Hashable): The configuration carried by the tap.
+        """
+        if self.window <= 0 or self.max_size <= 0:
+            return
+        key = (tag_id, device_id)
+        self._taps[key] = (monotonic() + self.window, configuration)
+        self._taps.move_to_end(key)
+        self.recorded += 1
+        while len(self._taps) > self.max_size:
+            self._taps.popitem(last=False)
+
+    def forget(self, tag_id: str) -> None:
+        """Drop the taps of a tag written through another path.
+
+        Args:
+            tag_id (str): The ID of the tag.
+        """
+        for key in [key for key in self._taps if key[0] == tag_id]:
+            del self._taps[key]
+
+    def clear(self) -> None:
+        """Drop every remembered tap."""
+        self._taps.clear()
+
+    def stats(self) -> dict:
+        """Return the deduplication counters.
+
+        Returns:
+            dict: The recorded and suppressed counters and the window size.
+        """
+        return {
+            "recorded": self.recorded,
+            "suppressed": self.suppressed,
+            "size": len(self._taps),
+            "window": self.window
+        }
+
+    def _evict(self, now: float) -> None:
+        while self._taps:
+            expires, _ = next(iter(self._taps.values()))
+            if expires > now:
+                return
+            self._taps.popitem(last=False)
+
+
+recent_taps = RecentTaps(
+    window=tag_config.TAP_DEDUP_WINDOW,
+    max_size=tag_config.TAP_DEDUP_MAX_SIZE
+)
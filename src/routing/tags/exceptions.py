@@ -11,8 +11,43 @@ class TagNotFoundException(CustomException):
     DETAIL: str = "Tag with id '{id}' was not found."
 
 
+class TagResolutionTimeoutException(CustomException):
+    """Exception raised when resolving a tag takes too long."""
+
+    STATUS_CODE: int = status.HTTP_504_GATEWAY_TIMEOUT
+    DETAIL: str = "Resolving tag with id '{id}' timed out."
+
+
+class TagRecordOutOfRangeException(CustomException):
+    """Exception raised when a tag resolution doesn't fit the binary record."""
+
+    STATUS_CODE: int = status.HTTP_406_NOT_ACCEPTABLE
+    DETAIL: str = "Tag with id '{id}' can't be encoded as a binary record, request JSON."
+
+
 class TagAlreadyExistsException(CustomException):
     """Exception raised when a tag already exists."""
 
     STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
     DETAIL: str = "Tag with id '{id}' already exists."
+
+
+class TapBatchTooLargeException(CustomException):
+    """Exception raised when a tap batch has too many taps."""
+
+    STATUS_CODE: int = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    DETAIL: str = "Tap batch has {size} taps, the maximum is {max_size}."
+
+
+class InvalidBulkPayloadException(CustomException):
+    """Exception raised when a bulk request body can't be decoded."""
+
+    STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
+    DETAIL: str = "Invalid bulk payload: {reason}."
+
+
+class InvalidHistoryCursorException(CustomException):
+    """Exception raised when a history cursor can't be decoded."""
+
+    STATUS_CODE: int = status.HTTP_400_BAD_REQUEST
+    DETAIL: str = "Invalid history cursor '{cursor}'."
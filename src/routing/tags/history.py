@@ -0,0 +1,165 @@
+"""Write-behind buffer for tag usage history."""
+import asyncio
+import logging
+from time import perf_counter
+
+from src.database.database import Database
+from src.database.tables import history_table
+from src.routing.tags.utils import tag_config
+
+logger = logging.getLogger(__name__)
+_STOP = object()
+
+
+class HistoryWriter:
+    """Buffer history rows in a bounded queue and flush them in batches.
+
+    While running, `record` only enqueues the row, and a background task
+    writes the queue with one multi-row INSERT whenever `batch_size` rows
+    are waiting or `flush_interval` seconds have passed. A full queue makes
+    `record` wait, which is counted as backpressure. When the writer is not
+    running, rows are written immediately.
+    """
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        """Initialize the writer.
+
+        Args:
+            queue_size (int): The maximum number of rows waiting to be written.
+            batch_size (int): The maximum number of rows written per INSERT.
+            flush_interval (float): The maximum time a row waits, in seconds.
+        """
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self._queue: asyncio.Queue | None = None
+        self._batch_ready: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._batch_ready = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush every pending row and stop the background task."""
+        if not self.running:
+            return
+        task, self._task = self._task, None
+        self._closing = True
+        await self._queue.put(_STOP)
+        self._batch_ready.set()
+        await task
+
+    async def record(self, tag_id: str, timestamp: str) -> None:
+        """Record a history row for a tag.
+
+        Args:
+            tag_id (str): The ID of the tag.
+            timestamp (str): The ISO timestamp of the tag use.
+        """
+        await self.record_many([{"tag_id": tag_id, "timestamp": timestamp}])
+
+    async def record_many(self, rows: list[dict]) -> None:
+        """Record several history rows.
+
+        Args:
+            rows (list[dict]): The tag_id and timestamp of each row.
+        """
+        if not self.running:
+            for start in range(0, len(rows), self.batch_size):
+                await self._write(rows[start:start + self.batch_size])
+            return
+        for row in rows:
+            await self._enqueue(row)
+
+    async def _enqueue(self, row: dict) -> None:
+        if self._queue.full():
+            self.blocked += 1
+            start = perf_counter()
+            await self._queue.put(row)
+            self.blocked_seconds += perf_counter() - start
+        else:
+            self._queue.put_nowait(row)
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        if depth >= self.batch_size:
+            self._batch_ready.set()
+
+    def stats(self) -> dict:
+        """Return the writer counters.
+
+        Returns:
+            dict: The queue depth, throughput and backpressure counters.
+        """
+        return {
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_depth": self.max_depth,
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "blocked": self.blocked,
+            "blocked_seconds": self.blocked_seconds
+        }
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            if not self._closing and self._queue.qsize() + 1 < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._write(batch)
+
+    async def _write(self, rows: list[dict]) -> None:
+        try:
+            await Database.execute(history_table.insert().values(rows))
+        except Exception:
+            self.failed += len(rows)
+            logger.exception("Failed to write %d history rows.", len(rows))
+            return
+        self.written += len(rows)
+        self.batches += 1
+
+
+history_writer = HistoryWriter(
+    queue_size=tag_config.HISTORY_QUEUE_SIZE,
+    batch_size=tag_config.HISTORY_BATCH_SIZE,
+    flush_interval=tag_config.HISTORY_FLUSH_INTERVAL
+)
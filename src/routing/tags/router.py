@@ -1,16 +1,34 @@
 """Router for tag-related endpoints."""
-from fastapi import APIRouter, status
-
-
-from src.routing.preference.service import preference_service
-from src.routing.preference.schemas import PreferenceRequest
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request, Response, status
+
+from src.app.revisions import etag_matches
+from src.app.timing import TimedRoute
+from src.routing.preference.schemas import (
+    LED_COLOR_MAX,
+    MUSIC_ID_MAX,
+    PreferenceRequest
+)
 from src.routing.routine.schemas import Routine
-from src.routing.routine.service import routine_service
 from src.routing.routine.exceptions import InvalidValuesForRoutineException
-from src.routing.tags.schemas import TagRequest
+from src.routing.tags.history import history_writer
+from src.routing.tags.schemas import (
+    TagBulkResult,
+    TagRequest,
+    TapBatchResult,
+    TapEvent
+)
 from src.routing.tags.service import tag_service
-
-tag_router = APIRouter()
+from src.routing.tags.utils import (
+    TAG_RECORD_MEDIA_TYPE,
+    TagUtils,
+    tag_cache,
+    tag_config
+)
+
+tag_router = APIRouter(route_class=TimedRoute)
 prefix = "/tag"
 
 
@@ -18,15 +36,19 @@ prefix = "/tag"
 async def handle_tag_request(
     tag_id: str,
     name: str,
-    led_color: int,
-    music_id: int,
+    led_color: int = Query(ge=0, le=LED_COLOR_MAX),
+    music_id: int = Query(ge=0, le=MUSIC_ID_MAX),
     routine_id: int = None,
     end_time: str = None,
     start_time: str = None,
-    weekday: int = None
+    weekday: int = None,
+    device_id: str = None
 ) -> None:
     """Endpoint to create or update a tag history.
 
+    Repeated taps of a device inside TAP_DEDUP_WINDOW seconds are not
+    written again.
+
     Args:
         tag_id (str): The ID of the tag.
         name (str): The name of the tag.
@@ -36,35 +58,61 @@ async def handle_tag_request(
         end_time (str, optional): The end time for the routine, if applicable.
         start_time (str, optional): The start time for the routine, if applicable.
         weekday (int, optional): The weekday for the routine, if applicable.
+        device_id (str, optional): The ID of the reader sending the tap.
 
     Raises:
         InvalidValuesForRoutineException: If routine_id is provided but any of
         end_time, start_time, or weekday is missing.
     """
+    routine = None
     if routine_id:
         if not end_time or not start_time or not weekday:
             raise InvalidValuesForRoutineException
         routine = Routine(
-        routine_id=routine_id,
-        start_time=start_time,
-        end_time=end_time,
-        weekday=weekday,
+            routine_id=routine_id,
+            start_time=start_time,
+            end_time=end_time,
+            weekday=weekday,
         )
-        await routine_service.handle_routine_request(routine)
     preference_request = PreferenceRequest(
         led_color=led_color,
         music_id=music_id,
     )
-    preference = await preference_service.handle_preference_request(
-        preference_request)
-    tag_request = TagRequest(
-        tag_id=tag_id,
-        name=name,
-        preference_id=preference.preference_id,
-        routine_id=routine_id,
-    )
-    await tag_service.handle_tag_request(tag_request)
-    
+    await tag_service.handle_tag_configuration(
+        tag_id, name, preference_request, routine, device_id)
+
+
+@tag_router.post(prefix+"/bulk")
+async def bulk_handle_tag_requests(request: Request) -> list[TagBulkResult]:
+    """Endpoint to create or update many tags at once.
+
+    The body is a JSON array or an NDJSON stream (`application/x-ndjson`)
+    of `TagConfiguration` objects.
+
+    Args:
+        request (Request): The request carrying the tag configurations.
+
+    Returns:
+        list[TagBulkResult]: The result of each configuration, in order.
+    """
+    items = TagUtils.decode_bulk_payload(
+        await request.body(), request.headers.get("content-type", ""))
+    return await tag_service.bulk_handle_tag_configurations(items)
+
+
+@tag_router.post(prefix+"/taps")
+async def ingest_taps(taps: list[TapEvent]) -> TapBatchResult:
+    """Endpoint to record the taps buffered by a device while offline.
+
+    Args:
+        taps (list[TapEvent]): The taps, with their device timestamps.
+
+    Returns:
+        TapBatchResult: The recorded, duplicate and unknown taps and the
+        response of each distinct tag.
+    """
+    return await tag_service.ingest_taps(taps)
+
 
 @tag_router.post(prefix, status_code=status.HTTP_201_CREATED)
 async def create_tag(new_tag: TagRequest) -> None:
@@ -76,42 +124,105 @@ async def create_tag(new_tag: TagRequest) -> None:
     await tag_service.create_tag(new_tag)
 
 
-@tag_router.get(prefix)
-async def get_tag(tag_id: str) -> dict:
+@tag_router.get(
+    prefix,
+    responses={status.HTTP_200_OK: {"content": {TAG_RECORD_MEDIA_TYPE: {}}}}
+)
+async def get_tag(
+    tag_id: str,
+    request: Request,
+    response: Response,
+    format: Literal["json", "bin"] | None = None
+) -> dict:
     """Endpoint to retrieve a tag by its ID.
 
+    Devices may ask for the packed binary record built by
+    `TagUtils.pack_resolution` with `format=bin` or an
+    `Accept: application/octet-stream` header. The ETag is derived from the
+    record, or from the resolution fields for JSON, so a device revalidating
+    its cached copy with `If-None-Match` gets a 304 while the tag resolves
+    to the same response. The record is only packed for binary responses.
+
     Args:
-        id (str): The ID of the tag to retrieve.
+        tag_id (str): The ID of the tag to retrieve.
+        request (Request): The request, used to read the Accept and
+        If-None-Match headers.
+        response (Response): The response whose headers are set.
+        format (str, optional): The response format, "json" or "bin".
 
     Returns:
         dict: The tag data.
     """
-    tag = await tag_service.get_tag_by_id(tag_id)
-    preference = await preference_service.get_preference_by_id(
-        tag.preference_id)
-    response_dict = {
-        "led_color": preference.led_color,
-        "music_id": preference.music_id,
-        "routine_id": None
+    resolution = await tag_service.resolve_tag(tag_id)
+    binary = TagUtils.wants_binary(format, request.headers.get("accept", ""))
+    if binary:
+        record = TagUtils.pack_resolution(tag_id, resolution)
+        etag = TagUtils.record_etag(record)
+    else:
+        etag = TagUtils.resolution_etag(resolution)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept"
     }
-    if tag.routine_id:
-        if await routine_service.check_runnable_routine(tag.routine_id):
-            response_dict["routine_id"] = tag.routine_id
-    return response_dict
-        
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if binary:
+        return Response(content=record, media_type=TAG_RECORD_MEDIA_TYPE, headers=headers)
+    response.headers.update(headers)
+    return resolution
+
+
+@tag_router.get(prefix+"/cache")
+async def get_tag_cache_stats() -> dict:
+    """Endpoint to retrieve the tag resolution cache counters.
+
+    Returns:
+        dict: The hit, miss and eviction counters and the cache size.
+    """
+    return tag_cache.stats()
 
 
 @tag_router.get(prefix+"/history")
-async def get_tag_history(id: str) -> list[dict]:
+async def get_tag_history(
+    id: str,
+    response: Response,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(
+        tag_config.HISTORY_PAGE_SIZE, ge=1, le=tag_config.HISTORY_MAX_PAGE_SIZE),
+    cursor: str | None = None
+) -> list[dict]:
     """Endpoint to retrieve the history of a tag by its ID.
 
+    The cursor of the next page, if any, is sent in the `X-Next-Cursor`
+    header.
+
     Args:
         id (str): The ID of the tag whose history to retrieve.
+        since (datetime, optional): Only rows at or after this time.
+        until (datetime, optional): Only rows at or before this time.
+        limit (int): The maximum number of rows returned.
+        cursor (str, optional): The cursor returned with the previous page.
+
+    Returns:
+        list: A page of the history of the tag.
+    """
+    rows, next_cursor = await tag_service.get_tag_history(
+        id, since, until, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@tag_router.get(prefix+"/history/stats")
+async def get_tag_history_stats() -> dict:
+    """Endpoint to retrieve the history writer counters.
 
     Returns:
-        list: The history of the tag.
+        dict: The queue depth, throughput and backpressure counters.
     """
-    return await tag_service.get_tag_history(id)
+    return history_writer.stats()
 
 
 @tag_router.delete(prefix, status_code=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,12 @@
 """Schemas for tag-related operations."""
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
+from src.routing.preference.schemas import PreferenceRequest
+from src.routing.routine.schemas import Routine
+
 
 class TagRequest(BaseModel):
     """Schema for tag creation or update requests."""
@@ -16,3 +22,47 @@ class TagResponse(TagRequest):
 
     first_use: str
     last_use: str | None
+
+
+class TagConfiguration(BaseModel):
+    """Schema for a tag configuration in a bulk request."""
+
+    tag_id: str
+    name: str
+    preference: PreferenceRequest
+    routine: Routine | None = None
+
+
+class TagBulkResult(BaseModel):
+    """Schema for the result of one item of a bulk request."""
+
+    index: int
+    tag_id: str | None
+    status: Literal["ok", "error"]
+    detail: str | None = None
+
+
+class TagResolution(BaseModel):
+    """Schema for the device response of a tag."""
+
+    led_color: int
+    music_id: int
+    routine_id: int | None
+
+
+class TapEvent(BaseModel):
+    """Schema for a tap buffered by a device."""
+
+    device_id: str | None = None
+    tag_id: str
+    timestamp: datetime
+
+
+class TapBatchResult(BaseModel):
+    """Schema for the result of a tap batch."""
+
+    recorded: int
+    duplicates: int
+    expired: int
+    unknown: list[str]
+    resolutions: dict[str, TagResolution]
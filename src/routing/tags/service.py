@@ -1,31 +1,329 @@
 """Service module for tag-related operations."""
 
-from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 
+from pydantic import ValidationError
+from sqlalchemy import bindparam, literal, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.app.revisions import table_revisions
 from src.database.database import Database
-from src.database.tables import tag_table, history_table
+from src.database.tables import (
+    history_daily_table,
+    history_table,
+    preference_table,
+    routine_table,
+    tag_table
+)
+from src.routing.events.broker import event_broker
+from src.routing.events.schemas import EventTopic
+from src.routing.preference.exceptions import PreferenceIDNotFoundException
+from src.routing.preference.schemas import PreferenceRequest
+from src.routing.preference.service import PreferenceService
+from src.routing.routine.exceptions import RoutineNotFoundException
+from src.routing.routine.schemas import Routine
+from src.routing.routine.service import RoutineService
+from src.routing.routine.utils import RoutineUtils, routine_schedule
 from src.routing.tags.exceptions import (
     TagAlreadyExistsException,
-    TagNotFoundException
+    TagNotFoundException,
+    TagResolutionTimeoutException,
+    TapBatchTooLargeException
+)
+from src.routing.tags.compaction import history_compactor
+from src.routing.tags.dedup import recent_taps
+from src.routing.tags.history import history_writer
+from src.routing.tags.schemas import (
+    TagBulkResult,
+    TagConfiguration,
+    TagRequest,
+    TagResponse,
+    TapEvent
 )
-from src.routing.tags.schemas import TagRequest, TagResponse
-from src.routing.tags.utils import TagUtils
+from src.routing.tags.utils import TagUtils, tag_cache, tag_config, tag_resolutions
 
 
 class TagService:
     """Service class for tag operations."""
 
     @classmethod
-    async def handle_tag_request(cls, tag: TagRequest) -> None:
-        """Handle tag request.
-        
+    async def handle_tag_configuration(
+        cls,
+        tag_id: str,
+        name: str,
+        preference: PreferenceRequest,
+        routine: Routine | None = None,
+        device_id: str | None = None
+    ) -> bool:
+        """Create or update a tag with its preference and routine.
+
+        Every row is written with INSERT ... ON CONFLICT DO UPDATE on a single
+        connection and transaction, so there are no exists checks that can
+        race with a concurrent insert. A tap repeating, from the same device
+        and with the same configuration, one written less than
+        TAP_DEDUP_WINDOW seconds ago is not written again. The resolution
+        of the tag is then reloaded from the writer, so lookups right after
+        the write reflect it even while the reader lags behind.
+
+        Args:
+            tag_id (str): The ID of the tag.
+            name (str): The name of the tag, used when it is created.
+            preference (PreferenceRequest): The preference of the tag.
+            routine (Routine, optional): The routine of the tag.
+            device_id (str, optional): The ID of the reader sending the tap.
+
+        Returns:
+            bool: True if the tap was written, False if it was a duplicate.
+        """
+        configuration = (
+            preference.music_id,
+            preference.led_color,
+            tuple(routine.model_dump().values()) if routine else None
+        )
+        if recent_taps.seen(tag_id, device_id, configuration):
+            return False
+        timestamp = TagUtils.get_timestamp()
+        async with Database.transaction() as conn:
+            if routine:
+                await RoutineService.upsert_routine(conn, routine)
+            preference_id, created = await PreferenceService.upsert_preference(
+                conn, preference)
+            tag_query = Database.upsert(
+                tag_table,
+                values={
+                    "tag_id": tag_id,
+                    "name": name,
+                    "preference_id": preference_id,
+                    "routine_id": routine.routine_id if routine else None,
+                    "first_use": timestamp,
+                    "last_use": timestamp
+                },
+                index_elements=["tag_id"],
+                update=["preference_id", "routine_id", "last_use"]
+            )
+            await conn.execute(tag_query)
+        if routine:
+            RoutineService.refresh_routine(routine)
+        if created:
+            table_revisions.bump(preference_table.name)
+        table_revisions.bump(tag_table.name)
+        await cls.refresh_resolution(tag_id)
+        cls.publish_tag(
+            tag_id,
+            preference_id,
+            preference.music_id,
+            preference.led_color,
+            routine.routine_id if routine else None
+        )
+        recent_taps.record(tag_id, device_id, configuration)
+        await history_writer.record(tag_id, timestamp)
+        return True
+
+    @classmethod
+    async def bulk_handle_tag_configurations(
+        cls,
+        items: list
+    ) -> list[TagBulkResult]:
+        """Create or update many tags with their preferences and routines.
+
+        Items are validated one by one. Distinct preferences and routines are
+        upserted once, then the tags are upserted with executemany in chunks
+        of BULK_CHUNK_SIZE, each chunk in its own transaction.
+
+        Args:
+            items (list): The decoded tag configurations.
+
+        Returns:
+            list[TagBulkResult]: The result of each item, in request order.
+        """
+        results = []
+        configurations = []
+        for index, item in enumerate(items):
+            try:
+                configuration = TagConfiguration.model_validate(item)
+            except ValidationError as error:
+                tag_id = item.get("tag_id") if isinstance(item, dict) else None
+                results.append(TagBulkResult(
+                    index=index,
+                    tag_id=None if tag_id is None else str(tag_id),
+                    status="error",
+                    detail=TagUtils.format_validation_error(error)
+                ))
+                continue
+            configurations.append((index, configuration))
+            results.append(TagBulkResult(
+                index=index, tag_id=configuration.tag_id, status="ok"))
+        if not configurations:
+            return results
+
+        chunk_size = tag_config.BULK_CHUNK_SIZE
+        routines = {
+            configuration.routine.routine_id: configuration.routine
+            for _, configuration in configurations if configuration.routine
+        }
+        if routines:
+            await RoutineService.upsert_routines(
+                list(routines.values()), chunk_size)
+        preference_ids = await PreferenceService.upsert_preferences(
+            {
+                (configuration.preference.music_id, configuration.preference.led_color)
+                for _, configuration in configurations
+            },
+            chunk_size
+        )
+
+        timestamp = TagUtils.get_timestamp()
+        tag_query = Database.upsert(
+            tag_table,
+            index_elements=["tag_id"],
+            update=["preference_id", "routine_id", "last_use"]
+        )
+        for start in range(0, len(configurations), chunk_size):
+            chunk = configurations[start:start + chunk_size]
+            try:
+                async with Database.transaction() as conn:
+                    await conn.execute(tag_query, [
+                        {
+                            "tag_id": configuration.tag_id,
+                            "name": configuration.name,
+                            "preference_id": preference_ids[(
+                                configuration.preference.music_id,
+                                configuration.preference.led_color
+                            )],
+                            "routine_id": (
+                                configuration.routine.routine_id
+                                if configuration.routine else None
+                            ),
+                            "first_use": timestamp,
+                            "last_use": timestamp
+                        }
+                        for _, configuration in chunk
+                    ])
+            except SQLAlchemyError as error:
+                for index, _ in chunk:
+                    results[index].status = "error"
+                    results[index].detail = str(error.__cause__ or error)
+                continue
+            for _, configuration in chunk:
+                cls.publish_tag(
+                    configuration.tag_id,
+                    preference_ids[(
+                        configuration.preference.music_id,
+                        configuration.preference.led_color
+                    )],
+                    configuration.preference.music_id,
+                    configuration.preference.led_color,
+                    configuration.routine.routine_id if configuration.routine else None
+                )
+            await history_writer.record_many([
+                {"tag_id": configuration.tag_id, "timestamp": timestamp}
+                for _, configuration in chunk
+            ])
+        table_revisions.bump(tag_table.name)
+        tag_cache.clear()
+        recent_taps.clear()
+        return results
+
+    @classmethod
+    async def ingest_taps(cls, taps: list[TapEvent]) -> dict:
+        """Record a batch of taps buffered by devices.
+
+        Repeats of a (tag_id, device_id) tap less than TAP_DEDUP_WINDOW
+        seconds apart are dropped. The remaining taps are written as history
+        rows with their device timestamps, and the `last_use` of each tag is
+        moved forward, in a single transaction. Devices resend a whole batch
+        when they miss the response, so taps already in the history are
+        counted as duplicates instead of being written again. Taps from
+        before the compaction cutoff (HISTORY_RETENTION_DAYS) are counted
+        as expired and not recorded, since they could already be merged
+        into the daily rollups and can't be told apart there. Taps of
+        unknown tags are not recorded.
+
+        Args:
+            taps (list[TapEvent]): The buffered taps.
+
+        Raises:
+            TapBatchTooLargeException: If the batch exceeds TAP_BATCH_MAX_SIZE.
+
+        Returns:
+            dict: The recorded, duplicate, expired and unknown counters and
+            the response of each distinct resolvable tag.
+        """
+        if len(taps) > tag_config.TAP_BATCH_MAX_SIZE:
+            raise TapBatchTooLargeException(
+                size=len(taps), max_size=tag_config.TAP_BATCH_MAX_SIZE)
+        with Database.read_your_writes():
+            known = {
+                row.tag_id for row in await Database.fetch_all(
+                    select(tag_table.c.tag_id).where(
+                        tag_table.c.tag_id.in_({tap.tag_id for tap in taps})))
+            }
+            rows = TagUtils.deduplicate_taps(
+                [tap for tap in taps if tap.tag_id in known],
+                tag_config.TAP_DEDUP_WINDOW
+            )
+            cutoff = history_compactor.cutoff()
+            kept = [row for row in rows if row["timestamp"] >= cutoff]
+            expired = len(rows) - len(kept)
+            rows = kept
+            if rows:
+                async with Database.transaction() as conn:
+                    rows = await cls._drop_recorded_taps(conn, rows)
+                    last_use = {}
+                    for row in rows:
+                        last_use[row["tag_id"]] = max(
+                            row["timestamp"], last_use.get(row["tag_id"], ""))
+                    if rows:
+                        await conn.execute(history_table.insert(), rows)
+                        await conn.execute(
+                            tag_table.update().where(
+                                tag_table.c.tag_id == bindparam("b_tag_id"),
+                                tag_table.c.last_use < bindparam("b_last_use")
+                            ).values(last_use=bindparam("b_last_use")),
+                            [
+                                {"b_tag_id": tag_id, "b_last_use": timestamp}
+                                for tag_id, timestamp in last_use.items()
+                            ]
+                        )
+                if rows:
+                    table_revisions.bump(tag_table.name)
+            resolutions = await cls.resolve_tags(known)
+        return {
+            "recorded": len(rows),
+            "duplicates": sum(tap.tag_id in known for tap in taps) - len(rows) - expired,
+            "expired": expired,
+            "unknown": sorted({tap.tag_id for tap in taps} - known),
+            "resolutions": resolutions
+        }
+
+    @classmethod
+    async def _drop_recorded_taps(
+        cls,
+        conn: AsyncConnection,
+        rows: list[dict],
+        chunk_size: int = tag_config.BULK_CHUNK_SIZE
+    ) -> list[dict]:
+        """Drop the taps whose (tag_id, timestamp) is already in the history.
+
         Args:
-            tag (str): The tag data.
+            conn (AsyncConnection): The connection of the running transaction.
+            rows (list[dict]): The tag_id and timestamp of each tap.
+            chunk_size (int): The number of taps looked up per statement.
+
+        Returns:
+            list[dict]: The taps not recorded yet.
         """
-        if not await cls.tag_exists(tag.tag_id):
-            await cls.create_tag(tag)
-            return
-        await cls.update_tag_by_id(tag)
+        pairs = [(row["tag_id"], row["timestamp"]) for row in rows]
+        recorded = set()
+        for start in range(0, len(pairs), chunk_size):
+            result = await conn.execute(
+                select(history_table.c.tag_id, history_table.c.timestamp).where(
+                    tuple_(history_table.c.tag_id, history_table.c.timestamp).in_(
+                        pairs[start:start + chunk_size]))
+            )
+            recorded.update((tag_id, timestamp) for tag_id, timestamp in result)
+        return [row for row in rows if (row["tag_id"], row["timestamp"]) not in recorded]
 
     @classmethod
     async def create_tag(cls, new_tag: TagRequest) -> None:
@@ -47,11 +345,15 @@ class TagService:
                 first_use=timestamp,
                 last_use=timestamp
             )
-            history_query = history_table.insert().values(
-                tag_id=new_tag.tag_id, timestamp=timestamp)
-            await Database.execute_many([tag_query, history_query])
+            await Database.execute(tag_query)
         except IntegrityError:
             raise TagAlreadyExistsException(id=new_tag.tag_id)
+        table_revisions.bump(tag_table.name)
+        tag_cache.invalidate(new_tag.tag_id)
+        recent_taps.forget(new_tag.tag_id)
+        cls.publish_tag(
+            new_tag.tag_id, new_tag.preference_id, None, None, new_tag.routine_id)
+        await history_writer.record(new_tag.tag_id, timestamp)
 
     @classmethod
     async def get_tag_by_id(cls, tag_id: str) -> dict:
@@ -73,21 +375,262 @@ class TagService:
         return TagResponse(**tag)
 
     @classmethod
-    async def get_tag_history(cls, id: str) -> list[dict]:
-        """Retrieve the history of a tag by its ID.
+    async def resolve_tag(cls, tag_id: str) -> dict:
+        """Resolve the device response for a tag.
+
+        The preference and routine window of the tag are read through
+        `tag_cache`, so repeated taps of the same card are served from memory.
+        Concurrent misses of the same tag share one load through
+        `tag_resolutions`, so a burst of taps costs one query per tag.
+
+        Args:
+            tag_id (str): The ID of the tag to resolve.
+
+        Raises:
+            TagNotFoundException: If the tag with the specified ID does not exist.
+            PreferenceIDNotFoundException: If the tag preference does not exist.
+            RoutineNotFoundException: If the tag routine does not exist.
+            TagResolutionTimeoutException: If the load exceeds TAG_RESOLVE_TIMEOUT.
+
+        Returns:
+            dict: The led color, music ID and runnable routine ID of the tag.
+        """
+        resolution = tag_cache.get(tag_id)
+        if resolution is None:
+            generation = tag_cache.generation
+
+            async def load() -> dict:
+                loaded = await cls.load_resolution(tag_id)
+                tag_cache.set(tag_id, loaded, generation=generation)
+                return loaded
+
+            try:
+                # Keyed by generation so requests after a write never join
+                # a load that started before it.
+                resolution = await tag_resolutions.do((tag_id, generation), load)
+            except TimeoutError:
+                raise TagResolutionTimeoutException(id=tag_id)
+        return cls._respond(resolution)
+
+    @classmethod
+    async def resolve_tags(cls, tag_ids: set[str]) -> dict[str, dict]:
+        """Resolve the device responses of many tags.
+
+        Tags missing from `tag_cache` are loaded together with one query.
+
+        Args:
+            tag_ids (set[str]): The IDs of the tags to resolve.
+
+        Returns:
+            dict[str, dict]: The response of each tag that could be resolved.
+            Unknown tags, and tags whose preference or routine is missing,
+            are left out.
+        """
+        resolutions = {}
+        for tag_id in tag_ids:
+            resolution = tag_cache.get(tag_id)
+            if resolution is not None:
+                resolutions[tag_id] = resolution
+        misses = tag_ids - resolutions.keys()
+        if misses:
+            generation = tag_cache.generation
+            rows = await Database.fetch_all(
+                cls._resolution_query().where(tag_table.c.tag_id.in_(misses)))
+            for row in rows:
+                try:
+                    resolution = cls._build_resolution(row)
+                except (PreferenceIDNotFoundException, RoutineNotFoundException):
+                    continue
+                tag_cache.set(row.tag_id, resolution, generation=generation)
+                resolutions[row.tag_id] = resolution
+        return {
+            tag_id: cls._respond(resolution)
+            for tag_id, resolution in resolutions.items()
+        }
+
+    @staticmethod
+    def _respond(resolution: dict) -> dict:
+        response_dict = {
+            "led_color": resolution["led_color"],
+            "music_id": resolution["music_id"],
+            "routine_id": None
+        }
+        routine_id = resolution["routine_id"]
+        if routine_id and RoutineUtils.in_window(
+            resolution["window"], RoutineUtils.minute_of_week()
+        ):
+            response_dict["routine_id"] = routine_id
+        return response_dict
+
+    @classmethod
+    async def refresh_resolution(cls, tag_id: str) -> None:
+        """Reload the cached resolution of a tag that was just written.
+
+        The resolution is read from the writer, so a lagging reader can't
+        put the resolution from before the write back in `tag_cache`.
+
+        Args:
+            tag_id (str): The ID of the written tag.
+        """
+        tag_cache.invalidate(tag_id)
+        generation = tag_cache.generation
+        with Database.read_your_writes():
+            resolution = await cls.load_resolution(tag_id)
+        tag_cache.set(tag_id, resolution, generation=generation)
+
+    @classmethod
+    async def load_resolution(cls, tag_id: str) -> dict:
+        """Load the preference and routine window of a tag in a single query.
+
+        The tag, its preference and its routine are loaded with one joined
+        SELECT, so resolving a tap costs a single database round trip. The
+        routine window is read from `routine_schedule`, and only compiled
+        when the index misses it or holds an older version of the routine.
+
+        Args:
+            tag_id (str): The ID of the tag to load.
+
+        Raises:
+            TagNotFoundException: If the tag with the specified ID does not exist.
+            PreferenceIDNotFoundException: If the tag preference does not exist.
+            RoutineNotFoundException: If the tag routine does not exist.
+
+        Returns:
+            dict: The preference and routine window of the tag.
+        """
+        query = cls._resolution_query().where(tag_table.c.tag_id == tag_id)
+        row = await Database.fetch_one(query)
+        if not row:
+            raise TagNotFoundException(id=tag_id)
+        return cls._build_resolution(row)
+
+    @staticmethod
+    def _resolution_query():
+        return (
+            select(
+                tag_table.c.tag_id,
+                tag_table.c.preference_id,
+                tag_table.c.routine_id,
+                preference_table.c.led_color,
+                preference_table.c.music_id,
+                routine_table.c.start_time,
+                routine_table.c.end_time,
+                routine_table.c.weekday
+            )
+            .select_from(
+                tag_table
+                .outerjoin(
+                    preference_table,
+                    tag_table.c.preference_id == preference_table.c.preference_id
+                )
+                .outerjoin(
+                    routine_table,
+                    tag_table.c.routine_id == routine_table.c.routine_id
+                )
+            )
+        )
+
+    @staticmethod
+    def _build_resolution(row) -> dict:
+        if row.led_color is None:
+            raise PreferenceIDNotFoundException(preference_id=row.preference_id)
+        window = ()
+        if row.routine_id:
+            if row.start_time is None:
+                raise RoutineNotFoundException(routine_id=row.routine_id)
+            window = routine_schedule.window(
+                row.routine_id, row.weekday, row.start_time, row.end_time)
+        return {
+            "led_color": row.led_color,
+            "music_id": row.music_id,
+            "routine_id": row.routine_id,
+            "window": window
+        }
+
+    @classmethod
+    async def get_tag_history(
+        cls,
+        id: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = tag_config.HISTORY_PAGE_SIZE,
+        cursor: str | None = None
+    ) -> tuple[list[dict], str | None]:
+        """Retrieve a page of the history of a tag by its ID.
+
+        Raw rows are merged with the daily rollups left by the history
+        compaction. A rollup stands for every tap of a tag on one day: its
+        `timestamp` and `last_timestamp` are the first and last tap, its
+        `tap_count` the number of taps and its `history_id` is 0. Raw rows
+        have a `tap_count` of 1. A rollup matches `since` and `until` when
+        any of its taps could fall in the range. Timestamps are stored in
+        naive local time, so aware `since` and `until` are converted first.
+
+        Rows are ordered by timestamp and paginated with a keyset cursor
+        over the (tag_id, timestamp, history_id) index, so every page costs
+        the same no matter how long the history is.
 
         Args:
             id (str): The ID of the tag whose history to retrieve.
+            since (datetime, optional): Only rows at or after this time.
+            until (datetime, optional): Only rows at or before this time.
+            limit (int): The maximum number of rows returned.
+            cursor (str, optional): The cursor returned with the previous page.
 
         Raises:
             TagNotFoundException: If the tag with the specified ID does not exist.
+            InvalidHistoryCursorException: If the cursor is malformed.
 
         Returns:
-            list: The history of the tag.
+            tuple: The rows of the page and the cursor of the next page, or
+            None if this is the last page.
         """
-        await cls.get_tag_by_id(id)  # Ensure tag exists
-        query = history_table.select().where(history_table.c.tag_id == id)
-        return await Database.fetch_all(query)
+        raw = select(
+            history_table.c.history_id,
+            history_table.c.tag_id,
+            history_table.c.timestamp,
+            history_table.c.timestamp.label("last_timestamp"),
+            literal(1).label("tap_count")
+        ).where(history_table.c.tag_id == id)
+        daily = select(
+            literal(0).label("history_id"),
+            history_daily_table.c.tag_id,
+            history_daily_table.c.first_tap.label("timestamp"),
+            history_daily_table.c.last_tap.label("last_timestamp"),
+            history_daily_table.c.tap_count
+        ).where(history_daily_table.c.tag_id == id)
+        if since:
+            start = TagUtils.local_timestamp(since).isoformat()
+            raw = raw.where(history_table.c.timestamp >= start)
+            daily = daily.where(history_daily_table.c.last_tap >= start)
+        if until:
+            end = TagUtils.local_timestamp(until).isoformat()
+            raw = raw.where(history_table.c.timestamp <= end)
+            daily = daily.where(history_daily_table.c.first_tap <= end)
+        if cursor:
+            timestamp, history_id = TagUtils.decode_cursor(cursor)
+            raw = raw.where(
+                tuple_(history_table.c.timestamp, history_table.c.history_id)
+                > tuple_(timestamp, history_id)
+            )
+            # Rollups have a history_id of 0, lower than any raw row.
+            daily = daily.where(history_daily_table.c.first_tap > timestamp)
+        # Each side reads at most one page from its index before merging.
+        merged = union_all(*(
+            select(side.order_by("timestamp", "history_id").limit(limit + 1).subquery())
+            for side in (daily, raw)
+        )).subquery()
+        query = select(merged).order_by(
+            merged.c.timestamp,
+            merged.c.history_id
+        ).limit(limit + 1)
+        rows = await Database.fetch_all(query)
+        if not rows and not cursor:
+            await cls.get_tag_by_id(id)  # Ensure tag exists
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, TagUtils.encode_cursor(rows[-1].timestamp, rows[-1].history_id)
 
     @classmethod
     async def update_tag_by_id(cls, data: TagRequest) -> None:
@@ -106,10 +649,12 @@ class TagService:
             routine_id=data.routine_id,
             last_use=timestamp
         )
-        history_query = history_table.insert().values(
-            tag_id=data.tag_id, timestamp=timestamp
-        )
-        await Database.execute_many([tag_query, history_query])
+        await Database.execute(tag_query)
+        table_revisions.bump(tag_table.name)
+        tag_cache.invalidate(data.tag_id)
+        recent_taps.forget(data.tag_id)
+        cls.publish_tag(data.tag_id, data.preference_id, None, None, data.routine_id)
+        await history_writer.record(data.tag_id, timestamp)
 
     @classmethod
     async def delete_tag(cls, tag_id: str) -> None:
@@ -123,20 +668,40 @@ class TagService:
         """
         query = tag_table.delete().where(tag_table.c.tag_id == tag_id)
         await Database.execute(query)
+        table_revisions.bump(tag_table.name)
+        tag_cache.invalidate(tag_id)
+        recent_taps.forget(tag_id)
+        event_broker.publish(EventTopic.TAG, {"tag_id": tag_id, "deleted": True})
 
     @classmethod
-    async def tag_exists(cls, tag_id: str) -> bool:
-        """Check if a tag exists by its ID.
+    def publish_tag(
+        cls,
+        tag_id: str,
+        preference_id: int,
+        music_id: int | None,
+        led_color: int | None,
+        routine_id: int | None
+    ) -> None:
+        """Notify subscribers of the tag topic of a tag change.
+
+        Writes that only know the preference ID, like POST and PUT /tag,
+        send no music ID and LED color rather than reading the preference
+        back; subscribers get them from the preference topic.
 
         Args:
-            tag_id (str): The ID of the tag to check.
-        
-        Returns:
-            bool: True if the tag exists, False otherwise.
+            tag_id (str): The ID of the tag.
+            preference_id (int): The preference ID of the tag.
+            music_id (int, optional): The music ID of the preference.
+            led_color (int, optional): The LED color of the preference.
+            routine_id (int, optional): The routine ID of the tag.
         """
-        query = tag_table.select().where(tag_table.c.tag_id == tag_id)
-        tag = await Database.fetch_one(query)
-        return tag is not None
+        event_broker.publish(EventTopic.TAG, {
+            "tag_id": tag_id,
+            "preference_id": preference_id,
+            "music_id": music_id,
+            "led_color": led_color,
+            "routine_id": routine_id
+        })
 
 
 tag_service = TagService()
@@ -1,6 +1,43 @@
 """Utility functions for tag management."""
 
+import base64
+import json
+import struct
 from datetime import datetime
+from pydantic import ValidationError
+from pydantic_settings import BaseSettings
+
+from src.app.cache import LRUCache, SingleFlight
+from src.routing.tags.exceptions import (
+    InvalidBulkPayloadException,
+    InvalidHistoryCursorException,
+    TagRecordOutOfRangeException
+)
+
+TAG_RECORD_FORMAT = "<BHIIB"
+TAG_RECORD_VERSION = 1
+TAG_RECORD_MEDIA_TYPE = "application/octet-stream"
+TAG_RECORD_FLAG_ROUTINE = 0x01
+
+
+class TagConfig(BaseSettings):
+    """Class related to tag configs."""
+
+    TAG_CACHE_SIZE: int = 1024
+    TAG_CACHE_TTL: float = 30.0
+    TAG_RESOLVE_TIMEOUT: float = 5.0
+    TAP_DEDUP_WINDOW: float = 10.0
+    TAP_DEDUP_MAX_SIZE: int = 10000
+    TAP_BATCH_MAX_SIZE: int = 1000
+    HISTORY_QUEUE_SIZE: int = 10000
+    HISTORY_BATCH_SIZE: int = 500
+    HISTORY_FLUSH_INTERVAL: float = 1.0
+    BULK_CHUNK_SIZE: int = 500
+    HISTORY_PAGE_SIZE: int = 100
+    HISTORY_MAX_PAGE_SIZE: int = 1000
+    HISTORY_RETENTION_DAYS: int = 30
+    HISTORY_COMPACTION_INTERVAL: float = 3600.0
+    HISTORY_COMPACTION_BATCH_SIZE: int = 1000
 
 
 class TagUtils:
@@ -14,3 +51,221 @@ class TagUtils:
             str: The current timestamp.
         """
         return datetime.now().isoformat()
+
+    @staticmethod
+    def local_timestamp(timestamp: datetime) -> datetime:
+        """Convert a timestamp to the naive local time history is stored in.
+
+        Args:
+            timestamp (datetime): The timestamp, aware or naive local.
+
+        Returns:
+            datetime: The naive local timestamp.
+        """
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        return timestamp
+
+    @staticmethod
+    def device_timestamp(timestamp: datetime) -> datetime:
+        """Convert a device timestamp to the server local time.
+
+        Timestamps ahead of the server clock are clamped to now.
+
+        Args:
+            timestamp (datetime): The timestamp sent by the device.
+
+        Returns:
+            datetime: The naive local timestamp.
+        """
+        return min(TagUtils.local_timestamp(timestamp), datetime.now())
+
+    @staticmethod
+    def deduplicate_taps(taps: list, window: float) -> list[dict]:
+        """Drop the taps repeating the previous kept tap of their device.
+
+        Args:
+            taps (list[TapEvent]): The taps to deduplicate.
+            window (float): The minimum time between two kept taps of the
+            same tag and device, in seconds.
+
+        Returns:
+            list[dict]: The tag_id and timestamp of each kept tap.
+        """
+        rows = []
+        last_kept: dict[tuple, datetime] = {}
+        timestamps = [TagUtils.device_timestamp(tap.timestamp) for tap in taps]
+        for timestamp, tap in sorted(zip(timestamps, taps), key=lambda pair: pair[0]):
+            key = (tap.tag_id, tap.device_id)
+            previous = last_kept.get(key)
+            if previous is not None and (timestamp - previous).total_seconds() < window:
+                continue
+            last_kept[key] = timestamp
+            rows.append({"tag_id": tap.tag_id, "timestamp": timestamp.isoformat()})
+        return rows
+
+    @staticmethod
+    def pack_resolution(tag_id: str, resolution: dict) -> bytes:
+        """Pack a tag resolution into the fixed-layout binary record.
+
+        The record is little-endian `TAG_RECORD_FORMAT`: version (u8),
+        led_color (u16), music_id (u32), routine_id (u32) and flags (u8).
+        A missing routine is sent as 0 with `TAG_RECORD_FLAG_ROUTINE` unset.
+
+        Args:
+            tag_id (str): The ID of the tag.
+            resolution (dict): The led color, music ID and routine ID of the tag.
+
+        Raises:
+            TagRecordOutOfRangeException: If a value doesn't fit its field,
+            which only rows written before the request bounds can hold.
+
+        Returns:
+            bytes: The packed record.
+        """
+        routine_id = resolution["routine_id"]
+        try:
+            return struct.pack(
+                TAG_RECORD_FORMAT,
+                TAG_RECORD_VERSION,
+                resolution["led_color"],
+                resolution["music_id"],
+                routine_id or 0,
+                TAG_RECORD_FLAG_ROUTINE if routine_id else 0
+            )
+        except struct.error:
+            raise TagRecordOutOfRangeException(id=tag_id)
+
+    @staticmethod
+    def record_etag(record: bytes) -> str:
+        """Build the ETag of a binary tag response from its packed record.
+
+        The record holds everything the response carries, so its hex form
+        identifies the response without hashing.
+
+        Args:
+            record (bytes): The packed record of the response.
+
+        Returns:
+            str: The quoted ETag.
+        """
+        return f'"{record.hex()}"'
+
+    @staticmethod
+    def resolution_etag(resolution: dict) -> str:
+        """Build the ETag of a JSON tag response from its fields.
+
+        Args:
+            resolution (dict): The led color, music ID and routine ID of the tag.
+
+        Returns:
+            str: The quoted ETag, distinct from every record ETag.
+        """
+        return '"{led_color}-{music_id}-{routine_id}-json"'.format(**resolution)
+
+    @staticmethod
+    def wants_binary(format: str | None, accept: str) -> bool:
+        """Check whether a request negotiated the binary tag record.
+
+        Args:
+            format (str, optional): The `format` query parameter.
+            accept (str): The Accept header of the request.
+
+        Returns:
+            bool: True if the binary record was requested.
+        """
+        if format is not None:
+            return format == "bin"
+        return TAG_RECORD_MEDIA_TYPE in accept
+
+    @staticmethod
+    def encode_cursor(timestamp: str, history_id: int) -> str:
+        """Encode the position of a history row as an opaque cursor.
+
+        Args:
+            timestamp (str): The timestamp of the row.
+            history_id (int): The ID of the row.
+
+        Returns:
+            str: The cursor.
+        """
+        payload = json.dumps([timestamp, history_id]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[str, int]:
+        """Decode a cursor built by `encode_cursor`.
+
+        Args:
+            cursor (str): The cursor.
+
+        Returns:
+            tuple[str, int]: The timestamp and ID of the row.
+
+        Raises:
+            InvalidHistoryCursorException: If the cursor is malformed.
+        """
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            timestamp, history_id = json.loads(payload)
+            if not isinstance(timestamp, str) or not isinstance(history_id, int):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise InvalidHistoryCursorException(cursor=cursor)
+        return timestamp, history_id
+
+    @staticmethod
+    def decode_bulk_payload(body: bytes, content_type: str) -> list:
+        """Decode a bulk request body sent as a JSON array or as NDJSON.
+
+        Args:
+            body (bytes): The raw request body.
+            content_type (str): The content type of the request.
+
+        Returns:
+            list: The decoded items.
+
+        Raises:
+            InvalidBulkPayloadException: If the body can't be decoded.
+        """
+        if "ndjson" in content_type:
+            items = []
+            for number, line in enumerate(body.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    raise InvalidBulkPayloadException(
+                        reason=f"line {number} is not valid JSON")
+            return items
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise InvalidBulkPayloadException(reason="body is not valid JSON")
+        if not isinstance(items, list):
+            raise InvalidBulkPayloadException(reason="expected a JSON array")
+        return items
+
+    @staticmethod
+    def format_validation_error(error: ValidationError) -> str:
+        """Format a validation error as a short message.
+
+        Args:
+            error (ValidationError): The validation error.
+
+        Returns:
+            str: The location and message of each error.
+        """
+        return "; ".join(
+            ".".join(str(part) for part in detail["loc"]) + ": " + detail["msg"]
+            for detail in error.errors()
+        )
+
+
+tag_config = TagConfig()
+tag_cache = LRUCache(
+    max_size=tag_config.TAG_CACHE_SIZE,
+    ttl=tag_config.TAG_CACHE_TTL
+)
+tag_resolutions = SingleFlight(timeout=tag_config.TAG_RESOLVE_TIMEOUT)
@@ -1,4 +1,6 @@
 """Conftest module for pytest configuration and fixtures."""
+import os
+
 import pytest
 
 from httpx import ASGITransport, AsyncClient
@@ -24,3 +26,33 @@ async def client():
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url=app_url) as client:
         yield client
+
+
+@pytest.fixture
+async def database(tmp_path, monkeypatch):
+    """Fixture to point the database at a temporary SQLite file.
+
+    Set TEST_DATABASE_URL to run the tests against another server instead,
+    e.g. a local MySQL or MariaDB. Its tables are dropped around each test.
+    """
+    from src.database import database, tables  # noqa: F401
+    from src.routing.analytics.utils import analytics_cache
+    from src.routing.tags.dedup import recent_taps
+    from src.routing.tags.utils import tag_cache
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    engine = database.build_engine(url or f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    if url:
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.drop_all)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "reader_engine", None)
+    await database.Database.init_models()
+    tag_cache.clear()
+    analytics_cache.clear()
+    recent_taps.clear()
+    yield engine
+    if url:
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.drop_all)
+    await engine.dispose()
@@ -0,0 +1,81 @@
+"""Tests for analytics endpoints."""
+
+import pytest
+from httpx import AsyncClient
+
+from src.database.database import Database
+from src.database.tables import history_daily_table, history_table, tag_table
+from src.routing.analytics.exceptions import InvalidDateRangeException
+from src.routing.tags.exceptions import TagNotFoundException
+
+
+@pytest.fixture
+async def taps(database):
+    """Fixture to seed raw history and a daily rollup for two tags."""
+
+    await Database.execute_many([
+        tag_table.insert().values([
+            {"tag_id": "tag-a", "name": "A", "preference_id": 1},
+            {"tag_id": "tag-b", "name": "B", "preference_id": 1},
+        ]),
+        history_table.insert().values([
+            {"tag_id": "tag-a", "timestamp": "2024-03-04T08:15:00"},  # Monday
+            {"tag_id": "tag-a", "timestamp": "2024-03-04T08:45:00"},
+            {"tag_id": "tag-a", "timestamp": "2024-03-10T21:00:00"},  # Sunday
+            {"tag_id": "tag-b", "timestamp": "2024-03-05T08:00:00"},  # Tuesday
+        ]),
+        history_daily_table.insert().values(
+            tag_id="tag-b", day="2024-01-02", tap_count=5,
+            first_tap="2024-01-02T07:00:00", last_tap="2024-01-02T19:00:00"
+        ),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_top_tags_merges_rollups(client: AsyncClient, taps):
+    """Test the top tags count raw taps and daily rollups."""
+
+    response = await client.get("/analytics/top-tags")
+    ranged = await client.get("/analytics/top-tags", params={"since": "2024-03-01"})
+
+    assert response.json() == [
+        {"tag_id": "tag-b", "name": "B", "taps": 6},
+        {"tag_id": "tag-a", "name": "A", "taps": 3},
+    ]
+    assert [row["tag_id"] for row in ranged.json()] == ["tag-a", "tag-b"]
+
+
+@pytest.mark.asyncio
+async def test_heatmap_and_weekdays(client: AsyncClient, taps):
+    """Test taps are grouped per weekday and hour of day."""
+
+    heatmap = await client.get("/analytics/heatmap")
+    weekdays = await client.get("/analytics/weekdays", params={"tag_id": "tag-b"})
+
+    assert heatmap.json() == [
+        {"weekday": 1, "hour": 8, "taps": 2},
+        {"weekday": 2, "hour": 8, "taps": 1},
+        {"weekday": 7, "hour": 21, "taps": 1},
+    ]
+    assert [row["taps"] for row in weekdays.json()] == [0, 6, 0, 0, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_tag_activity_is_cached(client: AsyncClient, taps):
+    """Test the daily activity of a tag and the result cache."""
+
+    params = {"tag_id": "tag-a", "until": "2024-03-05"}
+    first = await client.get("/analytics/activity", params=params)
+    await Database.execute(history_table.insert().values(
+        tag_id="tag-a", timestamp="2024-03-05T10:00:00"))
+    second = await client.get("/analytics/activity", params=params)
+
+    assert first.json() == [{"day": "2024-03-04", "taps": 2}]
+    assert second.json() == first.json()
+    assert (await client.get("/analytics/cache")).json()["hits"] >= 1
+
+    missing = await client.get("/analytics/activity", params={"tag_id": "missing"})
+    assert missing.status_code == TagNotFoundException.STATUS_CODE
+    invalid = await client.get(
+        "/analytics/top-tags", params={"since": "2024-03-05", "until": "2024-03-01"})
+    assert invalid.status_code == InvalidDateRangeException.STATUS_CODE
@@ -0,0 +1,120 @@
+"""Tests for the in-process caches."""
+
+import asyncio
+
+import pytest
+
+from src.app import cache
+from src.app.cache import LRUCache, SingleFlight
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test the cache keeps at most max_size entries."""
+
+    lru = LRUCache(max_size=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries(monkeypatch):
+    """Test entries are dropped once their TTL elapses."""
+
+    now = [100.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+    lru = LRUCache(max_size=2, ttl=5)
+    lru.set("a", 1)
+    assert lru.get("a") == 1
+
+    now[0] += 6
+    assert lru.get("a") is None
+    assert lru.stats()["hits"] == 1
+    assert lru.stats()["misses"] == 1
+    assert len(lru) == 0
+
+
+def test_lru_cache_discards_stale_loads():
+    """Test a value loaded before an invalidation is not stored."""
+
+    lru = LRUCache(max_size=2, ttl=60)
+    generation = lru.generation
+    lru.invalidate("a")
+    lru.set("a", 1, generation=generation)
+
+    assert lru.get("a") is None
+
+
+def test_lru_cache_invalidate_where():
+    """Test entries matching a predicate are removed."""
+
+    lru = LRUCache(max_size=4, ttl=60)
+    lru.set("a", {"routine_id": 1})
+    lru.set("b", {"routine_id": 2})
+    lru.invalidate_where(lambda _, value: value["routine_id"] == 1)
+
+    assert lru.get("a") is None
+    assert lru.get("b") == {"routine_id": 2}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_load():
+    """Test concurrent callers of a key await the same load."""
+
+    flight = SingleFlight(timeout=1)
+    release = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    waiters = [asyncio.create_task(flight.do("key", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"loads": 1, "coalesced": 4, "timeouts": 0, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    """Test every caller receives the exception of the shared load."""
+
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", load) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_timeout_keeps_load_running():
+    """Test a caller timing out does not cancel the load of the others."""
+
+    flight = SingleFlight(timeout=0.01)
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    with pytest.raises(TimeoutError):
+        await flight.do("key", load)
+    flight.timeout = None
+
+    assert await flight.do("key", load) == "value"
+    assert flight.stats()["loads"] == 1
+    assert flight.stats()["timeouts"] == 1
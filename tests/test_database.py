@@ -0,0 +1,108 @@
+"""Tests for the database module."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+
+from src.database import database as db
+from src.database.database import Base, Database
+from src.database.tables import (
+    history_daily_table,
+    music_table,
+    preference_table,
+    tag_table
+)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_are_applied(database):
+    """Test new connections use the SQLite performance profile."""
+    if database.dialect.name != "sqlite":
+        pytest.skip("SQLite only")
+
+    journal_mode = await Database.fetch_one(text("PRAGMA journal_mode"))
+    synchronous = await Database.fetch_one(text("PRAGMA synchronous"))
+    temp_store = await Database.fetch_one(text("PRAGMA temp_store"))
+
+    assert journal_mode["journal_mode"] == "wal"
+    assert synchronous["synchronous"] == 1
+    assert temp_store["temp_store"] == 2
+
+
+@pytest.fixture
+async def reader(database, tmp_path, monkeypatch):
+    """Fixture adding a reader engine on a second, empty SQLite file."""
+    engine = db.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'reader.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(db, "reader_engine", engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_reader_and_writes_to_writer(reader):
+    """Test fetches use the reader engine while executes use the writer."""
+
+    await Database.execute(music_table.insert().values(name="Writer", content="C4:4"))
+
+    assert await Database.fetch_all(music_table.select()) == []
+
+    with Database.read_your_writes():
+        rows = await Database.fetch_all(music_table.select())
+    assert [row["name"] for row in rows] == ["Writer"]
+
+    assert await Database.fetch_one(music_table.select()) is None
+
+
+def test_upsert_compiles_on_duplicate_key_update_for_mysql(monkeypatch):
+    """Test upserts use ON DUPLICATE KEY UPDATE on MySQL."""
+    monkeypatch.setattr(db.engine, "dialect", mysql.dialect())
+
+    statement = Database.upsert(
+        tag_table,
+        values={"tag_id": "tag", "name": "Tag", "first_use": "x", "last_use": "x"},
+        index_elements=["tag_id"],
+        update=["last_use"]
+    )
+    ignore = Database.upsert(tag_table, index_elements=["tag_id"], update=[])
+
+    compiled = str(statement.compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE last_use = VALUES(last_use)" in compiled
+    assert "ON DUPLICATE KEY UPDATE tag_id = tag.tag_id" in str(
+        ignore.compile(dialect=mysql.dialect()))
+
+
+def test_tables_compile_for_mysql():
+    """Test every table has the column lengths MySQL requires."""
+
+    for table in Base.metadata.sorted_tables:
+        CreateTable(table).compile(dialect=mysql.dialect())
+
+    ddl = str(CreateTable(history_daily_table).compile(dialect=mysql.dialect()))
+    assert "day VARCHAR(10) NOT NULL" in ddl
+
+
+@pytest.mark.asyncio
+async def test_init_models_merges_duplicate_preferences(database):
+    """Test an old database with duplicated preferences still gets the unique index."""
+
+    unique, = [index for index in preference_table.indexes if index.unique]
+    async with database.begin() as conn:
+        await conn.run_sync(unique.drop)
+    await Database.execute_many([
+        preference_table.insert().values([
+            {"preference_id": 1, "music_id": 1, "led_color": 2},
+            {"preference_id": 2, "music_id": 1, "led_color": 2},
+            {"preference_id": 3, "music_id": 4, "led_color": 5},
+        ]),
+        tag_table.insert().values(tag_id="old-tag", name="Tag", preference_id=2),
+    ])
+
+    await Database.init_models()
+
+    preferences = await Database.fetch_all(preference_table.select())
+    tag = await Database.fetch_one(tag_table.select())
+    assert [row["preference_id"] for row in preferences] == [1, 3]
+    assert tag["preference_id"] == 1
@@ -0,0 +1,339 @@
+"""Tests for the ESP32 connection module, run on CPython.
+
+`network` and `urequests` only exist on MicroPython, so they are replaced by
+stubs: a WLAN whose connection state is set by the test, and a urequests
+built on urllib that talks to a local HTTP server standing in for the API.
+"""
+
+import importlib
+import json
+import struct
+import sys
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ESP_DIR = Path(__file__).resolve().parents[1] / "esp"
+
+
+class StubWLAN:
+    """WLAN interface whose connection is controlled by the test."""
+
+    def __init__(self, interface):
+        self.connected = False
+        self.connect_calls = 0
+
+    def active(self, state=None):
+        return True
+
+    def isconnected(self):
+        return self.connected
+
+    def connect(self, ssid, password):
+        self.connect_calls += 1
+
+    def ifconfig(self):
+        return ("127.0.0.1", "255.0.0.0", "127.0.0.1", "127.0.0.1")
+
+
+class StubResponse:
+    """Response with the attributes urequests exposes."""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict(headers.items())
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+def stub_request(method, url, json_body=None, headers=None):
+    data = None
+    headers = dict(headers or {})
+    if json_body is not None:
+        data = json.dumps(json_body).encode()
+        headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return StubResponse(response.status, response.read(), response.headers)
+    except urllib.error.HTTPError as error:
+        return StubResponse(error.code, error.read(), error.headers)
+
+
+class StandInAPI(BaseHTTPRequestHandler):
+    """Local stand-in for GET /tag, GET /music/stream and POST /tag/taps."""
+
+    status = 200
+    led_color = 3
+    stream = struct.pack("<HH", 440, 250)
+    batches: list = []
+    lookups: list = []
+    downloads: list = []
+
+    def do_GET(self):
+        if self.path.startswith("/music/stream"):
+            body = self.stream
+            etag = f'"{body.hex()}"'
+            StandInAPI.downloads.append(self.headers.get("If-None-Match"))
+        else:
+            body = struct.pack("<BHIIB", 1, self.led_color, 7, 0, 0)
+            etag = f'"{body.hex()}"'
+            StandInAPI.lookups.append(self.headers.get("If-None-Match"))
+        if self.status != 200:
+            self._reply(self.status, b"unavailable")
+        elif self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", etag)
+        else:
+            self._reply(200, body, etag)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        batch = json.loads(self.rfile.read(length))
+        if self.status == 200:
+            StandInAPI.batches.append(batch)
+        self._reply(self.status, b"{}")
+
+    def _reply(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def conexao(monkeypatch):
+    """Fixture importing esp/conexao.py with the MicroPython stubs."""
+    network = types.ModuleType("network")
+    network.STA_IF = 0
+    network.WLAN = StubWLAN
+    urequests = types.ModuleType("urequests")
+    urequests.get = lambda url, headers=None: stub_request("GET", url, headers=headers)
+    urequests.post = lambda url, json=None: stub_request("POST", url, json)
+    monkeypatch.setitem(sys.modules, "network", network)
+    monkeypatch.setitem(sys.modules, "urequests", urequests)
+    monkeypatch.syspath_prepend(str(ESP_DIR))
+    monkeypatch.delitem(sys.modules, "conexao", raising=False)
+    module = importlib.import_module("conexao")
+    yield module
+    sys.modules.pop("conexao", None)
+
+
+@pytest.fixture
+def api():
+    """Fixture serving the stand-in API on a free local port."""
+    StandInAPI.status = 200
+    StandInAPI.led_color = 3
+    StandInAPI.stream = struct.pack("<HH", 440, 250)
+    StandInAPI.batches = []
+    StandInAPI.lookups = []
+    StandInAPI.downloads = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/tag"
+    server.shutdown()
+    server.server_close()
+
+
+def connector(conexao, tmp_path, url="http://127.0.0.1:9/tag", **options):
+    """Build a connector keeping its queue and caches under tmp_path."""
+    return conexao.ConectorInternet(
+        "ssid", "senha", url,
+        fila=conexao.FilaToques(str(tmp_path / "toques.bin")),
+        cache=conexao.CacheTags(str(tmp_path / "cache_tags.bin")),
+        musicas=conexao.CacheMusicas(str(tmp_path / "musicas")),
+        **options
+    )
+
+
+def test_fila_toques_persists_and_overwrites_oldest(conexao, tmp_path):
+    """Test the ring buffer survives a reboot and drops the oldest when full."""
+
+    path = str(tmp_path / "toques.bin")
+    fila = conexao.FilaToques(path, capacidade=3)
+    for index, uid in enumerate(["04A1B2C3", "04A1B2C4", "04A1B2C3D4E5F6", "04A1B2C5"]):
+        fila.adicionar(uid, timestamp=1767225600 + index)
+
+    reloaded = conexao.FilaToques(path, capacidade=3)
+
+    assert fila.descartados == 1
+    assert reloaded.pendentes(10) == [
+        ("04A1B2C4", 1767225601),
+        ("04A1B2C3D4E5F6", 1767225602),
+        ("04A1B2C5", 1767225603),
+    ]
+    assert Path(path).stat().st_size == (
+        conexao.TAMANHO_CABECALHO + 3 * conexao.TAMANHO_TOQUE)
+
+    reloaded.remover(2)
+    assert conexao.FilaToques(path, capacidade=3).pendentes(10) == [
+        ("04A1B2C5", 1767225603)]
+
+
+def test_offline_tap_is_queued_without_waiting(conexao, tmp_path):
+    """Test a tap made without Wi-Fi is buffered and the loop is not blocked."""
+
+    internet = connector(conexao, tmp_path, device_id="esp-1")
+    fila = internet.fila
+
+    start = time.perf_counter()
+    assert internet.enviar_leitura("04A1B2C3") is None
+    assert internet.enviar_leitura("04A1B2C4") is None
+
+    assert time.perf_counter() - start < 0.5
+    assert len(fila) == 2
+    assert internet.wlan.connect_calls == 1  # Rate limited reconnect
+
+
+def test_sincronizar_flushes_backlog_in_batches(conexao, api, tmp_path):
+    """Test buffered taps are posted in batches once the API is reachable."""
+
+    internet = connector(conexao, tmp_path, api, device_id="esp-1", tamanho_lote=2)
+    internet.wlan.connected = True
+    fila = internet.fila
+    for index in range(5):
+        fila.adicionar("04A1B2C3", timestamp=1767225600 + index)
+
+    StandInAPI.status = 503
+    assert internet.sincronizar() == 0
+    assert len(fila) == 5
+
+    StandInAPI.status = 200
+    assert internet.sincronizar() == 5
+
+    assert len(fila) == 0
+    assert [len(batch) for batch in StandInAPI.batches] == [2, 2, 1]
+    assert StandInAPI.batches[0][0] == {
+        "device_id": "esp-1",
+        "tag_id": "04A1B2C3",
+        "timestamp": "2026-01-01T00:00:00Z",
+    }
+
+
+def test_server_error_buffers_tap(conexao, api, tmp_path):
+    """Test a tap the API failed to answer is kept for the next flush."""
+
+    internet = connector(conexao, tmp_path, api)
+    internet.wlan.connected = True
+
+    assert internet.enviar_leitura("04A1B2C3") == {
+        "led_color": 3, "music_id": 7, "routine_id": None}
+    StandInAPI.status = 503
+    assert internet.enviar_leitura("04A1B2C4") is None
+
+    assert [uid for uid, _ in internet.fila.pendentes(10)] == ["04A1B2C4"]
+
+
+def test_repeat_tap_is_answered_from_cache(conexao, api, tmp_path, monkeypatch):
+    """Test repeat taps skip the API until the entry is revalidated."""
+
+    now = [1767225600]
+    monkeypatch.setattr(conexao.time, "time", lambda: now[0])
+    internet = connector(conexao, tmp_path, api)
+    internet.wlan.connected = True
+    resposta = {"led_color": 3, "music_id": 7, "routine_id": None}
+
+    assert internet.enviar_leitura("04A1B2C3") == resposta
+    assert internet.enviar_leitura("04A1B2C3") == resposta
+    assert len(StandInAPI.lookups) == 1
+    assert internet.revalidar() is False  # Still fresh
+
+    now[0] += internet.cache.ttl
+    assert internet.enviar_leitura("04A1B2C3") == resposta
+    assert len(StandInAPI.lookups) == 1  # Served before revalidating
+    assert internet.revalidar() is True
+    assert StandInAPI.lookups[-1] == f'"{struct.pack("<BHIIB", 1, 3, 7, 0, 0).hex()}"'
+
+    StandInAPI.led_color = 5
+    now[0] += internet.cache.ttl
+    internet.enviar_leitura("04A1B2C3")
+    internet.revalidar()
+    assert internet.enviar_leitura("04A1B2C3")["led_color"] == 5
+
+
+def test_cache_survives_reboot_and_evicts_least_recent(conexao, tmp_path):
+    """Test cached responses are reloaded stale and bounded by capacity."""
+
+    path = str(tmp_path / "cache_tags.bin")
+    cache = conexao.CacheTags(path, capacidade=2)
+    rotina = {"led_color": 1, "music_id": 2, "routine_id": 9}
+    cache.guardar("04A1B2C3", rotina, '"etag-1"')
+    cache.guardar("04A1B2C4", {"led_color": 4, "music_id": 5, "routine_id": None}, None)
+    cache.obter("04A1B2C3")
+    cache.guardar("04A1B2C5", {"led_color": 6, "music_id": 7, "routine_id": None}, None)
+
+    reloaded = conexao.CacheTags(path, capacidade=2)
+
+    assert sorted(reloaded.entradas) == ["04A1B2C3", "04A1B2C5"]
+    assert reloaded.obter("04A1B2C3") == rotina
+    assert reloaded.etag("04A1B2C3") == '"etag-1"'
+    assert reloaded.proximo_vencido() == "04A1B2C3"
+    assert Path(path).stat().st_size == (
+        conexao.TAMANHO_CABECALHO_CACHE + 2 * conexao.TAMANHO_ENTRADA)
+
+
+def test_music_cache_survives_reboot_and_evicts_least_recent(conexao, tmp_path):
+    """Test cached streams are reloaded from flash and bounded by capacity."""
+
+    path = tmp_path / "musicas"
+    cache = conexao.CacheMusicas(str(path), capacidade=2)
+    cache.guardar(1, b"\x01\x02", '"etag-1"')
+    cache.guardar(2, b"\x03\x04", None)
+    cache.obter(1)
+    cache.guardar(3, b"\x05\x06", None)
+
+    reloaded = conexao.CacheMusicas(str(path), capacidade=2)
+
+    assert sorted(reloaded.entradas) == [1, 3]
+    assert reloaded.obter(1) == b"\x01\x02"
+    assert reloaded.etag(1) == '"etag-1"'
+    assert sorted(child.name for child in path.iterdir()) == ["1.bin", "3.bin"]
+
+
+def test_music_is_played_from_cache_and_revalidated(conexao, api, tmp_path, monkeypatch):
+    """Test a downloaded stream plays offline and is revalidated by ETag."""
+
+    now = [1767225600]
+    monkeypatch.setattr(conexao.time, "time", lambda: now[0])
+    internet = connector(conexao, tmp_path, api)
+    internet.wlan.connected = True
+    stream = StandInAPI.stream
+
+    assert internet.baixar_musica(7) == stream
+    internet.wlan.connected = False
+    assert internet.baixar_musica(7) == stream
+    assert StandInAPI.downloads == [None]
+
+    internet.wlan.connected = True
+    now[0] += internet.musicas.ttl
+    assert internet.baixar_musica(7) == stream  # Served before revalidating
+    assert internet.revalidar() is True
+    assert StandInAPI.downloads == [None, f'"{stream.hex()}"']
+    assert internet.revalidar() is False
+
+    StandInAPI.stream = struct.pack("<HH", 523, 125)
+    internet.musicas = conexao.CacheMusicas(str(tmp_path / "musicas"))
+    assert internet.baixar_musica(7) == stream  # Reloaded stale after a reboot
+    assert internet.revalidar() is True
+    assert internet.baixar_musica(7) == StandInAPI.stream
+    assert len(StandInAPI.downloads) == 3
@@ -0,0 +1,122 @@
+"""Tests for the configuration change events."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.database.database import Database
+from src.database.tables import preference_table
+from src.routing.events.broker import RESYNC, EventBroker, event_broker
+from src.routing.events.schemas import EventTopic
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_by_topic():
+    """Test events only reach the subscribers of their topic."""
+
+    broker = EventBroker(queue_size=10, replay_size=10, heartbeat_interval=60)
+    tags = broker.subscribe({EventTopic.TAG}, device_id="reader-1")
+    routines = broker.subscribe({EventTopic.ROUTINE})
+
+    broker.publish(EventTopic.TAG, {"tag_id": "abc"})
+
+    assert tags.queue.get_nowait() == (1, "tag", {"tag_id": "abc"})
+    assert routines.queue.empty()
+    assert [entry["device_id"] for entry in broker.subscribers()] == ["reader-1", None]
+
+
+@pytest.mark.asyncio
+async def test_broker_resyncs_slow_subscribers_and_replays():
+    """Test a full queue becomes a resync and reconnects replay missed events."""
+
+    broker = EventBroker(queue_size=2, replay_size=3, heartbeat_interval=60)
+    slow = broker.subscribe({EventTopic.TAG})
+    for index in range(3):
+        broker.publish(EventTopic.TAG, {"tag_id": str(index)})
+
+    assert slow.queue.get_nowait() == (3, RESYNC, {})
+    assert slow.dropped == 2
+
+    stream = broker.stream(broker.subscribe({EventTopic.TAG}), last_event_id=1)
+    assert (await anext(stream)).startswith(b"retry:")
+    assert await anext(stream) == b'id: 2\nevent: tag\ndata: {"tag_id":"1"}\n\n'
+    assert await anext(stream) == b'id: 3\nevent: tag\ndata: {"tag_id":"2"}\n\n'
+    for index in range(3, 6):
+        broker.publish(EventTopic.TAG, {"tag_id": str(index)})
+    assert broker.missed(slow, 1) == [(6, RESYNC, {})]
+    await stream.aclose()
+    assert len(broker.subscribers()) == 1
+
+
+@pytest.mark.asyncio
+async def test_broker_resyncs_event_ids_from_before_a_restart():
+    """Test an ID newer than any published event resyncs instead of muting."""
+
+    broker = EventBroker(queue_size=10, replay_size=10, heartbeat_interval=60)
+    broker.publish(EventTopic.TAG, {"tag_id": "0"})
+
+    stream = broker.stream(broker.subscribe({EventTopic.TAG}), last_event_id=40)
+    assert (await anext(stream)).startswith(b"retry:")
+    assert await anext(stream) == b"id: 1\nevent: resync\ndata: {}\n\n"
+    broker.publish(EventTopic.TAG, {"tag_id": "1"})
+    assert await anext(stream) == b'id: 2\nevent: tag\ndata: {"tag_id":"1"}\n\n'
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_handle_flow_publishes_tag_and_routine(client: AsyncClient, database):
+    """Test the handle flow pushes the new tag mapping and routine."""
+
+    subscription = event_broker.subscribe(set(EventTopic))
+    try:
+        await client.get("/tag/handle", params={
+            "tag_id": "pushed-tag",
+            "name": "Tag",
+            "led_color": 3,
+            "music_id": 2,
+            "routine_id": 4,
+            "start_time": "08:00",
+            "end_time": "09:00",
+            "weekday": 1
+        })
+        events = {}
+        while not subscription.queue.empty():
+            _, topic, data = subscription.queue.get_nowait()
+            events[topic] = data
+    finally:
+        event_broker.unsubscribe(subscription)
+
+    assert events["routine"]["routine_id"] == 4
+    assert events["tag"] == {
+        "tag_id": "pushed-tag",
+        "preference_id": 1,
+        "music_id": 2,
+        "led_color": 3,
+        "routine_id": 4
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_tag_publishes_without_reading_the_preference(
+    client: AsyncClient, database
+):
+    """Test a tag written by ID is published without an extra query."""
+
+    await Database.execute(
+        preference_table.insert().values(preference_id=1, music_id=2, led_color=3))
+    statements = []
+    event.listen(
+        database.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2])
+    )
+    subscription = event_broker.subscribe({EventTopic.TAG})
+    try:
+        await client.post("/tag", json={"tag_id": "new-tag", "name": "Tag", "preference_id": 1})
+        _, _, data = subscription.queue.get_nowait()
+    finally:
+        event_broker.unsubscribe(subscription)
+
+    assert data["preference_id"] == 1
+    assert data["music_id"] is None
+    assert not any("FROM preference" in statement for statement in statements)
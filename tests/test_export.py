@@ -0,0 +1,42 @@
+"""Tests for export endpoints."""
+
+import json
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from src.database.database import Database
+from src.database.tables import history_table
+from src.routing.export import service
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gzip", [False, True])
+async def test_export_history_streams_ndjson(
+    client: AsyncClient, database, monkeypatch, gzip
+):
+    """Test history is streamed as NDJSON across several partitions."""
+
+    monkeypatch.setattr(service.export_config, "EXPORT_YIELD_PER", 2)
+    await Database.execute(history_table.insert().values([
+        {"tag_id": "export-tag", "timestamp": f"2024-01-01T10:00:0{second}"}
+        for second in range(5)
+    ]))
+
+    response = await client.get("/export/history", params={"gzip": gzip})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["history_id"] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[0]["tag_id"] == "export-tag"
+
+
+@pytest.mark.asyncio
+async def test_export_unknown_resource(client: AsyncClient):
+    """Test unknown resources are rejected."""
+
+    response = await client.get("/export/unknown")
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,98 @@
+"""Tests for the tag history writer and compactor."""
+
+import asyncio
+
+import pytest
+
+from src.database.database import Database
+from src.database.tables import history_daily_table, history_table
+from src.routing.tags.compaction import HistoryCompactor
+from src.routing.tags.history import HistoryWriter
+
+
+@pytest.mark.asyncio
+async def test_history_writer_writes_directly_when_stopped(database):
+    """Test rows are written immediately when the writer isn't running."""
+
+    writer = HistoryWriter(queue_size=10, batch_size=5, flush_interval=60)
+    await writer.record("tag-a", "2024-01-01T10:00:00")
+
+    rows = await Database.fetch_all(history_table.select())
+    assert [row.tag_id for row in rows] == ["tag-a"]
+
+
+@pytest.mark.asyncio
+async def test_history_writer_flushes_in_batches(database):
+    """Test queued rows are flushed in batches and drained on stop."""
+
+    writer = HistoryWriter(queue_size=100, batch_size=5, flush_interval=60)
+    await writer.start()
+    for index in range(12):
+        await writer.record("tag-a", f"2024-01-01T10:00:{index:02d}")
+    await writer.stop()
+
+    rows = await Database.fetch_all(history_table.select())
+    assert len(rows) == 12
+    assert writer.stats()["written"] == 12
+    assert writer.stats()["batches"] == 3
+    assert not writer.running
+
+
+@pytest.mark.asyncio
+async def test_history_writer_counts_backpressure(database):
+    """Test a full queue makes record wait and is counted."""
+
+    writer = HistoryWriter(queue_size=2, batch_size=50, flush_interval=0.01)
+    await writer.start()
+    for index in range(6):
+        await writer.record("tag-a", f"2024-01-01T10:00:{index:02d}")
+    await writer.stop()
+
+    assert writer.stats()["written"] == 6
+    assert writer.stats()["blocked"] > 0
+
+
+@pytest.mark.asyncio
+async def test_history_compactor_rolls_up_old_rows(database):
+    """Test old rows are summed per tag and day and then deleted."""
+
+    await Database.execute(history_table.insert().values([
+        {"tag_id": "tag-a", "timestamp": "2024-01-01T08:00:00"},
+        {"tag_id": "tag-a", "timestamp": "2024-01-01T20:00:00"},
+        {"tag_id": "tag-a", "timestamp": "2024-01-02T09:00:00"},
+        {"tag_id": "tag-b", "timestamp": "2024-01-01T12:00:00"},
+        {"tag_id": "tag-a", "timestamp": "2024-03-01T10:00:00"},
+    ]))
+    compactor = HistoryCompactor(retention_days=30, interval=60, batch_size=2)
+
+    assert await compactor.compact("2024-02-01") == 4
+    await Database.execute(history_table.insert().values(
+        tag_id="tag-a", timestamp="2024-01-01T06:00:00"))
+    assert await compactor.compact("2024-02-01") == 1
+
+    raw = await Database.fetch_all(history_table.select())
+    assert [row.timestamp for row in raw] == ["2024-03-01T10:00:00"]
+    daily = await Database.fetch_all(
+        history_daily_table.select().order_by("tag_id", "day"))
+    assert [tuple(row.values()) for row in daily] == [
+        ("tag-a", "2024-01-01", 3, "2024-01-01T06:00:00", "2024-01-01T20:00:00"),
+        ("tag-a", "2024-01-02", 1, "2024-01-02T09:00:00", "2024-01-02T09:00:00"),
+        ("tag-b", "2024-01-01", 1, "2024-01-01T12:00:00", "2024-01-01T12:00:00"),
+    ]
+    assert compactor.stats()["compacted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_history_compactor_runs_in_background(database):
+    """Test the compactor runs a pass on start and stops cleanly."""
+
+    await Database.execute(history_table.insert().values(
+        tag_id="tag-a", timestamp="2000-01-01T08:00:00"))
+    compactor = HistoryCompactor(retention_days=1, interval=60, batch_size=10)
+    await compactor.start()
+    while not compactor.passes:
+        await asyncio.sleep(0.01)
+    await compactor.stop()
+
+    assert not compactor.running
+    assert await Database.fetch_all(history_table.select()) == []
@@ -0,0 +1,50 @@
+"""Tests for the metrics subsystem."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from src.app.metrics import Histogram, statement_label
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test histograms render cumulative buckets, sum and count."""
+
+    histogram = Histogram("latency_seconds", "Latency.", labels=("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_statement_label():
+    """Test statements are reduced to their kind and first table."""
+
+    assert statement_label("SELECT tag.name FROM tag WHERE tag.tag_id = ?") == "SELECT tag"
+    assert statement_label("INSERT INTO history (tag_id) VALUES (?)") == "INSERT history"
+    assert statement_label("UPDATE routine SET weekday=?") == "UPDATE routine"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient, database):
+    """Test route latency and database timings are exposed."""
+
+    await client.get("/tag", params={"tag_id": "missing-tag"})
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/tag",status="404"}'
+        in response.text
+    )
+    assert 'db_query_duration_seconds_count{statement="SELECT tag"}' in response.text
+    assert "db_connection_acquire_seconds_count" in response.text
+    assert 'db_pool_connections{state="checkedout"}' in response.text
@@ -0,0 +1,64 @@
+"""Tests for music operations."""
+
+import struct
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from src.database.database import Database
+from src.database.tables import music_table
+from src.routing.music.exceptions import InvalidMusicContentException
+from src.routing.music.utils import NOTE_FORMAT, MusicUtils
+
+
+def test_compile_content():
+    """Test note tokens are compiled into frequency and duration pairs."""
+
+    stream = MusicUtils.compile_content("E5:8, rest:4\nA4:2", bpm=120)
+
+    assert list(struct.iter_unpack(NOTE_FORMAT, stream)) == [
+        (659, 250), (0, 500), (440, 1000)
+    ]
+    with pytest.raises(InvalidMusicContentException):
+        MusicUtils.compile_content("E5:8 H9:4", bpm=120)
+
+
+@pytest.mark.asyncio
+async def test_music_stream_with_etag(client: AsyncClient, database):
+    """Test the compiled stream is served with an ETag and revalidated."""
+
+    created = await client.post(
+        "/music", json={"name": "Song", "content": "C5:4 D5:4", "bpm": 60})
+    invalid = await client.post("/music", json={"name": "Bad", "content": "C5"})
+    response = await client.get("/music/stream", params={"music_id": 1})
+    revalidated = await client.get(
+        "/music/stream",
+        params={"music_id": 1},
+        headers={"If-None-Match": response.headers["etag"]}
+    )
+
+    assert created.status_code == status.HTTP_201_CREATED
+    assert invalid.status_code == InvalidMusicContentException.STATUS_CODE
+    assert list(struct.iter_unpack(NOTE_FORMAT, response.content)) == [
+        (523, 1000), (587, 1000)
+    ]
+    assert response.headers["x-music-bpm"] == "60"
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+    assert revalidated.content == b""
+
+
+@pytest.mark.asyncio
+async def test_music_stream_compiles_existing_music(client: AsyncClient, database):
+    """Test musics stored before compilation are compiled on first request."""
+
+    await Database.execute(
+        music_table.insert().values(music_id=7, name="Old", content="A4:4"))
+
+    first = await client.get("/music/stream", params={"music_id": 7})
+    second = await client.get("/music/stream", params={"music_id": 7})
+    missing = await client.get("/music/stream", params={"music_id": 8})
+
+    assert first.content == struct.pack(NOTE_FORMAT, 440, 500)
+    assert second.headers["etag"] == first.headers["etag"]
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
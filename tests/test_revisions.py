@@ -0,0 +1,48 @@
+"""Tests for the table revisions behind conditional GET requests."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.app.revisions import TableRevisions
+
+
+def test_table_revisions_etag():
+    """Test ETags change with the revision of the tables they read."""
+
+    revisions = TableRevisions(max_staleness=0)
+    music, both = revisions.etag("music"), revisions.etag("music", "tag")
+
+    revisions.bump("tag")
+
+    assert revisions.etag("music") == music
+    assert revisions.etag("music", "tag") != both
+    assert music.startswith('"' + revisions.boot_id)
+
+
+@pytest.mark.asyncio
+async def test_catalogue_not_modified_without_query(client: AsyncClient, database):
+    """Test a current ETag is answered with 304 before any query runs."""
+
+    first = await client.get("/musics")
+    statements = []
+    event.listen(
+        database.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2])
+    )
+
+    cached = await client.get("/musics", headers={"If-None-Match": first.headers["etag"]})
+    weak = await client.get(
+        "/musics", headers={"If-None-Match": "W/" + first.headers["etag"]})
+    assert statements == []
+    await client.post("/music", json={"name": "Song", "content": "C5:4"})
+    changed = await client.get(
+        "/musics", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.json() == []
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert weak.status_code == status.HTTP_304_NOT_MODIFIED
+    assert changed.status_code == status.HTTP_200_OK
+    assert [music["name"] for music in changed.json()] == ["Song"]
@@ -0,0 +1,77 @@
+"""Tests for routine scheduling."""
+
+from datetime import datetime
+
+import pytest
+
+from src.routing.routine import utils
+from src.routing.routine.utils import RoutineSchedule, RoutineUtils
+
+
+@pytest.fixture(autouse=True)
+def no_hours_adjust(monkeypatch):
+    """Fixture to evaluate routine windows without timezone adjustment."""
+    monkeypatch.setattr(utils.routine_config, "HOURS_ADJUST", 0)
+
+
+def minute(day: int, hour: int, minute: int) -> int:
+    """Build the minute of the week of a 2024-01-XX date (1st is a Monday)."""
+    return RoutineUtils.minute_of_week(datetime(2024, 1, day, hour, minute))
+
+
+def test_minute_of_week_starts_on_sunday():
+    """Test Sunday is day 0 and Monday is day 1."""
+
+    assert minute(7, 0, 0) == 0
+    assert minute(1, 10, 30) == utils.MINUTES_PER_DAY + 10 * 60 + 30
+
+
+def test_window_checks_start_and_end_minutes():
+    """Test both boundary minutes of a window are honoured."""
+
+    window = RoutineUtils.compile_window(1, "08:30", "09:15")
+
+    assert not RoutineUtils.in_window(window, minute(1, 8, 29))
+    assert RoutineUtils.in_window(window, minute(1, 8, 30))
+    assert RoutineUtils.in_window(window, minute(1, 9, 15))
+    assert not RoutineUtils.in_window(window, minute(1, 9, 16))
+    assert not RoutineUtils.in_window(window, minute(2, 8, 45))
+
+
+def test_window_runs_past_midnight():
+    """Test a window ending before its start continues the next day."""
+
+    window = RoutineUtils.compile_window(6, "22:00", "01:00")
+
+    assert RoutineUtils.in_window(window, minute(6, 23, 0))
+    assert RoutineUtils.in_window(window, minute(7, 0, 30))
+    assert not RoutineUtils.in_window(window, minute(7, 1, 1))
+
+
+def test_invalid_window_is_never_runnable():
+    """Test unparsable times compile to an empty window."""
+
+    assert RoutineUtils.compile_window(1, "morning", "09:00") == ()
+
+
+def test_schedule_rebuild_and_set():
+    """Test the schedule index stores compiled windows by routine ID."""
+
+    schedule = RoutineSchedule()
+    schedule.set(1, 1, "08:00", "09:00")
+    assert schedule.get(1) == RoutineUtils.compile_window(1, "08:00", "09:00")
+
+    schedule.rebuild([])
+    assert schedule.get(1) is None
+
+
+def test_schedule_window_reuses_current_entry():
+    """Test a window is only recompiled when the routine changed."""
+
+    schedule = RoutineSchedule()
+    window = schedule.set(1, 1, "08:00", "09:00")
+
+    assert schedule.window(1, 1, "08:00", "09:00") is window
+    assert schedule.window(1, 1, "08:00", "10:00") == RoutineUtils.compile_window(
+        1, "08:00", "10:00")
+    assert schedule.get(1) == RoutineUtils.compile_window(1, "08:00", "10:00")
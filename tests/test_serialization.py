@@ -0,0 +1,43 @@
+"""Tests for the row serializer."""
+
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from src.app.serialization import RowSerializer
+from src.database.database import Database
+from src.database.tables import preference_table
+from src.routing.preference.schemas import PreferenceRow
+
+
+@pytest.mark.asyncio
+async def test_row_serializer_dumps_declared_columns(database):
+    """Test rows are dumped with the keys of the row type only."""
+
+    await Database.execute(preference_table.insert().values(
+        preference_id=1, music_id=2, led_color=3))
+    rows = await Database.fetch_all(preference_table.select())
+    serializer = RowSerializer(PreferenceRow)
+
+    assert json.loads(serializer.dump_many(rows)) == [
+        {"preference_id": 1, "music_id": 2, "led_color": 3}
+    ]
+    assert json.loads(serializer.dump_one(rows[0])) == json.loads(serializer.dump_many(rows))[0]
+
+
+@pytest.mark.asyncio
+async def test_preference_endpoints_use_row_serializer(client: AsyncClient, database):
+    """Test the lookup and list endpoints return the serialized rows."""
+
+    await Database.execute(preference_table.insert().values(
+        preference_id=1, music_id=2, led_color=3))
+
+    listed = await client.get("/preferences")
+    found = await client.get("/preference", params={"music_id": 2, "led_color": 3})
+    missing = await client.get("/preference", params={"music_id": 9, "led_color": 9})
+
+    assert listed.headers["content-type"] == "application/json"
+    assert "etag" in listed.headers
+    assert listed.json() == [found.json()]
+    assert missing.status_code == 404
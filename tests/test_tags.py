@@ -1,13 +1,47 @@
 """Tests for tags service."""
 
+import asyncio
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi import status
+from sqlalchemy import event
 
 from httpx import AsyncClient
 
+from src.app.revisions import table_revisions
+from src.database import database as db
+from src.database.database import Database
+from src.database.tables import (
+    history_table,
+    music_table,
+    preference_table,
+    routine_table,
+    tag_table
+)
+from src.routing.tags import dedup
+from src.routing.tags.compaction import HistoryCompactor, history_compactor
+from src.routing.tags.dedup import RecentTaps, recent_taps
+from src.routing.tags.schemas import TagRequest
+from src.routing.tags.service import tag_service
+from src.routing.tags.utils import (
+    TAG_RECORD_FLAG_ROUTINE,
+    TAG_RECORD_FORMAT,
+    TAG_RECORD_MEDIA_TYPE,
+    TAG_RECORD_VERSION,
+    TagUtils,
+    tag_config,
+    tag_resolutions
+)
 from src.routing.tags.exceptions import (
+    InvalidBulkPayloadException,
+    InvalidHistoryCursorException,
     TagAlreadyExistsException,
-    TagNotFoundException
+    TagNotFoundException,
+    TagRecordOutOfRangeException,
+    TagResolutionTimeoutException
 )
 
 
@@ -65,3 +99,483 @@ async def test_get_tag_not_found(client: AsyncClient):
     response = await client.get(f"/tag?id={tag_id}")
     assert response.status_code == TagNotFoundException.STATUS_CODE
     assert response.json().get("detail") == TagNotFoundException.DETAIL.format(id=tag_id)
+
+
+@pytest.mark.asyncio
+async def test_get_tag_resolves_in_one_query(client: AsyncClient, database):
+    """Test resolving a tag with its preference and routine."""
+
+    await Database.execute_many([
+        music_table.insert().values(music_id=1, name="Mario", content="E5:8"),
+        preference_table.insert().values(preference_id=1, music_id=1, led_color=2),
+        routine_table.insert().values(
+            routine_id=7, start_time="00:00", end_time="00:00", weekday=0),
+        tag_table.insert().values(
+            tag_id="resolved-tag", name="Tag", preference_id=1, routine_id=7),
+    ])
+    statements = []
+    event.listen(
+        database.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2])
+    )
+
+    response = await client.get("/tag", params={"tag_id": "resolved-tag"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"led_color": 2, "music_id": 1, "routine_id": None}
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tag_is_served_from_cache(client: AsyncClient, database):
+    """Test repeated tag lookups skip the database until invalidated."""
+
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=1, led_color=2),
+        preference_table.insert().values(preference_id=2, music_id=3, led_color=4),
+        tag_table.insert().values(tag_id="cached-tag", name="Tag", preference_id=1),
+    ])
+    statements = []
+    event.listen(
+        database.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2])
+    )
+
+    for _ in range(3):
+        response = await client.get("/tag", params={"tag_id": "cached-tag"})
+        assert response.json()["led_color"] == 2
+    assert len(statements) == 1
+
+    await tag_service.update_tag_by_id(
+        TagRequest(tag_id="cached-tag", name="Tag", preference_id=2))
+    response = await client.get("/tag", params={"tag_id": "cached-tag"})
+    assert response.json()["led_color"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_tag_revalidates_with_etag(client: AsyncClient, database):
+    """Test a device copy is confirmed with 304 until the tag changes."""
+
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=1, led_color=2),
+        preference_table.insert().values(preference_id=2, music_id=3, led_color=4),
+        tag_table.insert().values(tag_id="etag-tag", name="Tag", preference_id=1),
+    ])
+    params = {"tag_id": "etag-tag", "format": "bin"}
+
+    response = await client.get("/tag", params=params)
+    etag = response.headers["etag"]
+    assert etag == f'"{response.content.hex()}"'
+    assert etag != (await client.get("/tag", params={"tag_id": "etag-tag"})).headers["etag"]
+
+    response = await client.get("/tag", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    await tag_service.update_tag_by_id(
+        TagRequest(tag_id="etag-tag", name="Tag", preference_id=2))
+    response = await client.get("/tag", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_tag_coalesces_concurrent_lookups(client: AsyncClient, database):
+    """Test a burst of lookups of an uncached tag runs a single query."""
+
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=1, led_color=2),
+        tag_table.insert().values(tag_id="burst-tag", name="Tag", preference_id=1),
+    ])
+    statements = []
+    event.listen(
+        database.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2])
+    )
+
+    responses = await asyncio.gather(*(
+        client.get("/tag", params={"tag_id": "burst-tag"}) for _ in range(20)
+    ))
+
+    assert {response.json()["led_color"] for response in responses} == {2}
+    assert len(statements) == 1
+    assert tag_resolutions.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_tag_resolution_timeout(client: AsyncClient, database, monkeypatch):
+    """Test a lookup waiting longer than the timeout answers 504."""
+
+    async def slow_load(tag_id: str) -> dict:
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(type(tag_service), "load_resolution", staticmethod(slow_load))
+    monkeypatch.setattr(tag_resolutions, "timeout", 0.01)
+
+    response = await client.get("/tag", params={"tag_id": "slow-tag"})
+
+    assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert response.json() == {
+        "detail": TagResolutionTimeoutException(id="slow-tag").detail}
+
+
+@pytest.mark.asyncio
+async def test_get_tag_binary_record(client: AsyncClient, database):
+    """Test the packed binary record is negotiated by parameter or header."""
+
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=300, led_color=2),
+        tag_table.insert().values(tag_id="binary-tag", name="Tag", preference_id=1),
+    ])
+
+    by_param = await client.get("/tag", params={"tag_id": "binary-tag", "format": "bin"})
+    by_header = await client.get(
+        "/tag",
+        params={"tag_id": "binary-tag"},
+        headers={"Accept": TAG_RECORD_MEDIA_TYPE}
+    )
+    default = await client.get("/tag", params={"tag_id": "binary-tag"})
+
+    assert by_param.headers["content-type"] == TAG_RECORD_MEDIA_TYPE
+    assert by_param.content == by_header.content
+    assert struct.unpack(TAG_RECORD_FORMAT, by_param.content) == (
+        TAG_RECORD_VERSION, 2, 300, 0, 0)
+    assert default.json() == {"led_color": 2, "music_id": 300, "routine_id": None}
+    record = TagUtils.pack_resolution(
+        "binary-tag", {"led_color": 1, "music_id": 2, "routine_id": 7})
+    assert struct.unpack(TAG_RECORD_FORMAT, record)[3:] == (7, TAG_RECORD_FLAG_ROUTINE)
+
+
+@pytest.mark.asyncio
+async def test_binary_record_fields_are_bounded(client: AsyncClient):
+    """Test values that don't fit the binary record are rejected or refused."""
+
+    response = await client.get("/tag/handle", params={
+        "tag_id": "wide-tag", "name": "Tag", "led_color": 16711680, "music_id": 1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    with pytest.raises(TagRecordOutOfRangeException):
+        TagUtils.pack_resolution(
+            "wide-tag", {"led_color": 16711680, "music_id": 1, "routine_id": None})
+
+
+@pytest.mark.asyncio
+async def test_get_tag_out_of_range_row_is_served_as_json(client: AsyncClient, database):
+    """Test a legacy row too wide for the record still resolves as JSON."""
+
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=1, led_color=16711680),
+        tag_table.insert().values(tag_id="wide-tag", name="Tag", preference_id=1),
+    ])
+
+    response = await client.get("/tag", params={"tag_id": "wide-tag"})
+    binary = await client.get("/tag", params={"tag_id": "wide-tag", "format": "bin"})
+
+    assert response.json() == {"led_color": 16711680, "music_id": 1, "routine_id": None}
+    assert response.headers["etag"] == '"16711680-1-None-json"'
+    assert binary.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+
+@pytest.mark.asyncio
+async def test_handle_tag_request_upserts_in_one_transaction(
+    client: AsyncClient, database
+):
+    """Test the handle flow creates then updates rows on one connection."""
+
+    checkouts = []
+    event.listen(
+        database.sync_engine.pool, "checkout", lambda *args: checkouts.append(1))
+    params = {
+        "tag_id": "handled-tag",
+        "name": "Tag",
+        "led_color": 1,
+        "music_id": 2,
+        "routine_id": 3,
+        "start_time": "08:00",
+        "end_time": "09:00",
+        "weekday": 1,
+    }
+
+    response = await client.get("/tag/handle", params=params)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(checkouts) == 3  # upsert transaction, resolution and history row
+
+    params.update(led_color=5, end_time="10:00")
+    response = await client.get("/tag/handle", params=params)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    tag = await Database.fetch_one(tag_table.select())
+    routine = await Database.fetch_one(routine_table.select())
+    preferences = await Database.fetch_all(preference_table.select())
+    assert routine.end_time == "10:00"
+    assert len(preferences) == 2
+    assert tag.preference_id == preferences[1].preference_id
+    assert tag.routine_id == 3
+
+    revision = table_revisions.etag(preference_table.name)
+    await client.get("/tag/handle", params={**params, "device_id": "reader-2"})
+    assert table_revisions.etag(preference_table.name) == revision
+
+
+@pytest.mark.asyncio
+async def test_handle_tag_request_is_read_back_despite_lagging_reader(
+    client: AsyncClient, database, tmp_path, monkeypatch
+):
+    """Test a lookup right after a handled tap reflects it with a stale reader."""
+
+    reader = db.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'reader.db'}")
+    async with reader.begin() as conn:
+        await conn.run_sync(db.Base.metadata.create_all)
+    monkeypatch.setattr(db, "reader_engine", reader)
+    try:
+        await client.get("/tag/handle", params={
+            "tag_id": "lagging-tag", "name": "Tag", "led_color": 6, "music_id": 2})
+        response = await client.get("/tag", params={"tag_id": "lagging-tag"})
+    finally:
+        await reader.dispose()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"led_color": 6, "music_id": 2, "routine_id": None}
+
+@pytest.mark.asyncio
+async def test_handle_tag_request_drops_repeated_taps(client: AsyncClient, database):
+    """Test repeats of a device tap inside the window are not written."""
+
+    params = {
+        "tag_id": "resting-tag",
+        "name": "Tag",
+        "led_color": 1,
+        "music_id": 2,
+        "device_id": "reader-1",
+    }
+
+    for _ in range(3):
+        response = await client.get("/tag/handle", params=params)
+        assert response.status_code == status.HTTP_201_CREATED
+    await client.get("/tag/handle", params={**params, "device_id": "reader-2"})
+    await client.get("/tag/handle", params={**params, "led_color": 3})
+
+    history = await Database.fetch_all(history_table.select())
+    preference = await Database.fetch_one(preference_table.select().where(
+        preference_table.c.preference_id == (
+            await Database.fetch_one(tag_table.select())).preference_id))
+    assert len(history) == 3  # first tap, second reader, new configuration
+    assert preference.led_color == 3
+    assert recent_taps.stats()["suppressed"] >= 2
+
+
+def test_recent_taps_expire_after_window(monkeypatch):
+    """Test a tap is written again once the window has elapsed."""
+
+    now = [100.0]
+    monkeypatch.setattr(dedup, "monotonic", lambda: now[0])
+    taps = RecentTaps(window=5, max_size=10)
+    taps.record("tag", "reader", 1)
+
+    assert taps.seen("tag", "reader", 1)
+    assert not taps.seen("tag", "reader", 2)
+    now[0] += 6
+    assert not taps.seen("tag", "reader", 1)
+    assert len(taps) == 0
+
+
+@pytest.mark.asyncio
+async def test_ingest_taps_records_batch_with_device_timestamps(
+    client: AsyncClient, database, monkeypatch
+):
+    """Test a buffered batch is recorded in one go and resolved per tag."""
+
+    monkeypatch.setattr(history_compactor, "cutoff", lambda: "2026-02-01")
+    await Database.execute_many([
+        preference_table.insert().values(preference_id=1, music_id=4, led_color=2),
+        tag_table.insert().values(
+            tag_id="offline-tag", name="Tag", preference_id=1,
+            first_use="2026-01-01T00:00:00", last_use="2026-01-01T00:00:00"),
+    ])
+    taps = [
+        {"device_id": device_id, "tag_id": tag_id, "timestamp": f"2026-03-01T{time}"}
+        for device_id, tag_id, time in [
+            ("reader-1", "offline-tag", "08:00:00"),
+            ("reader-1", "offline-tag", "08:00:02"),  # resting card
+            ("reader-1", "offline-tag", "09:30:00"),
+            ("reader-2", "offline-tag", "08:00:01"),
+            ("reader-1", "missing-tag", "08:00:00"),
+        ]
+    ]
+
+    response = await client.post("/tag/taps", json=taps)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "recorded": 3,
+        "duplicates": 1,
+        "expired": 0,
+        "unknown": ["missing-tag"],
+        "resolutions": {
+            "offline-tag": {"led_color": 2, "music_id": 4, "routine_id": None}
+        }
+    }
+    history = await Database.fetch_all(
+        history_table.select().order_by(history_table.c.timestamp))
+    tag = await Database.fetch_one(tag_table.select())
+    assert [row.timestamp for row in history] == [
+        "2026-03-01T08:00:00", "2026-03-01T08:00:01", "2026-03-01T09:30:00"]
+    assert tag.last_use == "2026-03-01T09:30:00"
+
+    resent = await client.post("/tag/taps", json=taps)
+
+    assert resent.json()["recorded"] == 0
+    assert resent.json()["duplicates"] == 4
+    assert len(await Database.fetch_all(history_table.select())) == 3
+
+    monkeypatch.setattr(history_compactor, "cutoff", lambda: "2026-03-02")
+    compacted = await client.post("/tag/taps", json=taps)
+
+    assert compacted.json()["recorded"] == 0
+    assert compacted.json()["expired"] == 3
+    assert len(await Database.fetch_all(history_table.select())) == 3
+
+
+@pytest.mark.asyncio
+async def test_recorded_taps_are_looked_up_in_chunks(database):
+    """Test the already-recorded lookup spans several statements."""
+
+    await Database.execute(history_table.insert().values([
+        {"tag_id": "chunk-tag", "timestamp": f"2026-03-01T08:00:0{second}"}
+        for second in range(3)
+    ]))
+    rows = [
+        {"tag_id": "chunk-tag", "timestamp": f"2026-03-01T08:00:0{second}"}
+        for second in range(5)
+    ]
+
+    async with Database.transaction() as conn:
+        fresh = await tag_service._drop_recorded_taps(conn, rows, chunk_size=2)
+
+    assert [row["timestamp"][-1] for row in fresh] == ["3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_taps_rejects_oversized_batch(client: AsyncClient, monkeypatch):
+    """Test a batch larger than TAP_BATCH_MAX_SIZE is rejected."""
+
+    monkeypatch.setattr(tag_config, "TAP_BATCH_MAX_SIZE", 1)
+    taps = [{"tag_id": "tag", "timestamp": "2026-03-01T08:00:00"}] * 2
+
+    response = await client.post("/tag/taps", json=taps)
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_bulk_handle_tag_requests(client: AsyncClient, database):
+    """Test provisioning tags from an NDJSON body with per-item results."""
+
+    lines = [
+        {"tag_id": "bulk-1", "name": "A", "preference": {"music_id": 1, "led_color": 1}},
+        {"tag_id": "bulk-2", "name": "B", "preference": {"music_id": 1, "led_color": 1},
+         "routine": {"routine_id": 4, "start_time": "08:00", "end_time": "09:00", "weekday": 2}},
+        {"tag_id": "bulk-3", "name": "C"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+
+    response = await client.post(
+        "/tag/bulk",
+        content=body,
+        headers={"content-type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [result["status"] for result in results] == ["ok", "ok", "error"]
+    assert results[2]["tag_id"] == "bulk-3"
+    preferences = await Database.fetch_all(preference_table.select())
+    tags = await Database.fetch_all(tag_table.select())
+    assert len(preferences) == 1
+    assert {tag.tag_id: tag.routine_id for tag in tags} == {"bulk-1": None, "bulk-2": 4}
+
+    revision = table_revisions.etag(preference_table.name)
+    await client.post("/tag/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    assert table_revisions.etag(preference_table.name) == revision
+
+
+@pytest.mark.asyncio
+async def test_bulk_handle_tag_requests_invalid_body(client: AsyncClient):
+    """Test a body that isn't a JSON array is rejected."""
+
+    response = await client.post("/tag/bulk", content=b"{}")
+
+    assert response.status_code == InvalidBulkPayloadException.STATUS_CODE
+
+
+@pytest.mark.asyncio
+async def test_get_tag_history_pages_with_cursor(client: AsyncClient, database):
+    """Test history pages follow the cursor and honour time filters."""
+
+    await Database.execute_many([
+        tag_table.insert().values(tag_id="history-tag", name="Tag", preference_id=1),
+        history_table.insert().values([
+            {"tag_id": "history-tag", "timestamp": f"2024-01-0{day}T10:00:00"}
+            for day in range(1, 6)
+        ]),
+    ])
+
+    params = {"id": "history-tag", "limit": 2, "since": "2024-01-02T00:00:00"}
+    first = await client.get("/tag/history", params=params)
+    second = await client.get(
+        "/tag/history",
+        params={**params, "cursor": first.headers["X-Next-Cursor"]}
+    )
+
+    assert [row["timestamp"][:10] for row in first.json()] == ["2024-01-02", "2024-01-03"]
+    assert [row["timestamp"][:10] for row in second.json()] == ["2024-01-04", "2024-01-05"]
+    assert "X-Next-Cursor" not in second.headers
+
+    local = datetime(2024, 1, 4, 10).astimezone()
+    aware = await client.get("/tag/history", params={
+        "id": "history-tag",
+        "since": local.astimezone(timezone(timedelta(hours=5))).isoformat()
+    })
+    assert [row["timestamp"][:10] for row in aware.json()] == ["2024-01-04", "2024-01-05"]
+
+    invalid = await client.get("/tag/history", params={**params, "cursor": "x"})
+    assert invalid.status_code == InvalidHistoryCursorException.STATUS_CODE
+    missing = await client.get("/tag/history", params={"id": "missing-tag"})
+    assert missing.status_code == TagNotFoundException.STATUS_CODE
+
+
+@pytest.mark.asyncio
+async def test_get_tag_history_merges_daily_rollups(client: AsyncClient, database):
+    """Test compacted days are returned before the raw rows of the tag."""
+
+    await Database.execute_many([
+        tag_table.insert().values(tag_id="rollup-tag", name="Tag", preference_id=1),
+        history_table.insert().values([
+            {"tag_id": "rollup-tag", "timestamp": "2024-01-01T08:00:00"},
+            {"tag_id": "rollup-tag", "timestamp": "2024-01-01T18:00:00"},
+            {"tag_id": "rollup-tag", "timestamp": "2024-03-01T10:00:00"},
+        ]),
+    ])
+    await HistoryCompactor(retention_days=30, interval=60, batch_size=10).compact(
+        "2024-02-01")
+
+    params = {"id": "rollup-tag", "limit": 1}
+    first = await client.get("/tag/history", params=params)
+    second = await client.get(
+        "/tag/history",
+        params={**params, "cursor": first.headers["X-Next-Cursor"]}
+    )
+
+    assert first.json() == [{
+        "history_id": 0,
+        "tag_id": "rollup-tag",
+        "timestamp": "2024-01-01T08:00:00",
+        "last_timestamp": "2024-01-01T18:00:00",
+        "tap_count": 2
+    }]
+    assert [row["tap_count"] for row in second.json()] == [1]
+    assert second.json()[0]["timestamp"] == "2024-03-01T10:00:00"
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,37 @@
+"""Tests for the Server-Timing header."""
+
+import json
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_server_timing_counts_db_round_trips(client: AsyncClient, database):
+    """Test responses report their phases and database round trips."""
+
+    response = await client.get(
+        "/tag",
+        params={"tag_id": "missing-tag"},
+        headers={"X-Debug-Timing": "1"}
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    server_timing = response.headers["server-timing"]
+    assert 'db;dur=' in server_timing
+    assert 'desc="1 round trips"' in server_timing
+    assert "db-1-fetch_one;dur=" in server_timing
+    debug = json.loads(response.headers["x-request-timing"])
+    assert debug["db_round_trips"] == 1
+    assert {"validation", "handler", "serialization", "total"} <= set(debug["phases"])
+
+
+@pytest.mark.asyncio
+async def test_server_timing_without_debug(client: AsyncClient):
+    """Test the debug header is only sent when requested."""
+
+    response = await client.get("/metrics")
+
+    assert "total;dur=" in response.headers["server-timing"]
+    assert "x-request-timing" not in response.headers